@@ -3,7 +3,10 @@ from django.contrib.admin.utils import quote
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
-from .models import Chat
+from .agent.sampling import is_sampling_enabled
+from .exports import is_export_available
+from .models import ArchivedChat, Chat, Profile, QueryLog
+from .profiling import get_flame_graph, get_top_functions
 from .services import UserService
 
 
@@ -13,8 +16,7 @@ class ChatAdmin(admin.ModelAdmin):
     change_form_template = "admin/chat/chat_form.html"
 
     def get_queryset(self, request):
-        qs = super().get_queryset(request).filter(user=request.user)
-        return qs.prefetch_related("messages")
+        return super().get_queryset(request).filter(user=request.user)
 
     def add_view(self, request, form_url="", extra_context=None):
         service = UserService(request.user)
@@ -26,3 +28,84 @@ class ChatAdmin(admin.ModelAdmin):
             current_app=self.admin_site.name,
         )
         return HttpResponseRedirect(obj_url)
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        extra_context = {
+            "sampling_enabled": is_sampling_enabled(),
+            "exports_available": is_export_available(),
+            **(extra_context or {}),
+        }
+        return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ["message", "chat", "duration", "created_at"]
+    list_select_related = ["message"]
+    fields = ["message", "duration", "created_at"]
+    change_form_template = "admin/chat/profile_form.html"
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs if request.user.is_superuser else qs.filter(message__chat__user=request.user)
+
+    @admin.display(ordering="message__chat")
+    def chat(self, obj):
+        return obj.message.chat_id
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        profile = self.get_object(request, object_id)
+
+        if profile is not None:
+            extra_context = {
+                "top_functions": get_top_functions(profile),
+                "flame_graph": get_flame_graph(profile),
+                "queries": sorted(profile.queries, key=lambda query: -query["seconds"]),
+                **(extra_context or {}),
+            }
+
+        return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(ArchivedChat)
+class ArchivedChatAdmin(admin.ModelAdmin):
+    list_display = ["original_id", "user", "message_count", "created_at", "updated_at", "archived_at"]
+    fields = ["original_id", "user", "message_count", "created_at", "updated_at", "archived_at"]
+    change_form_template = "admin/chat/archived_chat_form.html"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(user=request.user).defer("messages")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        archive = self.get_object(request, object_id)
+
+        if archive is not None:
+            extra_context = {"archived_messages": archive.get_messages(), **(extra_context or {})}
+
+        return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(QueryLog)
+class QueryLogAdmin(admin.ModelAdmin):
+    list_display = ["fingerprint", "dialect", "duration", "rows", "error", "created_at"]
+    list_filter = ["dialect"]
+    search_fields = ["fingerprint"]
+    fields = ["fingerprint", "normalized", "sql", "dialect", "duration", "rows", "plan", "error", "created_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,16 +1,36 @@
-from pandasai import Agent as PandasAIAgent
+from typing import Any
 
-from .config import get_config
-from .connectors import get_connectors
+from django.conf import settings
 
 
-class Agent(PandasAIAgent):
+def __getattr__(name: str) -> Any:
+    # The agent pulls in PandasAI, pandas and matplotlib, so it is only imported on first use
+    if name == "Agent":
+        from .agent import Agent
+
+        return Agent
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def preload():
+    """
+    Imports the agent stack and builds the schema index ahead of the first question.
+
+    Meant to run in a server master process before it forks its workers, e.g. with `gunicorn --preload`, so the
+    workers share the loaded modules copy-on-write instead of each importing them.
     """
-    PandasAI Agent for chatting with the Django backend data.
+    from .agent import Agent  # noqa: F401
+    from .schema import get_schema_index
+
+    get_schema_index()
+
+
+def is_preload_enabled() -> bool:
     """
+    Returns whether the agent stack is preloaded when the WSGI application is loaded.
 
-    def __init__(self):
-        super().__init__(
-            dfs=get_connectors(),
-            config=get_config(),
-        )
+    Returns:
+        bool: True if the agent stack is preloaded.
+    """
+    return bool(getattr(settings, "PANDASAI_PRELOAD", False))
@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+from typing import Optional
+
+import matplotlib
+from pandasai import Agent as PandasAIAgent
+
+from .config import get_config
+from .columnar import is_columnar_enabled
+from .connectors import get_connectors
+from .execution import ChatPipeline, PooledChatPipeline, is_pooled_execution_enabled
+from .sampling import get_sample_fractions
+
+# Charts are rendered to files, never displayed
+matplotlib.use("agg")
+
+
+class Agent(PandasAIAgent):
+    """
+    PandasAI Agent for chatting with the Django backend data.
+
+    When built for a question, the agent only sees the tables relevant to it. With the columnar engine enabled, the
+    agent answers from the table snapshots, which are fast enough that sampling is skipped. With the pooled code
+    execution enabled, the generated code runs in the code execution workers instead of the web worker.
+
+    Each agent saves its charts in its own directory, named after the prompt ID, so that concurrent runs do not
+    overwrite each other's charts. The directory is removed once the answer, embedding the chart, is parsed.
+
+    Attributes:
+        sample_fraction (Optional[float]): Fraction of the rows the agent answers from, as stored when the sample
+            tables were materialized, or None for exact answers. The smallest fraction is kept when the sample tables
+            were materialized with different fractions.
+        charts_path (str): Directory of the charts of the agent.
+    """
+
+    def __init__(self, question: Optional[str] = None, sampled: bool = False):
+        self.sample_fraction: Optional[float] = None
+        self.charts_path = tempfile.mkdtemp(prefix="pandasai-charts-")
+
+        sampled = sampled and not is_columnar_enabled()
+        connectors = get_connectors(sampled=sampled, question=question)
+
+        if sampled:
+            fractions = get_sample_fractions()
+            used = [
+                fractions[connector.config.table] for connector in connectors if connector.config.table in fractions
+            ]
+            self.sample_fraction = min(used, default=None)
+
+        super().__init__(
+            dfs=connectors,
+            config=get_config() | {"save_charts": True, "save_charts_path": self.charts_path},
+            pipeline=PooledChatPipeline if is_pooled_execution_enabled() else ChatPipeline,
+        )
+
+    def chat(self, query: str, output_type: Optional[str] = None):
+        try:
+            return super().chat(query, output_type)
+        finally:
+            shutil.rmtree(self.charts_path, ignore_errors=True)
@@ -0,0 +1,335 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Field, Model, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import QueryableModel
+from .config import get_database_alias
+from .joins import get_many_to_many_fields
+
+DEFAULT_COLUMNAR_CONFIG = {
+    "enabled": False,
+    "path": "snapshots",
+    "threads": None,
+    "memory_limit": None,
+    "batch_size": 50000,
+}
+
+STATE_FILE = "_state.json"
+
+DUCKDB_TYPES = {
+    "AutoField": "INTEGER",
+    "BigAutoField": "BIGINT",
+    "BigIntegerField": "BIGINT",
+    "BooleanField": "BOOLEAN",
+    "DateField": "DATE",
+    "DateTimeField": "TIMESTAMPTZ",
+    "DecimalField": "DOUBLE",
+    "DurationField": "INTERVAL",
+    "FloatField": "DOUBLE",
+    "IntegerField": "INTEGER",
+    "PositiveBigIntegerField": "UBIGINT",
+    "PositiveIntegerField": "UINTEGER",
+    "PositiveSmallIntegerField": "USMALLINT",
+    "SmallAutoField": "SMALLINT",
+    "SmallIntegerField": "SMALLINT",
+    "TimeField": "TIME",
+}
+
+
+def get_columnar_config() -> Dict[str, Any]:
+    """
+    Returns the columnar engine configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The columnar engine configuration.
+    """
+    return DEFAULT_COLUMNAR_CONFIG | getattr(settings, "PANDASAI_COLUMNAR", {})
+
+
+def is_columnar_enabled() -> bool:
+    """
+    Returns whether the agent runs its SQL in the columnar engine over the table snapshots.
+
+    Returns:
+        bool: True if the columnar engine is enabled.
+    """
+    return bool(get_columnar_config()["enabled"])
+
+
+def import_duckdb() -> Any:
+    """
+    Imports DuckDB, the optional dependency of the columnar engine.
+
+    Raises:
+        ImproperlyConfigured: If DuckDB is not installed.
+
+    Returns:
+        Any: The duckdb module.
+    """
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImproperlyConfigured("The columnar engine requires DuckDB, install it with `pip install duckdb`.") from e
+
+    return duckdb
+
+
+def get_snapshot_dir(config: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Returns the directory of the Parquet snapshots, relative to the project base directory unless absolute.
+
+    Args:
+        config (Optional[Dict[str, Any]]): Columnar engine configuration, defaults to the project settings.
+
+    Returns:
+        Path: The snapshot directory.
+    """
+    config = config or get_columnar_config()
+    return Path(settings.BASE_DIR) / config["path"]
+
+
+def get_snapshot_tables(config: Optional[Dict[str, Any]] = None) -> Dict[str, Path]:
+    """
+    Returns the tables that have a snapshot.
+
+    Args:
+        config (Optional[Dict[str, Any]]): Columnar engine configuration, defaults to the project settings.
+
+    Returns:
+        Dict[str, Path]: A dictionary mapping table names to their snapshot files.
+    """
+    snapshot_dir = get_snapshot_dir(config)
+    return {path.stem: path for path in sorted(snapshot_dir.glob("*.parquet"))} if snapshot_dir.is_dir() else {}
+
+
+def get_snapshot_models(models: List[QueryableModel]) -> List[Model]:
+    """
+    Returns the models snapshotted for a list of queryable models: the models and their many-to-many through models.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+
+    Returns:
+        List[Model]: The models to snapshot.
+    """
+    through_models = [many_to_many.remote_field.through for many_to_many in get_many_to_many_fields(models)]
+    return [*models, *dict.fromkeys(through_models)]
+
+
+def get_watermark_field(model: Model) -> Optional[Field]:
+    """
+    Returns the field tracking the changes of a model, its `snapshot_watermark` or `updated_at` field.
+
+    Args:
+        model (Model): A model.
+
+    Returns:
+        Optional[Field]: The watermark field, or None if the primary key is used as watermark.
+    """
+    name = getattr(model, "snapshot_watermark", None) or "updated_at"
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def load_state(snapshot_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the refresh state of the snapshots.
+
+    Args:
+        snapshot_dir (Path): The snapshot directory.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: A dictionary mapping table names to their watermark and refresh details.
+    """
+    path = snapshot_dir / STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_state(snapshot_dir: Path, state: Dict[str, Dict[str, Any]]):
+    """
+    Saves the refresh state of the snapshots atomically.
+
+    Args:
+        snapshot_dir (Path): The snapshot directory.
+        state (Dict[str, Dict[str, Any]]): The refresh state of the snapshots.
+    """
+    path = snapshot_dir / STATE_FILE
+    path.with_suffix(".tmp").write_text(json.dumps(state, indent=2, default=str))
+    os.replace(path.with_suffix(".tmp"), path)
+
+
+def insert_batches(connection: Any, table: str, queryset: QuerySet, columns: List[str], batch_size: int) -> int:
+    """
+    Streams the rows of a queryset into a DuckDB table.
+
+    Args:
+        connection (Any): The DuckDB connection.
+        table (str): Name of the DuckDB table.
+        queryset (QuerySet): A `values_list` queryset.
+        columns (List[str]): Names of the table columns, in the order of the queryset values.
+        batch_size (int): Number of rows fetched and inserted at once.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    count = 0
+    batch = []
+
+    def flush():
+        frame = pd.DataFrame.from_records(batch, columns=columns)  # noqa: F841
+        connection.execute(f'INSERT INTO "{table}" SELECT * FROM frame')
+
+    for row in queryset.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            flush()
+            count += len(batch)
+            batch = []
+
+    if batch:
+        flush()
+        count += len(batch)
+
+    return count
+
+
+def refresh_snapshot(model: Model, config: Optional[Dict[str, Any]] = None, full: bool = False) -> int:
+    """
+    Refreshes the Parquet snapshot of a model table.
+
+    Only the rows past the watermark of the previous refresh are read from the agent database: the rows updated
+    since then for models with a watermark field, the rows inserted since then otherwise. Deleted rows are dropped
+    by comparing primary keys. Updates of models without a watermark field need a full refresh.
+
+    Args:
+        model (Model): A model.
+        config (Optional[Dict[str, Any]]): Columnar engine configuration, defaults to the project settings.
+        full (bool): Whether to rebuild the snapshot from all the rows.
+
+    Returns:
+        int: The number of rows read from the agent database.
+    """
+    duckdb = import_duckdb()
+    config = config or get_columnar_config()
+    snapshot_dir = get_snapshot_dir(config)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    table = model._meta.db_table
+    path = snapshot_dir / f"{table}.parquet"
+    state = load_state(snapshot_dir)
+    fields = [field for field in model._meta.concrete_fields if field.column]
+    pk = model._meta.pk
+    watermark_field = get_watermark_field(model)
+    watermark_column = watermark_field.column if watermark_field else pk.column
+    previous = None if full or not path.exists() else state.get(table)
+
+    # An empty snapshot has no watermark, all the rows are new
+    if previous and previous["watermark"] is None:
+        previous = None
+
+    queryset = model._default_manager.using(get_database_alias()).order_by()
+    if previous and watermark_field:
+        queryset = queryset.filter(**{f"{watermark_field.name}__gte": parse_datetime(previous["watermark"])})
+    elif previous:
+        queryset = queryset.filter(pk__gt=previous["watermark"])
+
+    def column_type(field):
+        target = field.target_field if field.is_relation else field
+        return DUCKDB_TYPES.get(target.get_internal_type(), "VARCHAR")
+
+    columns = ", ".join(f'"{field.column}" {column_type(field)}' for field in fields)
+
+    with duckdb.connect(config={"threads": config["threads"]} if config["threads"] else {}) as connection:
+        connection.execute(f"CREATE TABLE changes ({columns})")
+        count = insert_batches(
+            connection,
+            "changes",
+            queryset.values_list(*[field.attname for field in fields]),
+            [field.column for field in fields],
+            config["batch_size"],
+        )
+
+        if previous:
+            connection.execute(f'CREATE TABLE current ("{pk.column}" {column_type(pk)})')
+            insert_batches(
+                connection,
+                "current",
+                model._default_manager.using(get_database_alias()).order_by().values_list("pk"),
+                [pk.column],
+                config["batch_size"],
+            )
+            connection.execute(
+                f"CREATE TABLE snapshot AS SELECT * FROM read_parquet(?) "
+                f'WHERE "{pk.column}" IN (SELECT "{pk.column}" FROM current) '
+                f'AND "{pk.column}" NOT IN (SELECT "{pk.column}" FROM changes) '
+                "UNION ALL SELECT * FROM changes",
+                [str(path)],
+            )
+        else:
+            connection.execute("ALTER TABLE changes RENAME TO snapshot")
+
+        rows, watermark = connection.execute(f'SELECT COUNT(*), MAX("{watermark_column}") FROM snapshot').fetchone()
+        connection.execute(
+            f'COPY (SELECT * FROM snapshot ORDER BY "{pk.column}") TO ? (FORMAT PARQUET)', [f"{path}.tmp"]
+        )
+
+    os.replace(f"{path}.tmp", path)
+
+    if isinstance(watermark, datetime):
+        watermark = watermark.isoformat()
+
+    state = load_state(snapshot_dir)
+    state[table] = {"watermark": watermark, "rows": rows, "refreshed_at": timezone.now().isoformat()}
+    save_state(snapshot_dir, state)
+
+    return count
+
+
+def refresh_snapshots(
+    models: List[QueryableModel], config: Optional[Dict[str, Any]] = None, full: bool = False
+) -> Dict[str, int]:
+    """
+    Refreshes the Parquet snapshots of a list of queryable models and of their many-to-many through tables.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+        config (Optional[Dict[str, Any]]): Columnar engine configuration, defaults to the project settings.
+        full (bool): Whether to rebuild the snapshots from all the rows.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping table names to the number of rows read from the agent database.
+    """
+    return {model._meta.db_table: refresh_snapshot(model, config, full) for model in get_snapshot_models(models)}
+
+
+def connect(config: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Opens an in-memory DuckDB connection with a view over each table snapshot.
+
+    Args:
+        config (Optional[Dict[str, Any]]): Columnar engine configuration, defaults to the project settings.
+
+    Returns:
+        Any: The DuckDB connection.
+    """
+    duckdb = import_duckdb()
+    config = config or get_columnar_config()
+    options = {key: config[key] for key in ["threads", "memory_limit"] if config[key]}
+
+    connection = duckdb.connect(":memory:", config=options)
+    for table, path in get_snapshot_tables(config).items():
+        escaped_path = str(path).replace("'", "''")
+        connection.execute(f"CREATE VIEW \"{table}\" AS SELECT * FROM read_parquet('{escaped_path}')")
+
+    return connection
@@ -1,7 +1,11 @@
+from typing import Any, Dict
+
 from django.conf import settings
-from pandasai import llm
 
-from .parser import HtmlResponseParser
+DEFAULT_QUERY_LIMITS = {
+    "statement_timeout": 30,
+    "max_rows": 100000,
+}
 
 
 def get_config() -> dict:
@@ -11,11 +15,15 @@ def get_config() -> dict:
     Returns:
         Dict[str, Any]: The configuration for the PandasAI agent.
     """
+    from .llm import get_llm
+    from .parser import HtmlResponseParser
+
     config = getattr(settings, "PANDASAI_CONFIG", {}).copy()
+    config.pop("llm_client", None)
 
     if "llm" in config:
         options = config.get("llm_options", {})
-        config["llm"] = getattr(llm, config["llm"])(**options)
+        config["llm"] = get_llm(config["llm"], options)
 
     config.update(
         {
@@ -27,3 +35,23 @@ def get_config() -> dict:
     )
 
     return config
+
+
+def get_database_alias() -> str:
+    """
+    Returns the alias of the database the agent connectors query, e.g. a read-only replica.
+
+    Returns:
+        str: The database alias.
+    """
+    return getattr(settings, "PANDASAI_DATABASE", "default")
+
+
+def get_query_limits() -> Dict[str, Any]:
+    """
+    Returns the limits applied to the SQL queries generated by the agent.
+
+    Returns:
+        Dict[str, Any]: The statement timeout, in seconds, and the maximum number of rows of a query result.
+    """
+    return DEFAULT_QUERY_LIMITS | getattr(settings, "PANDASAI_QUERY_LIMITS", {})
@@ -1,6 +1,14 @@
-from typing import Any, Dict, List, Optional
-
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
+from functools import cached_property
+from typing import Any, ContextManager, Dict, List, Optional, Type
+
+import pandas as pd
+import sqlglot
 from django.conf import settings
+from django.db.models import ManyToManyField
 from pandasai.connectors import (
     MySQLConnector,
     OracleConnector,
@@ -8,48 +16,445 @@ from pandasai.connectors import (
     SQLConnector,
     SqliteConnector,
 )
+from pandasai.exceptions import MaliciousQueryError
+from pandasai.helpers.dataframe_serializer import DataframeSerializerType
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlglot import exp
 
 from ..models import QueryableModel
+from ..profiling import record_query
+from ..querylog import get_query_log_config, log_query
+from . import columnar
+from .columnar import get_snapshot_dir, get_snapshot_tables, import_duckdb, is_columnar_enabled
+from .config import get_database_alias, get_query_limits
+from .dtypes import fetch_chunks, load_dataframe
+from .exceptions import ExpensiveQueryError, QueryRefusedError, QueryRowLimitError, QueryTimeoutError
+from .guard import CostGuard, MySQLCostGuard, PostgreSQLCostGuard, SqliteCostGuard, get_cost_guard_config
+from .joins import get_join_views, get_many_to_many_fields
+from .prompt import get_prompt_schema_config, get_table_prompt
+from .sampling import get_sample_description, get_sample_fractions, get_sample_tables
+from .schema import select_models
+
+ENGINE_DIALECTS = {
+    "django.db.backends.sqlite3": "sqlite",
+    "django.db.backends.postgresql": "postgres",
+    "django.db.backends.mysql": "mysql",
+    "django.db.backends.oracle": "oracle",
+}
+
+
+class LimitedSQLConnectorMixin:
+    """
+    Applies a statement timeout, a maximum number of rows and a cost guard to the SQL queries generated by the agent.
+
+    Attributes:
+        statement_timeout (Optional[float]): Maximum duration of a query, in seconds.
+        max_rows (Optional[int]): Maximum number of rows of a query result.
+        cost_guard (Optional[CostGuard]): Guard checking the execution plan of a query before running it.
+        explainer (Optional[CostGuard]): Guard explaining the queries for the query log when there is no cost guard.
+        model (Optional[QueryableModel]): Model of the table, used to describe the table to the LLM compactly.
+        join (Optional[ManyToManyField]): Many-to-many field of the model, when the table is its join view.
+        database_error (Type[Exception]): Base class of the errors raised by the database driver.
+        engine_dialect (str): SQL dialect of the database running the queries.
+    """
+
+    statement_timeout: Optional[float] = None
+    max_rows: Optional[int] = None
+    cost_guard: Optional[CostGuard] = None
+    explainer: Optional[CostGuard] = None
+    model: Optional[QueryableModel] = None
+    join: Optional[ManyToManyField] = None
+    database_error: Type[Exception] = DBAPIError
+    engine_dialect: str = "sqlite"
+
+    def __init__(
+        self,
+        *args,
+        statement_timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        cost_guard: Optional[CostGuard] = None,
+        explainer: Optional[CostGuard] = None,
+        model: Optional[QueryableModel] = None,
+        join: Optional[ManyToManyField] = None,
+        **kwargs,
+    ):
+        self.statement_timeout = statement_timeout
+        self.max_rows = max_rows
+        self.cost_guard = cost_guard
+        self.explainer = explainer
+        self.model = model
+        self.join = join
+        super().__init__(*args, **kwargs)
+
+    def to_string(
+        self,
+        index: int = 0,
+        is_direct_sql: bool = False,
+        serializer: Optional[DataframeSerializerType] = None,
+        enforce_privacy: bool = False,
+    ) -> str:
+        """
+        Returns the description of the table given to the LLM.
+
+        Tables with a model are described by the compact, cached prompt schema instead of the PandasAI serializers,
+        which count and sample random rows on every question.
+
+        Returns:
+            str: The table description.
+        """
+        if self.model is None or not get_prompt_schema_config()["enabled"]:
+            return super().to_string(index, is_direct_sql, serializer, enforce_privacy)
+
+        return get_table_prompt(
+            self.model, self.config.table, self.description, self.field_descriptions, enforce_privacy, self.join
+        )
+
+    def prepare_sql_query(self, sql_query: str) -> str:
+        """
+        Prepares a generated SQL query to be executed by the database.
+
+        Args:
+            sql_query (str): The generated SQL query.
+
+        Returns:
+            str: The SQL query to execute.
+        """
+        return sql_query
+
+    def statement_timeout_context(self) -> ContextManager:
+        """
+        Returns a context manager enforcing the statement timeout on the queries executed inside it.
+
+        Databases that support a server-side statement timeout get it through the connection arguments instead.
+
+        Returns:
+            ContextManager: The statement timeout context manager.
+        """
+        return nullcontext()
+
+    def is_timeout_error(self, error: Exception) -> bool:
+        """
+        Returns whether a database error was raised by the statement timeout.
+
+        Args:
+            error (Exception): The database error, an instance of `database_error`.
+
+        Returns:
+            bool: True if the query was cancelled by the statement timeout.
+        """
+        return False
+
+    def fetch(self, sql_query: str) -> pd.DataFrame:
+        """
+        Runs a SQL query and loads up to one row more than the maximum number of rows, one chunk of rows at a time,
+        with dtypes matching the model columns.
+
+        Args:
+            sql_query (str): The SQL query to execute.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        result = self._connection.execution_options(stream_results=True).exec_driver_sql(sql_query)
+        df = load_dataframe(list(result.keys()), fetch_chunks(result, self.max_rows))
+        result.close()
+        return df
+
+    def end_transaction(self):
+        """
+        Rolls back the transaction SQLAlchemy began for the queries of the agent, so that a failed query, or the
+        EXPLAIN of the cost guard, does not leave the connection in an aborted or idle transaction.
+        """
+        if self._connection.in_transaction():
+            self._connection.rollback()
+
+    def execute_direct_sql_query(self, sql_query: str) -> pd.DataFrame:
+        """
+        Executes a generated SQL query within the configured limits.
+
+        Args:
+            sql_query (str): The generated SQL query.
+
+        Raises:
+            QueryTimeoutError: If the query exceeds the statement timeout.
+            QueryRowLimitError: If the query returns more rows than the configured maximum.
+            ExpensiveQueryError: If the cost guard asks for a cheaper query.
+            QueryRefusedError: If the cost guard refuses the query.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        if not self._is_sql_query_safe(sql_query):
+            raise MaliciousQueryError("Malicious query is generated in code")
+
+        sql_query = self.prepare_sql_query(sql_query)
+
+        try:
+            with self.statement_timeout_context():
+                plan = None
+                if self.cost_guard is not None:
+                    try:
+                        sql_query = self.cost_guard.check(self._connection, sql_query)
+                    except (ExpensiveQueryError, QueryRefusedError) as e:
+                        plan = self.cost_guard.last_plan
+                        log_query(
+                            sql_query,
+                            self.engine_dialect,
+                            0.0,
+                            None,
+                            plan and asdict(plan),
+                            f"{type(e).__name__}: {e}",
+                        )
+                        raise
+                    plan = self.cost_guard.last_plan
+                elif self.explainer is not None:
+                    plan = self.explainer.explain(self._connection, sql_query)
+
+                start, df, error = time.perf_counter(), None, ""
+                try:
+                    df = self.fetch(sql_query)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    duration, rows = time.perf_counter() - start, None if df is None else len(df)
+                    record_query(sql_query, duration, rows)
+                    log_query(sql_query, self.engine_dialect, duration, rows, plan and asdict(plan), error)
+        except self.database_error as e:
+            if self.is_timeout_error(e):
+                raise QueryTimeoutError(
+                    f"The query exceeded the statement timeout of {self.statement_timeout} seconds. "
+                    "Filter or aggregate the data in the query to make it cheaper."
+                ) from e
+            raise
+        finally:
+            self.end_transaction()
+
+        if self.max_rows and len(df) > self.max_rows:
+            raise QueryRowLimitError(
+                f"The query returned more than the maximum of {self.max_rows} rows. "
+                "Filter or aggregate the data in the query, or add a LIMIT clause."
+            )
+
+        return df
+
+
+class LimitedSqliteConnector(LimitedSQLConnectorMixin, SqliteConnector):
+    """
+    SQLite connector opening the database read-only and interrupting queries past the statement timeout.
+    """
+
+    def _init_connection(self, config):
+        self._engine = create_engine(f"{config.dialect}:///file:{config.database}?mode=ro&uri=true")
+        self._connection = self._engine.connect()
+
+    @contextmanager
+    def statement_timeout_context(self):
+        if not self.statement_timeout:
+            yield
+            return
+
+        deadline = time.monotonic() + self.statement_timeout
+        driver_connection = self._connection.connection.driver_connection
+        driver_connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            yield
+        finally:
+            driver_connection.set_progress_handler(None, 0)
+
+    def is_timeout_error(self, error):
+        return "interrupted" in str(error.orig)
+
+
+class LimitedPostgreSQLConnector(LimitedSQLConnectorMixin, PostgreSQLConnector):
+    """
+    PostgreSQL connector relying on the server-side `statement_timeout` setting.
+    """
+
+    engine_dialect = "postgres"
+
+    def prepare_sql_query(self, sql_query):
+        return sqlglot.transpile(sql_query, read="mysql", write="postgres")[0]
+
+    def is_timeout_error(self, error):
+        return getattr(error.orig, "pgcode", None) == "57014"
+
+
+class LimitedMySQLConnector(LimitedSQLConnectorMixin, MySQLConnector):
+    """
+    MySQL connector relying on the server-side `MAX_EXECUTION_TIME` setting.
+    """
+
+    engine_dialect = "mysql"
+
+    def is_timeout_error(self, error):
+        return bool(error.orig.args) and error.orig.args[0] == 3024
+
+
+class LimitedOracleConnector(LimitedSQLConnectorMixin, OracleConnector):
+    """
+    Oracle connector enforcing the statement timeout through the driver call timeout.
+    """
+
+    engine_dialect = "oracle"
+
+    @contextmanager
+    def statement_timeout_context(self):
+        driver_connection = self._connection.connection.driver_connection
+        driver_connection.call_timeout = int((self.statement_timeout or 0) * 1000)
+        try:
+            yield
+        finally:
+            driver_connection.call_timeout = 0
+
+    def is_timeout_error(self, error):
+        return "DPI-1067" in str(error.orig)
+
+
+class ColumnarConnector(LimitedSQLConnectorMixin, SqliteConnector):
+    """
+    Connector running the agent SQL in DuckDB, over the Parquet snapshots of the tables, off the agent database.
+
+    The generated SQL is transpiled from the dialect of the agent database, whose column types the LLM sees, and may
+    only read the snapshot tables.
+
+    Attributes:
+        dialect (str): The SQL dialect of the agent database.
+    """
+
+    dialect: str = "sqlite"
+    engine_dialect = "duckdb"
+
+    def __init__(self, *args, dialect: str = "sqlite", **kwargs):
+        self.dialect = dialect
+        super().__init__(*args, **kwargs)
+
+    def _init_connection(self, config):
+        self.database_error = import_duckdb().Error
+        self._engine = None
+        self._connection = columnar.connect()
+        self.tables = set(get_snapshot_tables())
+
+    def prepare_sql_query(self, sql_query):
+        sql_query = sqlglot.transpile(sql_query, read=self.dialect, write="duckdb")[0]
+        tree = sqlglot.parse_one(sql_query, read="duckdb")
+        allowed = self.tables | {cte.alias_or_name for cte in tree.find_all(exp.CTE)}
+
+        if not isinstance(tree, exp.Query) or any(
+            not isinstance(table.this, exp.Identifier) or table.name not in allowed
+            for table in tree.find_all(exp.Table)
+        ):
+            raise MaliciousQueryError("The query can only read from the snapshot tables.")
+
+        return sql_query
+
+    @contextmanager
+    def statement_timeout_context(self):
+        if not self.statement_timeout:
+            yield
+            return
+
+        timer = threading.Timer(self.statement_timeout, self._connection.interrupt)
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    def is_timeout_error(self, error):
+        return isinstance(error, import_duckdb().InterruptException)
+
+    def end_transaction(self):
+        pass
+
+    def fetch(self, sql_query):
+        result = self._connection.execute(sql_query)
+        columns = [column[0] for column in result.description]
+        return load_dataframe(columns, fetch_chunks(result, self.max_rows))
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        return self._connection.execute(f"SELECT * FROM {self.cs_table_name} LIMIT {int(n)}").df()
+
+    @cached_property
+    def rows_count(self):
+        return self._connection.execute(f"SELECT COUNT(*) FROM {self.cs_table_name}").fetchone()[0]
 
 
 def create_connector(
-    table: str, description: Optional[str] = None, field_descriptions: Optional[Dict[str, str]] = None
+    table: str,
+    description: Optional[str] = None,
+    field_descriptions: Optional[Dict[str, str]] = None,
+    model: Optional[QueryableModel] = None,
+    join: Optional[ManyToManyField] = None,
 ):
     """
-    Creates and returns a connector instance based on Django's default database configuration.
+    Creates and returns a connector instance based on the agent database configuration.
 
     Args:
         table (str): Name of the database table.
         description (Optional[str]): Description of the connector instance.
         field_descriptions (Optional[Dict[str, str]]): Descriptions for fields in the table.
+        model (Optional[QueryableModel]): Model of the table.
+        join (Optional[ManyToManyField]): Many-to-many field of the model, when the table is its join view.
 
     Returns:
         connector_cls: An instance of the relevant database connector class.
     """
-    db_conf = settings.DATABASES["default"]
+    db_conf = settings.DATABASES[get_database_alias()]
+    limits = get_query_limits()
+    cost_guard_config = get_cost_guard_config()
+
+    if is_columnar_enabled():
+        return ColumnarConnector(
+            config={"table": table, "database": str(get_snapshot_dir())},
+            description=description,
+            field_descriptions=field_descriptions,
+            statement_timeout=limits["statement_timeout"],
+            max_rows=limits["max_rows"],
+            model=model,
+            join=join,
+            dialect=ENGINE_DIALECTS.get(db_conf["ENGINE"], "sqlite"),
+        )
 
     engine_to_connector = {
-        "django.db.backends.sqlite3": (SqliteConnector, None),
-        "django.db.backends.postgresql": (PostgreSQLConnector, 5432),
-        "django.db.backends.mysql": (MySQLConnector, 3306),
-        "django.db.backends.oracle": (OracleConnector, 1521),
+        "django.db.backends.sqlite3": (LimitedSqliteConnector, None, SqliteCostGuard),
+        "django.db.backends.postgresql": (LimitedPostgreSQLConnector, 5432, PostgreSQLCostGuard),
+        "django.db.backends.mysql": (LimitedMySQLConnector, 3306, MySQLCostGuard),
+        "django.db.backends.oracle": (LimitedOracleConnector, 1521, None),
     }
 
-    connector_cls, default_port = engine_to_connector.get(db_conf["ENGINE"], (None, None))
+    connector_cls, default_port, cost_guard_cls = engine_to_connector.get(db_conf["ENGINE"], (None, None, None))
+    query_log_config = get_query_log_config()
 
     if connector_cls is None:
         raise ValueError(f"Unsupported database engine: {db_conf['ENGINE']}")
 
-    config = build_db_config(db_conf, table, default_port)
+    config = build_db_config(db_conf, table, default_port, limits["statement_timeout"])
 
     return connector_cls(
         config=config,
         description=description,
         field_descriptions=field_descriptions,
+        statement_timeout=limits["statement_timeout"],
+        max_rows=limits["max_rows"],
+        cost_guard=cost_guard_cls(cost_guard_config) if cost_guard_cls and cost_guard_config["enabled"] else None,
+        explainer=(
+            cost_guard_cls(cost_guard_config)
+            if cost_guard_cls and query_log_config["enabled"] and query_log_config["explain"]
+            else None
+        ),
+        model=model,
+        join=join,
     )
 
 
-def build_db_config(db_conf: Dict[str, Any], table: str, default_port: Optional[int] = None) -> Dict[str, Any]:
+def build_db_config(
+    db_conf: Dict[str, Any],
+    table: str,
+    default_port: Optional[int] = None,
+    statement_timeout: Optional[float] = None,
+) -> Dict[str, Any]:
     """
     Builds a generalized database configuration based on common settings.
 
@@ -57,6 +462,7 @@ def build_db_config(db_conf: Dict[str, Any], table: str, default_port: Optional[
         db_conf (Dict[str, Any]): Django database settings.
         table (Dict[str, Any]): Table name for the database engine.
         default_port (Optional[int]): Default port for the database engine.
+        statement_timeout (Optional[float]): Statement timeout, in seconds, for engines that enforce it server-side.
 
     Returns:
         Dict[str, Any]: Final configuration for the connector.
@@ -64,7 +470,7 @@ def build_db_config(db_conf: Dict[str, Any], table: str, default_port: Optional[
     if db_conf["ENGINE"] == "django.db.backends.sqlite3":
         return {"database": db_conf["NAME"], "table": table}
 
-    return {
+    config = {
         "host": db_conf.get("HOST", "localhost"),
         "port": db_conf.get("PORT", default_port),
         "database": db_conf["NAME"],
@@ -73,6 +479,16 @@ def build_db_config(db_conf: Dict[str, Any], table: str, default_port: Optional[
         "table": table,
     }
 
+    if statement_timeout:
+        milliseconds = int(statement_timeout * 1000)
+
+        if db_conf["ENGINE"] == "django.db.backends.postgresql":
+            config["connect_args"] = {"options": f"-c statement_timeout={milliseconds}"}
+        elif db_conf["ENGINE"] == "django.db.backends.mysql":
+            config["connect_args"] = {"init_command": f"SET SESSION MAX_EXECUTION_TIME={milliseconds}"}
+
+    return config
+
 
 def get_model_configs(models: List[QueryableModel]) -> Dict[str, Dict[str, Any]]:
     """
@@ -94,36 +510,69 @@ def get_model_configs(models: List[QueryableModel]) -> Dict[str, Dict[str, Any]]
             "table": table_name,
             "description": model.description,
             "field_descriptions": model.field_descriptions,
+            "model": model,
         }
 
     return configs
 
 
-def get_many_to_many_configs(models: List[QueryableModel]) -> Dict[str, Dict[str, str]]:
+def get_many_to_many_configs(models: List[QueryableModel]) -> Dict[str, Dict[str, Any]]:
     """
-    Returns a dictionary of many-to-many table configurations.
+    Returns a dictionary of many-to-many through table configurations.
+
+    Only the many-to-many fields between the given models are included. Custom through models that are queryable
+    keep their own descriptions.
 
     Args:
         models (List[QueryableModel]): A list of QueryableModel subclasses.
 
     Returns:
-        Dict[str, Dict[str, str]]: A dictionary of many-to-many table configurations.
+        Dict[str, Dict[str, Any]]: A dictionary of many-to-many through table configurations.
     """
     configs = {}
 
-    for model in models:
-        for many_to_many in model._meta.many_to_many:
-            related_model = many_to_many.remote_field.model
+    for many_to_many in get_many_to_many_fields(models):
+        through = many_to_many.remote_field.through
+        model_name = through._meta.model_name
+        description = (
+            f"Links each {many_to_many.model._meta.verbose_name} to its {many_to_many.verbose_name}, "
+            f"one row per {many_to_many.model._meta.verbose_name} and {many_to_many.related_model._meta.verbose_name}."
+        )
+
+        configs[model_name] = {
+            "table": through._meta.db_table,
+            "description": getattr(through, "description", None) or description,
+            "field_descriptions": getattr(through, "field_descriptions", None),
+            "model": through,
+        }
+
+    return configs
+
+
+def get_join_view_configs(models: List[QueryableModel]) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns a dictionary of join view configurations, for the join views created in the agent database.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
 
-            if issubclass(related_model, QueryableModel):
-                model_name = related_model._meta.model_name
-                table_name = related_model._meta.db_table
+    Returns:
+        Dict[str, Dict[str, Any]]: A dictionary of join view configurations.
+    """
+    configs = {}
 
-                configs[model_name] = {
-                    "table": table_name,
-                    "description": model.description,
-                    "field_descriptions": model.field_descriptions,
-                }
+    for view, many_to_many in get_join_views(models).items():
+        model = many_to_many.model
+        configs[view] = {
+            "table": view,
+            "description": (
+                f"Each {model._meta.verbose_name} joined with its {many_to_many.verbose_name}, one row per pair. "
+                f"Prefer it to joining {model._meta.db_table} and {many_to_many.related_model._meta.db_table}."
+            ),
+            "field_descriptions": model.field_descriptions,
+            "model": model,
+            "join": many_to_many,
+        }
 
     return configs
 
@@ -138,13 +587,32 @@ def get_queryable_models() -> List[QueryableModel]:
     return QueryableModel.__subclasses__()
 
 
-def get_connectors() -> List[SQLConnector]:
+def get_connectors(sampled: bool = False, question: Optional[str] = None) -> List[SQLConnector]:
     """
-    Returns a list of SQLConnector instances based on Django's default database configuration.
+    Returns a list of SQLConnector instances based on the agent database configuration.
+
+    Args:
+        sampled (bool): Whether to point the connectors at the materialized sample tables, when available.
+        question (Optional[str]): The question to answer, used to only select the relevant tables.
 
     Returns:
         List[SQLConnector]: A list of SQLConnector instances.
     """
-    queryable_models = get_queryable_models()
+    queryable_models = get_queryable_models() if question is None else select_models(question)
     configs = get_many_to_many_configs(queryable_models) | get_model_configs(queryable_models)
-    return [create_connector(**config) for config in configs.values()]
+
+    # Join views read the full tables, so they are left out of sampled answers, and are not snapshotted
+    if not sampled and not is_columnar_enabled():
+        configs |= get_join_view_configs(queryable_models)
+
+    if sampled:
+        sample_tables, fractions = get_sample_tables(), get_sample_fractions()
+        for config in configs.values():
+            if (sample_table := sample_tables.get(config["table"])) is not None:
+                config["description"] = get_sample_description(
+                    config["description"], config["table"], fractions[sample_table]
+                )
+                config["table"] = sample_table
+
+    # A stable table order keeps the schema at the start of the prompt identical between questions
+    return [create_connector(**config) for config in sorted(configs.values(), key=lambda config: config["table"])]
@@ -0,0 +1,263 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import BooleanField, Field, ForeignKey, IntegerField
+
+from ..models import QueryableModel
+from .joins import get_join_view_fields, get_many_to_many_fields
+
+DEFAULT_DTYPE_CONFIG = {
+    "enabled": True,
+    "chunk_size": 10000,
+}
+
+NULLABLE_INTEGER_DTYPES = {"int32": "Int32", "int64": "Int64"}
+
+
+def get_dtype_config() -> Dict[str, Any]:
+    """
+    Returns the query result dtypes configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The query result dtypes configuration.
+    """
+    return DEFAULT_DTYPE_CONFIG | getattr(settings, "PANDASAI_DTYPES", {})
+
+
+def get_field_dtype(field: Field) -> Optional[str]:
+    """
+    Returns the kind of dtype the values of a model field are loaded as.
+
+    Args:
+        field (Field): A concrete model field.
+
+    Returns:
+        Optional[str]: One of "boolean", "category", "key" or "integer", or None to keep the inferred dtype.
+    """
+    if isinstance(field, ForeignKey) or field.primary_key:
+        target = field.target_field if isinstance(field, ForeignKey) else field
+        return "key" if isinstance(target, IntegerField) else None
+
+    if isinstance(field, BooleanField):
+        return "boolean"
+    if field.choices:
+        return "category"
+    if isinstance(field, IntegerField):
+        return "integer"
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def get_column_dtypes() -> Dict[str, str]:
+    """
+    Returns the dtypes of the columns of the queryable tables, their many-to-many tables and their join views.
+
+    Query results only carry column names, so a column is only given a dtype when every table having a column with
+    its name agrees on it.
+
+    Returns:
+        Dict[str, str]: The kind of dtype of each column name.
+    """
+    models: List[QueryableModel] = QueryableModel.__subclasses__()
+    columns: Dict[str, List[Optional[str]]] = {}
+
+    def add(model, prefix: str = ""):
+        for field in model._meta.concrete_fields:
+            if field.column:
+                columns.setdefault(f"{prefix}{field.column}", []).append(get_field_dtype(field))
+
+    for model in models:
+        add(model)
+    for many_to_many in get_many_to_many_fields(models):
+        add(many_to_many.remote_field.through)
+    for many_to_many in get_join_view_fields(models):
+        add(many_to_many.related_model, f"{many_to_many.name}_")
+
+    return {column: dtypes[0] for column, dtypes in columns.items() if dtypes[0] and len(set(dtypes)) == 1}
+
+
+def convert_integers(series: pd.Series, downcast: bool = False) -> pd.Series:
+    """
+    Converts a column of integers to nullable integers when it has missing values, instead of floats, and optionally
+    downcasts it to 32 bits integers when its values fit.
+
+    Only keys are downcast, and never below 32 bits nor to unsigned integers, since arithmetic on quantities in the
+    generated code would silently overflow or wrap around, e.g. when multiplying or subtracting them.
+
+    Args:
+        series (pd.Series): The column.
+        downcast (bool): Whether to downcast the column.
+
+    Raises:
+        TypeError: If the column has values that are not integers.
+
+    Returns:
+        pd.Series: The converted column.
+    """
+    if not pd.api.types.is_integer_dtype(series):
+        series = series.astype("Int64")
+
+    values = series.dropna()
+    info = np.iinfo("int32")
+    fits = not len(values) or (values.min() >= info.min and values.max() <= info.max)
+    dtype = "int32" if downcast and fits else "int64"
+
+    return series.astype(NULLABLE_INTEGER_DTYPES[dtype] if series.isna().any() else dtype)
+
+
+def convert_column(series: pd.Series, dtype: Optional[str]) -> pd.Series:
+    """
+    Converts a query result column to a compact dtype.
+
+    Columns whose values do not fit the dtype, e.g. an aggregate aliased as a model column, are returned unchanged.
+
+    Args:
+        series (pd.Series): The column.
+        dtype (Optional[str]): The kind of dtype of the model column, or None for columns of no model.
+
+    Returns:
+        pd.Series: The converted column.
+    """
+    try:
+        match dtype:
+            case "boolean":
+                return series.astype("boolean")
+            case "category":
+                return series.astype("category")
+            case "key" | "integer":
+                return convert_integers(series, downcast=dtype == "key")
+    except (TypeError, ValueError, OverflowError):
+        return series
+
+    return series
+
+
+def get_dtypes(df: pd.DataFrame) -> List[Optional[str]]:
+    """
+    Returns the kind of dtype of each column of a query result, from the model columns of the same name.
+
+    Only the columns of model fields with choices become categorical. Other repeated strings are left as objects,
+    since categorical columns change how the generated code behaves, e.g. grouping returns the unobserved categories
+    and string operations raise.
+
+    Args:
+        df (pd.DataFrame): The query result, or its first chunk.
+
+    Returns:
+        List[Optional[str]]: The kind of dtype of each column, by position.
+    """
+    column_dtypes = get_column_dtypes()
+    return [column_dtypes.get(column) for column in df.columns]
+
+
+def convert_dtypes(df: pd.DataFrame, dtypes: List[Optional[str]]) -> pd.DataFrame:
+    """
+    Converts the columns of a query result to compact dtypes, in place.
+
+    Args:
+        df (pd.DataFrame): The query result.
+        dtypes (List[Optional[str]]): The kind of dtype of each column, by position.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    for index, dtype in enumerate(dtypes):
+        df.isetitem(index, convert_column(df.iloc[:, index], dtype))
+
+    return df
+
+
+def concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates the chunks of a query result, keeping the categorical columns categorical.
+
+    Categorical columns whose chunks hold categories of different types, e.g. an aggregate aliased as a choices
+    column, fall back to objects.
+
+    Args:
+        chunks (List[pd.DataFrame]): The converted chunks, with the same columns.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+
+    for index in range(len(chunks[0].columns)):
+        if isinstance(chunks[0].iloc[:, index].dtype, pd.CategoricalDtype):
+            try:
+                categories = pd.api.types.union_categoricals([chunk.iloc[:, index] for chunk in chunks]).categories
+            except TypeError:
+                for chunk in chunks:
+                    chunk.isetitem(index, chunk.iloc[:, index].astype(object))
+                continue
+
+            for chunk in chunks:
+                chunk.isetitem(index, chunk.iloc[:, index].cat.set_categories(categories))
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+def fetch_chunks(result: Any, max_rows: Optional[int] = None) -> Iterator[List[tuple]]:
+    """
+    Fetches the rows of a query result in chunks of the configured size, or at once if the size is None, up to one
+    row more than the maximum number of rows.
+
+    Args:
+        result (Any): The query result, a cursor with a `fetchmany` method.
+        max_rows (Optional[int]): Maximum number of rows of the query result.
+
+    Yields:
+        List[tuple]: The chunks of rows.
+    """
+    chunk_size = get_dtype_config()["chunk_size"]
+    remaining = max_rows + 1 if max_rows else None
+
+    while remaining is None or remaining > 0:
+        size = min(filter(None, (chunk_size, remaining)), default=None)
+        rows = result.fetchmany(size) if size else result.fetchall()
+        if not rows:
+            return
+
+        yield rows
+
+        if size is None:
+            return
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def load_dataframe(columns: List[str], chunks: Iterable[List[tuple]]) -> pd.DataFrame:
+    """
+    Loads the rows of a query result into a DataFrame, one chunk of rows at a time, with compact dtypes.
+
+    Each chunk is converted as soon as it is fetched, and the dtypes are chosen from the first chunk, so every chunk
+    gets the same dtypes.
+
+    Args:
+        columns (List[str]): The column names.
+        chunks (Iterable[List[tuple]]): The chunks of rows.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    enabled = get_dtype_config()["enabled"]
+    frames, dtypes = [], None
+
+    for rows in chunks:
+        df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+        if enabled:
+            dtypes = get_dtypes(df) if dtypes is None else dtypes
+            df = convert_dtypes(df, dtypes)
+
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    return concat_chunks(frames)
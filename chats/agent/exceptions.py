@@ -0,0 +1,40 @@
+class QueryLimitError(Exception):
+    """
+    Base exception for generated SQL queries that exceed the configured limits.
+    """
+
+
+class QueryTimeoutError(QueryLimitError):
+    """
+    Raised when a generated SQL query exceeds the statement timeout.
+    """
+
+
+class QueryRowLimitError(QueryLimitError):
+    """
+    Raised when a generated SQL query returns more rows than the configured maximum.
+    """
+
+
+class ExpensiveQueryError(QueryLimitError):
+    """
+    Raised when the execution plan of a generated SQL query is too expensive, so a cheaper query is generated.
+    """
+
+
+class QueryRefusedError(QueryLimitError):
+    """
+    Raised when the cost guard refuses to execute an expensive generated SQL query.
+    """
+
+
+class LLMTimeoutError(Exception):
+    """
+    Raised when the LLM does not answer within the configured timeout budget.
+    """
+
+
+class CodeExecutionLimitError(Exception):
+    """
+    Raised when the generated code exceeds the memory or CPU time limits of the code execution workers.
+    """
@@ -0,0 +1,385 @@
+import logging
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from pandasai.exceptions import NoResultFoundError
+from pandasai.helpers.optional import get_environment
+from pandasai.pipelines.chat.code_cleaning import CodeExecutionContext
+from pandasai.pipelines.chat.code_execution import CodeExecution
+from pandasai.pipelines.chat.generate_chat_pipeline import GenerateChatPipeline
+
+from .connectors import create_connector
+from .exceptions import CodeExecutionLimitError
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CODE_EXECUTION_CONFIG = {
+    "enabled": False,
+    "workers": 2,
+    "max_jobs_per_worker": 100,
+    "memory_limit": 2048,
+    "cpu_time_limit": 30,
+    "preload": ["numpy", "pandas", "matplotlib.pyplot", "pyarrow", "pandasai"],
+}
+
+# Pyplot draws on a current figure shared by the threads of a process
+PLOT_LOCK = threading.Lock()
+PLOT_MARKERS = ("plt", "matplotlib", "seaborn", "sns", ".plot")
+
+
+class SharedFrame(NamedTuple):
+    """
+    A DataFrame written in Arrow IPC format to a shared memory block, to move it between processes without pickling.
+
+    Attributes:
+        name (str): Name of the shared memory block.
+        size (int): Size of the Arrow IPC stream, in bytes.
+    """
+
+    name: str
+    size: int
+
+
+def get_code_execution_config() -> Dict[str, Any]:
+    """
+    Returns the code execution configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The code execution configuration.
+    """
+    return DEFAULT_CODE_EXECUTION_CONFIG | getattr(settings, "PANDASAI_CODE_EXECUTION", {})
+
+
+def is_pooled_execution_enabled() -> bool:
+    """
+    Returns whether the generated code runs in the code execution workers instead of the web worker.
+
+    Returns:
+        bool: True if the pooled code execution is enabled.
+    """
+    return bool(get_code_execution_config()["enabled"])
+
+
+def import_pyarrow() -> Any:
+    """
+    Imports PyArrow, the optional dependency moving DataFrames to and from the code execution workers.
+
+    Raises:
+        ImproperlyConfigured: If PyArrow is not installed.
+
+    Returns:
+        Any: The pyarrow module.
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            "The pooled code execution requires PyArrow, install it with `poetry install --extras arrow`."
+        ) from e
+
+    return pyarrow
+
+
+def dump_frame(df: pd.DataFrame) -> SharedFrame:
+    """
+    Writes a DataFrame to a new shared memory block, in Arrow IPC format.
+
+    The block is owned by the process loading the DataFrame, which unlinks it.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        SharedFrame: The shared memory block holding the DataFrame.
+    """
+    pa = import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    shm = SharedMemory(create=True, size=max(sink.size(), 1))
+    # The loading process unlinks the block, so the block is not tracked as leaked when this process exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+    def write():
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)), table.schema) as writer:
+            writer.write_table(table)
+
+    # Arrow buffers must be released before the block is closed, so they only live in the helper
+    try:
+        write()
+        return SharedFrame(shm.name, sink.size())
+    finally:
+        shm.close()
+
+
+def load_frame(frame: SharedFrame) -> pd.DataFrame:
+    """
+    Reads a DataFrame from a shared memory block and unlinks the block.
+
+    Args:
+        frame (SharedFrame): The shared memory block holding the DataFrame.
+
+    Returns:
+        pd.DataFrame: The DataFrame.
+    """
+    pa = import_pyarrow()
+    shm = SharedMemory(name=frame.name)
+
+    def read():
+        return pa.ipc.open_stream(pa.py_buffer(shm.buf[: frame.size])).read_all().to_pandas()
+
+    try:
+        return read()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def discard_frame(frame: SharedFrame):
+    """
+    Unlinks the shared memory block of a DataFrame that was not loaded.
+
+    Args:
+        frame (SharedFrame): The shared memory block holding the DataFrame.
+    """
+    try:
+        shm = SharedMemory(name=frame.name)
+    except FileNotFoundError:
+        return
+
+    shm.close()
+    shm.unlink()
+
+
+def raise_cpu_time_limit(signum, frame):
+    raise CodeExecutionLimitError("The generated code exceeded the CPU time limit. Make the computation cheaper.")
+
+
+def init_worker(config: Dict[str, Any]):
+    """
+    Initializes a code execution worker: sets up Django, the memory limit and the non-interactive charts backend.
+
+    Args:
+        config (Dict[str, Any]): The code execution configuration.
+    """
+    import django
+    import matplotlib
+
+    django.setup()
+    matplotlib.use("agg")
+
+    if config["memory_limit"]:
+        limit = config["memory_limit"] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    signal.signal(signal.SIGXCPU, raise_cpu_time_limit)
+
+
+def run_code(
+    code: str,
+    table: Optional[str],
+    frames: List[Optional[SharedFrame]],
+    additional_dependencies: List[dict],
+    cpu_time_limit: Optional[float],
+) -> Dict[str, Any]:
+    """
+    Runs generated code in a code execution worker, within the CPU time limit of a job.
+
+    Args:
+        code (str): The generated code.
+        table (Optional[str]): Table of the first connector, whose database `execute_sql_query` runs the SQL on.
+        frames (List[Optional[SharedFrame]]): The DataFrames used by the code, None for the unused ones.
+        additional_dependencies (List[dict]): The modules imported by the code.
+        cpu_time_limit (Optional[float]): Maximum CPU time of the job, in seconds.
+
+    Raises:
+        CodeExecutionLimitError: If the code exceeds the CPU time or memory limit.
+        NoResultFoundError: If the code does not declare a result.
+
+    Returns:
+        Dict[str, Any]: The result, with DataFrame values in shared memory.
+    """
+    if cpu_time_limit:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft_limit = int(usage.ru_utime + usage.ru_stime + cpu_time_limit) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (soft_limit, resource.RLIM_INFINITY))
+
+    try:
+        environment = get_environment(additional_dependencies)
+        environment["dfs"] = [load_frame(frame) if frame else None for frame in frames]
+        if len(environment["dfs"]) == 1:
+            environment["df"] = environment["dfs"][0]
+
+        if table is not None:
+            environment["execute_sql_query"] = create_connector(table).execute_direct_sql_query
+
+        exec(code, environment)
+    except MemoryError as e:
+        raise CodeExecutionLimitError("The generated code exceeded the memory limit. Use less data.") from e
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, resource.RLIM_INFINITY))
+
+    if "result" not in environment:
+        raise NoResultFoundError("No result returned")
+
+    result = environment["result"]
+    if isinstance(result, dict) and isinstance(result.get("value"), pd.DataFrame):
+        result = {**result, "value": dump_frame(result["value"])}
+
+    return result
+
+
+@lru_cache(maxsize=None)
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the pool of code execution workers, started and warmed up on first use.
+
+    Workers are forked from a server process that has pandas and matplotlib imported, and are replaced after a
+    number of jobs, so memory leaked by generated code is given back.
+
+    Raises:
+        ImproperlyConfigured: If PyArrow or POSIX resource limits are not available.
+
+    Returns:
+        ProcessPoolExecutor: The code execution pool.
+    """
+    config = get_code_execution_config()
+    import_pyarrow()
+
+    if resource is None:
+        raise ImproperlyConfigured("The pooled code execution requires POSIX resource limits, unavailable on Windows.")
+
+    context = multiprocessing.get_context("forkserver")
+    # Workers are forked with the main module already imported, so they do not import it again
+    context.set_forkserver_preload(["__main__", *config["preload"]])
+
+    pool = ProcessPoolExecutor(
+        max_workers=config["workers"],
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(config,),
+        max_tasks_per_child=config["max_jobs_per_worker"],
+    )
+    for future in [pool.submit(int) for _ in range(config["workers"])]:
+        future.result()
+
+    return pool
+
+
+def execute_in_pool(
+    code: str,
+    table: Optional[str],
+    dfs: List[Optional[pd.DataFrame]],
+    additional_dependencies: List[dict],
+) -> Dict[str, Any]:
+    """
+    Runs generated code in the pool of code execution workers.
+
+    Args:
+        code (str): The generated code.
+        table (Optional[str]): Table of the first connector, whose database `execute_sql_query` runs the SQL on.
+        dfs (List[Optional[pd.DataFrame]]): The DataFrames used by the code, None for the unused ones.
+        additional_dependencies (List[dict]): The modules imported by the code.
+
+    Raises:
+        CodeExecutionLimitError: If the code exceeds the CPU time or memory limit, or its worker dies.
+
+    Returns:
+        Dict[str, Any]: The result of the code.
+    """
+    config = get_code_execution_config()
+    pool = get_pool()
+    frames = [dump_frame(df) if df is not None else None for df in dfs]
+
+    try:
+        result = pool.submit(run_code, code, table, frames, additional_dependencies, config["cpu_time_limit"]).result()
+    except BrokenProcessPool as e:
+        logger.warning("Code execution worker died, restarting the pool")
+        get_pool.cache_clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise CodeExecutionLimitError(
+            "The generated code exceeded the resource limits of its worker. Use less data or a cheaper computation."
+        ) from e
+    finally:
+        for frame in frames:
+            if frame is not None:
+                discard_frame(frame)
+
+    if isinstance(result, dict) and isinstance(result.get("value"), SharedFrame):
+        result = {**result, "value": load_frame(result["value"])}
+
+    return result
+
+
+class SerializedCodeExecution(CodeExecution):
+    """
+    Code execution step running the generated code in the web worker, one plotting run at a time per process.
+
+    Concurrent runs of a process, e.g. the questions of a batch, would otherwise draw on each other's figures.
+    """
+
+    def execute_code(self, code: str, context: CodeExecutionContext) -> Any:
+        if not any(marker in code for marker in PLOT_MARKERS):
+            return super().execute_code(code, context)
+
+        with PLOT_LOCK:
+            return super().execute_code(code, context)
+
+
+class PooledCodeExecution(SerializedCodeExecution):
+    """
+    Code execution step running the generated code in the pool of code execution workers.
+
+    Code using skills runs in the web worker, since skills are not sent to the workers.
+    """
+
+    def execute_code(self, code: str, context: CodeExecutionContext) -> Any:
+        if context.skills_manager.used_skills:
+            return super().execute_code(code, context)
+
+        dfs = self._get_originals(self._required_dfs(code))
+        table = self._dfs[0].config.table if self._config.direct_sql else None
+
+        return execute_in_pool(code, table, dfs, self._additional_dependencies)
+
+
+class ChatPipeline(GenerateChatPipeline):
+    """
+    Chat pipeline running the generated code with its code execution step, serializing the plotting runs by default.
+    """
+
+    code_execution_step = SerializedCodeExecution
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        step = self.code_execution_pipeline._steps[0]
+        self.code_execution_pipeline._steps[0] = self.code_execution_step(
+            before_execution=step.before_execution, on_failure=step.on_failure, on_retry=step.on_retry
+        )
+
+
+class PooledChatPipeline(ChatPipeline):
+    """
+    Chat pipeline running the generated code in the pool of code execution workers.
+    """
+
+    code_execution_step = PooledCodeExecution
@@ -0,0 +1,326 @@
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import sqlglot
+from django.conf import settings
+from sqlalchemy.engine import Connection
+from sqlglot import exp
+
+from .exceptions import ExpensiveQueryError, QueryRefusedError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_GUARD_CONFIG = {
+    "enabled": True,
+    "action": "rewrite",
+    "max_cost": 1000000,
+    "max_rows": 100000,
+    "max_full_scan_rows": 10000000,
+    "limit": 1000,
+    "table_rows_cache_timeout": 300,
+}
+
+
+def get_cost_guard_config() -> Dict[str, Any]:
+    """
+    Returns the cost guard configuration merged with the defaults.
+
+    The `action` option sets what happens to an expensive query: "limit" injects a LIMIT clause when the query has
+    none, "rewrite" asks the LLM for a cheaper query and "refuse" rejects it.
+
+    Returns:
+        Dict[str, Any]: The cost guard configuration.
+    """
+    return DEFAULT_COST_GUARD_CONFIG | getattr(settings, "PANDASAI_COST_GUARD", {})
+
+
+@dataclass
+class QueryPlan:
+    """
+    Estimates extracted from the execution plan of a query.
+
+    Attributes:
+        cost (Optional[float]): Planner cost of the query, when the database reports one.
+        rows (Optional[float]): Estimated number of rows of the query result.
+        full_scans (Dict[str, Optional[float]]): Number of rows of the tables read with a full scan.
+        cartesian (bool): Whether the plan joins tables without any join condition.
+    """
+
+    cost: Optional[float] = None
+    rows: Optional[float] = None
+    full_scans: Dict[str, Optional[float]] = field(default_factory=dict)
+    cartesian: bool = False
+
+
+class CostGuard(ABC):
+    """
+    Runs EXPLAIN on the SQL queries generated by the agent and rejects or rewrites the expensive ones.
+
+    Subclasses implement `explain` for their database.
+    """
+
+    dialect: str = None
+    last_plan: Optional[QueryPlan] = None
+
+    _table_rows_cache: Dict[str, tuple] = {}
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_cost_guard_config()
+
+    @abstractmethod
+    def explain(self, connection: Connection, sql_query: str) -> QueryPlan:
+        """
+        Returns the estimates of the execution plan of a query.
+
+        Args:
+            connection (Connection): The connector database connection.
+            sql_query (str): The SQL query.
+
+        Returns:
+            QueryPlan: The execution plan estimates.
+        """
+
+    def count_table_rows(self, connection: Connection, table: str) -> Optional[float]:
+        """
+        Returns the number of rows of a table, as known by the database statistics.
+
+        Args:
+            connection (Connection): The connector database connection.
+            table (str): Name of the database table.
+
+        Returns:
+            Optional[float]: The number of rows of the table, or None if unknown.
+        """
+        return None
+
+    def get_table_rows(self, connection: Connection, table: str) -> Optional[float]:
+        """
+        Returns the number of rows of a table, cached for the configured timeout.
+
+        Args:
+            connection (Connection): The connector database connection.
+            table (str): Name of the database table.
+
+        Returns:
+            Optional[float]: The number of rows of the table, or None if unknown.
+        """
+        key = f"{self.dialect}:{connection.engine.url}:{table}"
+        cached = self._table_rows_cache.get(key)
+
+        if cached is None or cached[0] < time.monotonic():
+            cached = (
+                time.monotonic() + self.config["table_rows_cache_timeout"],
+                self.count_table_rows(connection, table),
+            )
+            self._table_rows_cache[key] = cached
+
+        return cached[1]
+
+    def get_problems(self, plan: QueryPlan) -> List[str]:
+        """
+        Returns the reasons a query plan is considered expensive.
+
+        Args:
+            plan (QueryPlan): The execution plan estimates.
+
+        Returns:
+            List[str]: The reasons the query is expensive, empty if it is not.
+        """
+        problems = []
+
+        if plan.cartesian and (plan.rows is None or plan.rows > (self.config["max_rows"] or 0)):
+            problems.append("it joins tables without a join condition (cartesian product)")
+
+        if self.config["max_cost"] and plan.cost is not None and plan.cost > self.config["max_cost"]:
+            problems.append(f"its estimated cost {plan.cost:.0f} exceeds {self.config['max_cost']}")
+
+        if self.config["max_rows"] and plan.rows is not None and plan.rows > self.config["max_rows"]:
+            problems.append(f"it is estimated to return {plan.rows:.0f} rows, more than {self.config['max_rows']}")
+
+        if self.config["max_full_scan_rows"]:
+            for table, rows in plan.full_scans.items():
+                if rows is not None and rows > self.config["max_full_scan_rows"]:
+                    problems.append(f"it reads all the {rows:.0f} rows of {table}")
+
+        return problems
+
+    def inject_limit(self, sql_query: str) -> Optional[str]:
+        """
+        Adds the configured LIMIT clause to a query without one.
+
+        Args:
+            sql_query (str): The SQL query.
+
+        Returns:
+            Optional[str]: The limited SQL query, or None if the query cannot be limited.
+        """
+        try:
+            tree = sqlglot.parse_one(sql_query, read=self.dialect)
+        except sqlglot.errors.SqlglotError:
+            return None
+
+        if not isinstance(tree, (exp.Select, exp.Union)) or tree.args.get("limit"):
+            return None
+
+        return tree.limit(self.config["limit"]).sql(dialect=self.dialect)
+
+    def check(self, connection: Connection, sql_query: str) -> str:
+        """
+        Checks the execution plan of a query and returns the query to execute.
+
+        Args:
+            connection (Connection): The connector database connection.
+            sql_query (str): The SQL query.
+
+        Raises:
+            ExpensiveQueryError: If the query is expensive and the LLM should write a cheaper one.
+            QueryRefusedError: If the query is expensive and the guard is configured to refuse it.
+
+        Returns:
+            str: The SQL query to execute, with an injected LIMIT clause if needed.
+        """
+        plan = self.last_plan = self.explain(connection, sql_query)
+        problems = self.get_problems(plan)
+
+        if not problems:
+            logger.debug("Cost guard allowed query %r: %s", sql_query, plan)
+            return sql_query
+
+        reasons = "; ".join(problems)
+
+        if self.config["action"] == "limit" and (limited_query := self.inject_limit(sql_query)) is not None:
+            logger.info("Cost guard limited query %r because %s: %s", sql_query, reasons, plan)
+            return limited_query
+
+        if self.config["action"] == "refuse":
+            logger.warning("Cost guard refused query %r because %s: %s", sql_query, reasons, plan)
+            raise QueryRefusedError(f"The query was refused because {reasons}.")
+
+        logger.info("Cost guard asked to rewrite query %r because %s: %s", sql_query, reasons, plan)
+        raise ExpensiveQueryError(
+            f"The query is too expensive because {reasons}. Rewrite it with join conditions on the foreign keys, "
+            "filters on indexed columns, aggregations, or a LIMIT clause."
+        )
+
+
+class SqliteCostGuard(CostGuard):
+    """
+    Cost guard reading `EXPLAIN QUERY PLAN`, which reports full scans but no cost or cardinality estimates.
+
+    Scans of a covering index read every row of the index, so they count as full scans. SQLite keeps no row counts,
+    so the scanned tables are only counted when `max_full_scan_rows` is set.
+    """
+
+    dialect = "sqlite"
+
+    def count_table_rows(self, connection, table):
+        return connection.exec_driver_sql(f'SELECT COUNT(*) FROM "{table}"').scalar()
+
+    def explain(self, connection, sql_query):
+        try:
+            aliases = {
+                table.alias_or_name: table.name
+                for table in sqlglot.parse_one(sql_query, read=self.dialect).find_all(exp.Table)
+            }
+        except sqlglot.errors.SqlglotError:
+            aliases = {}
+
+        scans = {}
+        for _, parent, _, detail in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql_query}"):
+            words = detail.split()
+            if len(words) > 1 and words[0] == "SCAN" and words[1] in aliases:
+                scans.setdefault(parent, []).append(aliases[words[1]])
+
+        plan = QueryPlan()
+        for tables in scans.values():
+            for table in tables:
+                plan.full_scans[table] = (
+                    self.get_table_rows(connection, table) if self.config["max_full_scan_rows"] else None
+                )
+
+            # Nested full scans in the same join multiply their rows, unknown when the tables are not counted
+            if len(tables) > 1:
+                plan.cartesian = True
+                sizes = [plan.full_scans[table] for table in tables]
+                if None not in sizes:
+                    plan.rows = max(plan.rows or 0, math.prod(sizes))
+
+        return plan
+
+
+class PostgreSQLCostGuard(CostGuard):
+    """
+    Cost guard reading `EXPLAIN (FORMAT JSON)` planner estimates.
+    """
+
+    dialect = "postgres"
+
+    def count_table_rows(self, connection, table):
+        return connection.exec_driver_sql(
+            "SELECT reltuples FROM pg_class WHERE relname = %(table)s", {"table": table}
+        ).scalar()
+
+    def walk(self, node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        yield node
+        for child in node.get("Plans", []):
+            yield from self.walk(child)
+
+    def explain(self, connection, sql_query):
+        output = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql_query}").scalar()
+        root = (json.loads(output) if isinstance(output, str) else output)[0]["Plan"]
+
+        plan = QueryPlan(cost=root.get("Total Cost"), rows=root.get("Plan Rows"))
+        for node in self.walk(root):
+            if node["Node Type"] == "Seq Scan":
+                plan.full_scans[node["Relation Name"]] = self.get_table_rows(connection, node["Relation Name"])
+
+            if node["Node Type"] == "Nested Loop" and "Join Filter" not in node:
+                conditions = [key for child in node.get("Plans", []) for key in child if key.endswith("Cond")]
+                plan.cartesian = plan.cartesian or not conditions
+
+        return plan
+
+
+class MySQLCostGuard(CostGuard):
+    """
+    Cost guard reading `EXPLAIN FORMAT=JSON` optimizer estimates.
+    """
+
+    dialect = "mysql"
+
+    def count_table_rows(self, connection, table):
+        return connection.exec_driver_sql(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,),
+        ).scalar()
+
+    def walk(self, node: Any) -> Iterator[Dict[str, Any]]:
+        if isinstance(node, dict):
+            if "table" in node and isinstance(node["table"], dict):
+                yield node["table"]
+            for value in node.values():
+                yield from self.walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from self.walk(value)
+
+    def explain(self, connection, sql_query):
+        query_block = json.loads(connection.exec_driver_sql(f"EXPLAIN FORMAT=JSON {sql_query}").scalar())["query_block"]
+
+        plan = QueryPlan(cost=float(query_block.get("cost_info", {}).get("query_cost", 0)))
+        for table in self.walk(query_block):
+            if table.get("access_type") == "ALL":
+                plan.full_scans[table["table_name"]] = self.get_table_rows(connection, table["table_name"])
+
+            if table.get("using_join_buffer") and "attached_condition" not in table:
+                plan.cartesian = True
+
+            if "rows_produced_per_join" in table:
+                plan.rows = float(table["rows_produced_per_join"])
+
+        return plan
@@ -0,0 +1,158 @@
+from typing import Dict, List
+
+from django.db import connection, connections
+from django.db.models import ManyToManyField
+
+from ..models import QueryableModel
+from .config import get_database_alias
+
+JOIN_VIEW_PREFIX = "pandasai_join_"
+
+
+def get_many_to_many_fields(models: List[QueryableModel]) -> List[ManyToManyField]:
+    """
+    Returns the many-to-many fields between the given models.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+
+    Returns:
+        List[ManyToManyField]: The many-to-many fields whose model and related model are both in the list.
+    """
+    return [
+        many_to_many
+        for model in models
+        for many_to_many in model._meta.many_to_many
+        if many_to_many.related_model in models
+    ]
+
+
+def get_join_view_fields(models: List[QueryableModel]) -> List[ManyToManyField]:
+    """
+    Returns the many-to-many fields between the given models that get a join view.
+
+    Self-referential fields are left out, since their view would repeat every column of the model, and their
+    through table is enough to join the model with itself.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+
+    Returns:
+        List[ManyToManyField]: The many-to-many fields with a join view.
+    """
+    return [
+        many_to_many
+        for many_to_many in get_many_to_many_fields(models)
+        if many_to_many.related_model is not many_to_many.model
+    ]
+
+
+def get_join_view_name(many_to_many: ManyToManyField) -> str:
+    """
+    Returns the name of the join view of a many-to-many field, e.g. "pandasai_join_movies_movie_genres".
+
+    Args:
+        many_to_many (ManyToManyField): A many-to-many field.
+
+    Returns:
+        str: Name of the join view.
+    """
+    return f"{JOIN_VIEW_PREFIX}{many_to_many.model._meta.db_table}_{many_to_many.name}"
+
+
+def get_join_view_sql(many_to_many: ManyToManyField) -> str:
+    """
+    Returns the query of the join view of a many-to-many field.
+
+    The view has a row per related pair, with the model columns followed by the related model columns prefixed by the
+    name of the field.
+
+    Args:
+        many_to_many (ManyToManyField): A many-to-many field.
+
+    Returns:
+        str: The SELECT query of the join view.
+    """
+    quote_name = connection.ops.quote_name
+    model = many_to_many.model._meta
+    related_model = many_to_many.related_model._meta
+    through = many_to_many.remote_field.through._meta
+
+    columns = [f"m.{quote_name(field.column)}" for field in model.concrete_fields if field.column]
+    columns += [
+        f"r.{quote_name(field.column)} AS {quote_name(f'{many_to_many.name}_{field.column}')}"
+        for field in related_model.concrete_fields
+        if field.column
+    ]
+
+    return (
+        f"SELECT {', '.join(columns)} FROM {quote_name(model.db_table)} m "
+        f"JOIN {quote_name(through.db_table)} t ON t.{quote_name(many_to_many.m2m_column_name())} = "
+        f"m.{quote_name(model.pk.column)} "
+        f"JOIN {quote_name(related_model.db_table)} r ON r.{quote_name(related_model.pk.column)} = "
+        f"t.{quote_name(many_to_many.m2m_reverse_name())}"
+    )
+
+
+def create_join_views(models: List[QueryableModel]) -> List[str]:
+    """
+    Creates the join views of the many-to-many fields between the given models, replacing any previous views.
+
+    Views are created through the default database, so read-only replicas receive them by replication.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+
+    Returns:
+        List[str]: Names of the created views.
+    """
+    views = []
+
+    with connection.cursor() as cursor:
+        for many_to_many in get_join_view_fields(models):
+            view = get_join_view_name(many_to_many)
+            cursor.execute(f"DROP VIEW IF EXISTS {connection.ops.quote_name(view)}")
+            cursor.execute(f"CREATE VIEW {connection.ops.quote_name(view)} AS {get_join_view_sql(many_to_many)}")
+            views.append(view)
+
+    return views
+
+
+def drop_join_views() -> List[str]:
+    """
+    Drops the join views of the default database.
+
+    Returns:
+        List[str]: Names of the dropped views.
+    """
+    with connection.cursor() as cursor:
+        views = [
+            table.name
+            for table in connection.introspection.get_table_list(cursor)
+            if table.type == "v" and table.name.startswith(JOIN_VIEW_PREFIX)
+        ]
+        for view in views:
+            cursor.execute(f"DROP VIEW {connection.ops.quote_name(view)}")
+
+    return views
+
+
+def get_join_views(models: List[QueryableModel]) -> Dict[str, ManyToManyField]:
+    """
+    Returns the join views of the given models that have been created in the agent database.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+
+    Returns:
+        Dict[str, ManyToManyField]: A dictionary mapping view names to their many-to-many fields.
+    """
+    agent_connection = connections[get_database_alias()]
+    with agent_connection.cursor() as cursor:
+        existing = {table.name for table in agent_connection.introspection.get_table_list(cursor) if table.type == "v"}
+
+    return {
+        get_join_view_name(many_to_many): many_to_many
+        for many_to_many in get_join_view_fields(models)
+        if get_join_view_name(many_to_many) in existing
+    }
@@ -0,0 +1,263 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import httpx
+import openai
+from django.conf import settings
+from pandasai import llm
+from pandasai.llm.base import LLM
+from pandasai.prompts.base import BasePrompt
+
+from ..profiling import profile_thread
+from .exceptions import LLMTimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CLIENT_CONFIG = {
+    "timeout_budget": 120,
+    "request_timeout": 60,
+    "connect_timeout": 5,
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30,
+    "retries": 2,
+    "backoff": 0.5,
+    "max_backoff": 8,
+    "hedge_after": None,
+    "max_hedges": 1,
+}
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def get_llm_client_config() -> Dict[str, Any]:
+    """
+    Returns the LLM client configuration, set in the `llm_client` key of `PANDASAI_CONFIG`, merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The LLM client configuration.
+    """
+    return DEFAULT_LLM_CLIENT_CONFIG | getattr(settings, "PANDASAI_CONFIG", {}).get("llm_client", {})
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """
+    Returns the HTTP client shared by the LLM calls of the process, keeping its connections alive between agents.
+
+    Returns:
+        httpx.Client: The shared HTTP client.
+    """
+    config = get_llm_client_config()
+
+    return httpx.Client(
+        timeout=httpx.Timeout(config["request_timeout"], connect=config["connect_timeout"]),
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool running the LLM requests of the process, including the hedged ones.
+
+    Returns:
+        ThreadPoolExecutor: The shared thread pool.
+    """
+    return ThreadPoolExecutor(max_workers=get_llm_client_config()["max_connections"], thread_name_prefix="llm")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Returns whether an LLM request error is transient, so the request can be retried.
+
+    Args:
+        error (Exception): The request error.
+
+    Returns:
+        bool: True if the request can be retried.
+    """
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+
+    return isinstance(error, (openai.APIConnectionError, httpx.TransportError))
+
+
+def get_retry_delay(error: Exception, attempt: int, config: Dict[str, Any]) -> float:
+    """
+    Returns the delay before retrying a failed LLM request, with full jitter, honouring `Retry-After` headers.
+
+    Args:
+        error (Exception): The request error.
+        attempt (int): The number of the failed attempt, starting at 0.
+        config (Dict[str, Any]): The LLM client configuration.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+
+    try:
+        return min(float(retry_after), config["max_backoff"])
+    except (TypeError, ValueError):
+        return random.uniform(0, min(config["max_backoff"], config["backoff"] * 2**attempt))
+
+
+def configure_client(llm: LLM, config: Dict[str, Any]) -> LLM:
+    """
+    Points the OpenAI client of an LLM at the shared HTTP client, leaving the retries to ManagedLLM.
+
+    LLMs that are not backed by an OpenAI client are returned unchanged.
+
+    Args:
+        llm (LLM): A PandasAI LLM.
+        config (Dict[str, Any]): The LLM client configuration.
+
+    Returns:
+        LLM: The LLM.
+    """
+    client = getattr(getattr(llm, "client", None), "_client", None)
+
+    if isinstance(client, openai.OpenAI):
+        client = client.with_options(
+            http_client=get_http_client(),
+            timeout=httpx.Timeout(config["request_timeout"], connect=config["connect_timeout"]),
+            max_retries=0,
+        )
+        llm.client = client.chat.completions if llm._is_chat_model else client.completions
+
+    return llm
+
+
+class ManagedLLM(LLM):
+    """
+    Wraps a PandasAI LLM with a timeout budget, jittered retries on transient errors and hedged requests.
+
+    When `hedge_after` is set, a duplicate request is sent if the first one has not answered after that many seconds,
+    and the first answer wins.
+    """
+
+    def __init__(self, llm: LLM, config: Optional[Dict[str, Any]] = None):
+        self.llm = llm
+        self.config = config or get_llm_client_config()
+        self._last_prompt = threading.local()
+
+    @property
+    def type(self) -> str:
+        return self.llm.type
+
+    @property
+    def last_prompt(self) -> Optional[str]:
+        return getattr(self._last_prompt, "value", None)
+
+    @last_prompt.setter
+    def last_prompt(self, value: Optional[str]):
+        self._last_prompt.value = value
+
+    def submit(self, instruction: BasePrompt, context: Any) -> Future:
+        """
+        Sends a request to the wrapped LLM in the shared thread pool.
+
+        Args:
+            instruction (BasePrompt): The prompt.
+            context (Any): The pipeline context.
+
+        Returns:
+            Future: The future of the LLM response.
+        """
+        return get_executor().submit(
+            contextvars.copy_context().run, profile_thread, self.llm.call, instruction, context
+        )
+
+    def request(self, instruction: BasePrompt, context: Any, deadline: float) -> str:
+        """
+        Sends a request to the wrapped LLM, hedging it if it is slow.
+
+        Args:
+            instruction (BasePrompt): The prompt.
+            context (Any): The pipeline context.
+            deadline (float): The monotonic time at which the timeout budget is exhausted.
+
+        Raises:
+            LLMTimeoutError: If no request answers before the deadline.
+
+        Returns:
+            str: The LLM response.
+        """
+        pending: List[Future] = [self.submit(instruction, context)]
+        hedges = self.config["max_hedges"] if self.config["hedge_after"] else 0
+        error = None
+
+        while pending:
+            timeout = deadline - time.monotonic()
+            if hedges:
+                timeout = min(timeout, self.config["hedge_after"])
+
+            done, not_done = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+            pending = list(not_done)
+
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+
+            if time.monotonic() >= deadline:
+                break
+
+            if not done and hedges:
+                logger.info("Hedging LLM request after %ss", self.config["hedge_after"])
+                pending.append(self.submit(instruction, context))
+                hedges -= 1
+
+        if error is not None and not pending:
+            raise error
+
+        for future in pending:
+            future.cancel()
+        raise LLMTimeoutError(f"The LLM did not answer within {self.config['timeout_budget']} seconds.")
+
+    def call(self, instruction: BasePrompt, context: Any = None) -> str:
+        self.last_prompt = instruction.to_string()
+        deadline = time.monotonic() + self.config["timeout_budget"]
+
+        for attempt in range(self.config["retries"] + 1):
+            try:
+                return self.request(instruction, context, deadline)
+            except Exception as e:
+                if attempt == self.config["retries"] or not is_transient_error(e):
+                    raise
+
+                delay = get_retry_delay(e, attempt, self.config)
+                if time.monotonic() + delay >= deadline:
+                    raise
+
+                logger.warning("Retrying LLM request in %.2fs after %r", delay, e)
+                time.sleep(delay)
+
+
+def get_llm(name: str, options: Dict[str, Any]) -> ManagedLLM:
+    """
+    Returns a managed PandasAI LLM.
+
+    Args:
+        name (str): Name of the PandasAI LLM class, e.g. "OpenAI".
+        options (Dict[str, Any]): Options of the PandasAI LLM, e.g. "api_base" to use another endpoint.
+
+    Returns:
+        ManagedLLM: The managed LLM.
+    """
+    config = get_llm_client_config()
+    return ManagedLLM(configure_client(getattr(llm, name)(**options), config), config)
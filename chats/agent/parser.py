@@ -2,9 +2,14 @@ import base64
 from typing import Any, Dict
 
 import pandas as pd
+from django.core.exceptions import ValidationError
 from django.forms import URLField
 from pandasai.responses.response_parser import ResponseParser
 
+from .tables import IMAGE_EXTENSIONS, render_table
+
+url_field = URLField(assume_scheme="http")
+
 
 class HtmlResponseParser(ResponseParser):
     def parse(self, result: Dict[str, Any]) -> str:
@@ -51,7 +56,7 @@ class HtmlResponseParser(ResponseParser):
 
     def format_dataframe(self, result: Dict[str, Any]) -> str:
         """
-        Formats the DataFrame result into an HTML table.
+        Formats the DataFrame result into an HTML table, or a columnar JSON payload for large results.
 
         Args:
             result (dict): The result dictionary.
@@ -62,7 +67,7 @@ class HtmlResponseParser(ResponseParser):
         if isinstance(result["value"], dict):
             result["value"] = pd.DataFrame(result["value"])
 
-        return result["value"].to_html(index=False, border=0)
+        return render_table(result["value"])
 
     def format_string(self, result: Dict[str, Any]) -> str:
         """
@@ -74,12 +79,12 @@ class HtmlResponseParser(ResponseParser):
         Returns:
             str: The HTML formatted string.
         """
-        url_field = URLField()
         try:
             url = url_field.clean(result["value"])
-            if url.lower().endswith((".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif", ".svg", ".webp", ".ico")):
-                return f'<img class="image" src="{url}">'
-            else:
-                return f'<a class="link" href="{url}">{result["value"]}</a>'
-        except:
+        except ValidationError:
             return result["value"]
+
+        if url.lower().endswith(IMAGE_EXTENSIONS):
+            return f'<img class="image" src="{url}">'
+        else:
+            return f'<a class="link" href="{url}">{result["value"]}</a>'
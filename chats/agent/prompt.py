@@ -0,0 +1,266 @@
+import csv
+import hashlib
+import io
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import ManyToManyField
+
+from ..models import QueryableModel
+from .config import get_database_alias
+
+DEFAULT_PROMPT_SCHEMA_CONFIG = {
+    "enabled": True,
+    "cache": "default",
+    "cache_timeout": 3600,
+    "sample_rows": 3,
+    "max_value_length": 24,
+    "max_choices": 12,
+}
+
+KEY_PREFIX = "pandasai:prompt"
+
+
+def get_prompt_schema_config() -> Dict[str, Any]:
+    """
+    Returns the prompt schema configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The prompt schema configuration.
+    """
+    return DEFAULT_PROMPT_SCHEMA_CONFIG | getattr(settings, "PANDASAI_PROMPT_SCHEMA", {})
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens of a text, at about four characters per token.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return (len(text) + 3) // 4
+
+
+def truncate(value: Any, max_length: int) -> str:
+    """
+    Renders a value as a string of at most the given length.
+
+    Args:
+        value (Any): The value.
+        max_length (int): The maximum length of the string.
+
+    Returns:
+        str: The truncated string.
+    """
+    text = "" if value is None else " ".join(str(value).split())
+    return f"{text[: max_length - 1]}…" if len(text) > max_length else text
+
+
+def get_choices_name(field: Any) -> str:
+    """
+    Returns the name of the choice list of a field, e.g. "Movie.Status".
+
+    Args:
+        field (Any): A model field with choices.
+
+    Returns:
+        str: The name of the choice list.
+    """
+    return f"{field.model.__name__}.{field.name.title().replace('_', '')}"
+
+
+def get_columns(model: QueryableModel, join: Optional[ManyToManyField] = None) -> List[Tuple[str, Any]]:
+    """
+    Returns the columns of a model table, or of the join view of one of its many-to-many fields.
+
+    The columns of the join view are the model columns followed by the related model columns, prefixed by the name of
+    the many-to-many field.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        join (Optional[ManyToManyField]): The many-to-many field of the join view.
+
+    Returns:
+        List[Tuple[str, Any]]: The column names and their model fields.
+    """
+    columns = [(field.column, field) for field in model._meta.concrete_fields if field.column]
+
+    if join is not None:
+        columns += [(f"{join.name}_{column}", field) for column, field in get_columns(join.related_model)]
+
+    return columns
+
+
+def get_schema_fingerprint(
+    model: QueryableModel,
+    table: str,
+    description: Optional[str],
+    field_descriptions: Optional[Dict[str, str]],
+    enforce_privacy: bool,
+    config: Dict[str, Any],
+    join: Optional[ManyToManyField] = None,
+) -> str:
+    """
+    Returns a fingerprint of everything the schema description of a table depends on.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        table (str): Name of the database table the agent queries.
+        description (Optional[str]): Description of the table.
+        field_descriptions (Optional[Dict[str, str]]): Descriptions for fields in the table.
+        enforce_privacy (bool): Whether sample values are hidden from the LLM.
+        config (Dict[str, Any]): The prompt schema configuration.
+        join (Optional[ManyToManyField]): The many-to-many field of the join view, if the table is one.
+
+    Returns:
+        str: The schema fingerprint.
+    """
+    connection = connections[get_database_alias()]
+    columns = [
+        (column, field.db_type(connection), field.null, [str(value) for value, _ in field.choices or []])
+        for column, field in get_columns(model, join)
+    ]
+    payload = [model._meta.label, join and join.name, table, description, field_descriptions, columns, enforce_privacy]
+
+    return hashlib.sha256(json.dumps([*payload, config], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_sample_rows(model: QueryableModel, config: Dict[str, Any]) -> List[List[str]]:
+    """
+    Returns the first rows of a model by primary key, with truncated values, so the samples are deterministic.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        config (Dict[str, Any]): The prompt schema configuration.
+
+    Returns:
+        List[List[str]]: The sample rows.
+    """
+    attnames = [field.attname for _, field in get_columns(model)]
+    rows = model._default_manager.using(get_database_alias()).order_by("pk").values_list(*attnames)
+
+    return [[truncate(value, config["max_value_length"]) for value in row] for row in rows[: config["sample_rows"]]]
+
+
+def serialize_table(
+    model: QueryableModel,
+    table: str,
+    description: Optional[str] = None,
+    field_descriptions: Optional[Dict[str, str]] = None,
+    enforce_privacy: bool = False,
+    config: Optional[Dict[str, Any]] = None,
+    join: Optional[ManyToManyField] = None,
+) -> str:
+    """
+    Serializes a table as a compact, typed DDL-like description followed by its choice lists and sample rows.
+
+    Sample rows list the column values in the order of the description, without a header. Join views have no sample
+    rows, since the tables they join have their own.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        table (str): Name of the database table the agent queries.
+        description (Optional[str]): Description of the table.
+        field_descriptions (Optional[Dict[str, str]]): Descriptions for fields in the table.
+        enforce_privacy (bool): Whether to hide sample values from the LLM.
+        config (Optional[Dict[str, Any]]): Prompt schema configuration, defaults to the project settings.
+        join (Optional[ManyToManyField]): The many-to-many field of the join view, if the table is one.
+
+    Returns:
+        str: The table description.
+    """
+    config = config or get_prompt_schema_config()
+    connection = connections[get_database_alias()]
+    field_descriptions = field_descriptions or {}
+    columns, choice_lists = [], []
+    described = get_columns(model)
+
+    # Join views are described as the model columns followed by the related model columns
+    if join is not None:
+        columns.append(f"{model._meta.db_table}.*")
+        described = get_columns(model, join)[len(described) :]
+
+    for name, field in described:
+        column = f"{name} {field.db_type(connection)}"
+
+        if field.primary_key and field.model is model:
+            column += " PK"
+        elif field.primary_key:
+            column += f" FK {field.model._meta.db_table}.{field.column}"
+        elif field.is_relation:
+            column += f" FK {field.related_model._meta.db_table}.{field.target_field.column}"
+        elif field.null:
+            column += " NULL"
+
+        if field.choices:
+            choices_name = get_choices_name(field)
+            values = [
+                f"{value}" if str(value) == str(label) else f"{value} ({label})" for value, label in field.choices
+            ]
+            if len(values) > config["max_choices"]:
+                values = [*values[: config["max_choices"]], "…"]
+            column += f" {choices_name}"
+            choice_list = f"{choices_name}: {' | '.join(values)}"
+            if choice_list not in choice_lists:
+                choice_lists.append(choice_list)
+
+        if field.model is model and field.name in field_descriptions:
+            column += f" -- {field_descriptions[field.name]}"
+
+        columns.append(column)
+
+    lines = [f"{table}({', '.join(columns)})"]
+    if description:
+        lines.append(f"-- {description}")
+    lines.extend(choice_lists)
+
+    if join is None and not enforce_privacy and (rows := get_sample_rows(model, config)):
+        output = io.StringIO()
+        csv.writer(output, lineterminator="\n").writerows(rows)
+        lines.append(f"-- samples\n{output.getvalue().rstrip()}")
+
+    return "\n".join(lines)
+
+
+def get_table_prompt(
+    model: QueryableModel,
+    table: str,
+    description: Optional[str] = None,
+    field_descriptions: Optional[Dict[str, str]] = None,
+    enforce_privacy: bool = False,
+    join: Optional[ManyToManyField] = None,
+) -> str:
+    """
+    Returns the compact description of a table, cached per schema fingerprint.
+
+    The cached text is reused verbatim across questions and processes, so the tables that prefix every prompt stay
+    byte-identical and the LLM provider's prompt caching can apply.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        table (str): Name of the database table the agent queries.
+        description (Optional[str]): Description of the table.
+        field_descriptions (Optional[Dict[str, str]]): Descriptions for fields in the table.
+        enforce_privacy (bool): Whether to hide sample values from the LLM.
+        join (Optional[ManyToManyField]): The many-to-many field of the join view, if the table is one.
+
+    Returns:
+        str: The table description.
+    """
+    config = get_prompt_schema_config()
+    cache = caches[config["cache"]]
+    fingerprint = get_schema_fingerprint(model, table, description, field_descriptions, enforce_privacy, config, join)
+    key = f"{KEY_PREFIX}:{fingerprint}"
+
+    prompt = cache.get(key)
+    if prompt is None:
+        prompt = serialize_table(model, table, description, field_descriptions, enforce_privacy, config, join)
+        cache.set(key, prompt, timeout=config["cache_timeout"])
+
+    return prompt
@@ -0,0 +1,212 @@
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, F, QuerySet, Window
+from django.db.models.functions import Ceil, RowNumber
+
+from ..models import QueryableModel, SampleTable
+from .config import get_database_alias
+
+SAMPLE_TABLE_PREFIX = "pandasai_sample_"
+
+# Multiplicative hash of the primary keys, kept within 64-bit integers for primary keys below 2^31
+SAMPLE_HASH_MULTIPLIER = 2654435761
+SAMPLE_HASH_MODULUS = 2**32
+
+DEFAULT_SAMPLING_CONFIG = {
+    "enabled": False,
+    "fraction": 0.1,
+    "seed": 42,
+    "min_rows": 10000,
+}
+
+
+def get_sampling_config() -> Dict[str, Any]:
+    """
+    Returns the sampling configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The sampling configuration.
+    """
+    return DEFAULT_SAMPLING_CONFIG | getattr(settings, "PANDASAI_SAMPLING", {})
+
+
+def is_sampling_enabled() -> bool:
+    """
+    Returns whether the sampled execution mode is enabled.
+
+    Returns:
+        bool: True if the sampled execution mode is enabled.
+    """
+    return bool(get_sampling_config()["enabled"])
+
+
+def get_sample_table_name(table: str) -> str:
+    """
+    Returns the name of the sample table of a given table.
+
+    Args:
+        table (str): Name of the database table.
+
+    Returns:
+        str: Name of the sample table.
+    """
+    return f"{SAMPLE_TABLE_PREFIX}{table}"
+
+
+def get_sample_tables() -> Dict[str, str]:
+    """
+    Returns the sample tables that have already been materialized in the agent database.
+
+    Sample tables without a stored fraction, e.g. materialized before fractions were stored, are left out, since
+    answers computed from them could not be labelled nor scaled.
+
+    Returns:
+        Dict[str, str]: A dictionary mapping table names to their sample table names.
+    """
+    existing = set(connections[get_database_alias()].introspection.table_names())
+    fractions = get_sample_fractions()
+    return {
+        table[len(SAMPLE_TABLE_PREFIX) :]: table
+        for table in existing
+        if table.startswith(SAMPLE_TABLE_PREFIX)
+        and table[len(SAMPLE_TABLE_PREFIX) :] in existing
+        and table in fractions
+    }
+
+
+def get_sample_fractions() -> Dict[str, float]:
+    """
+    Returns the fractions the sample tables were materialized with, as stored in the agent database.
+
+    Returns:
+        Dict[str, float]: A dictionary mapping sample table names to their fraction of rows.
+    """
+    return dict(SampleTable.objects.using(get_database_alias()).values_list("table", "fraction"))
+
+
+def get_sample_description(description: Optional[str], table: str, fraction: float) -> str:
+    """
+    Returns the description of a sample table given to the LLM, telling it to scale the totals it computes.
+
+    Each table is sampled independently, so a join of two sample tables only keeps the pairs of matching rows that
+    were both sampled, about the product of their fractions, and its totals are scaled by the product of their
+    inverse fractions.
+
+    Args:
+        description (Optional[str]): Description of the full table.
+        table (str): Name of the full table.
+        fraction (float): Fraction of the rows of the full table in the sample.
+
+    Returns:
+        str: The sample table description.
+    """
+    note = (
+        f"This table is a {fraction:.0%} random sample of the rows of {table}, sampled independently of the other "
+        f"tables. Multiply counts and sums computed from this table alone by {1 / fraction:g} to estimate the totals "
+        f"of the full table. A join keeps only the matching rows sampled in every table it reads, so multiply counts "
+        f"and sums computed from a join by the product of the factors of all the sample tables it reads, e.g. "
+        f"{1 / fraction**2:g} for a join of two tables sampled like this one, and add no factor for tables that are "
+        f"not samples. Averages and ratios need no scaling."
+    )
+    return f"{description} {note}" if description else note
+
+
+def get_sample_queryset(
+    model: QueryableModel, fraction: float, seed: int, stratify_by: Optional[str] = None
+) -> QuerySet:
+    """
+    Returns a query selecting a deterministic sample of the primary keys of a model.
+
+    The rows of each stratum are ranked by a hash of their integer primary key seeded by the sampling seed, and the
+    first `ceil(count * fraction)` rows of each stratum are kept, so the same data always yields the same sample, and
+    the sample is selected by the database without loading the primary keys.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        fraction (float): Fraction of rows to sample from each stratum.
+        seed (int): Seed of the primary key hash.
+        stratify_by (Optional[str]): Name of the field used to stratify the sample.
+
+    Returns:
+        QuerySet: The query of the sampled primary keys.
+    """
+    partition_by = [F(stratify_by)] if stratify_by else None
+    sample_hash = (F("pk") + seed) * SAMPLE_HASH_MULTIPLIER % SAMPLE_HASH_MODULUS
+
+    return (
+        model._default_manager.order_by()
+        .annotate(
+            sample_rank=Window(RowNumber(), partition_by=partition_by, order_by=[sample_hash.asc(), F("pk").asc()]),
+            sample_size=Window(Count("pk"), partition_by=partition_by),
+        )
+        .filter(sample_rank__lte=Ceil(F("sample_size") * fraction))
+        .values("pk")
+    )
+
+
+def materialize_sample(model: QueryableModel, config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Materializes the sample table of a model, replacing any previous sample.
+
+    Samples are written through the default database, so read-only replicas receive them by replication, along with
+    the fraction they were materialized with. The previous sample is replaced in a single transaction, so the agent
+    never reads a partial sample nor a sample with the fraction of another. Models with fewer rows than the configured
+    minimum are not sampled.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+        config (Optional[Dict[str, Any]]): Sampling configuration, defaults to the project settings.
+
+    Returns:
+        Optional[str]: Name of the sample table, or None if the model was not sampled.
+    """
+    config = config or get_sampling_config()
+    table = model._meta.db_table
+    sample_table = get_sample_table_name(table)
+    quote_name = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if sample_table in connection.introspection.table_names(cursor):
+            cursor.execute(f"DROP TABLE {quote_name(sample_table)}")
+        SampleTable.objects.filter(table=sample_table).delete()
+
+        if model._default_manager.count() < config["min_rows"]:
+            return None
+
+        sample_sql, sample_params = get_sample_queryset(
+            model, config["fraction"], config["seed"], model.sample_stratify_by
+        ).query.sql_with_params()
+
+        cursor.execute(f"CREATE TABLE {quote_name(sample_table)} AS SELECT * FROM {quote_name(table)} WHERE 1 = 0")
+        cursor.execute(
+            f"INSERT INTO {quote_name(sample_table)} SELECT * FROM {quote_name(table)} "
+            f"WHERE {quote_name(model._meta.pk.column)} IN ({sample_sql})",
+            sample_params,
+        )
+
+        SampleTable.objects.create(table=sample_table, fraction=config["fraction"], seed=config["seed"])
+
+    return sample_table
+
+
+def materialize_samples(models: List[QueryableModel], config: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """
+    Materializes the sample tables of a list of models.
+
+    Args:
+        models (List[QueryableModel]): A list of QueryableModel subclasses.
+        config (Optional[Dict[str, Any]]): Sampling configuration, defaults to the project settings.
+
+    Returns:
+        Dict[str, str]: A dictionary mapping table names to their sample table names.
+    """
+    samples = {}
+
+    for model in models:
+        sample_table = materialize_sample(model, config)
+        if sample_table is not None:
+            samples[model._meta.db_table] = sample_table
+
+    return samples
@@ -0,0 +1,192 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+from django.conf import settings
+
+from ..models import QueryableModel
+
+DEFAULT_SCHEMA_SELECTION_CONFIG = {
+    "enabled": True,
+    "top_k": 3,
+    "max_tables": 8,
+    "partner_min_score": 0.5,
+}
+
+MODEL_NAME_WEIGHT = 3
+
+STOP_WORDS = {
+    "a", "all", "an", "and", "are", "by", "each", "for", "from", "have", "how", "in", "is", "many", "me", "much",
+    "of", "on", "or", "show", "the", "there", "to", "what", "which", "who", "with",
+}  # fmt: skip
+
+
+def get_schema_selection_config() -> Dict[str, Any]:
+    """
+    Returns the schema selection configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The schema selection configuration.
+    """
+    return DEFAULT_SCHEMA_SELECTION_CONFIG | getattr(settings, "PANDASAI_SCHEMA_SELECTION", {})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercase terms, dropping stop words and reducing plurals to their singular.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The terms of the text.
+    """
+    terms = []
+
+    for word in re.findall(r"[a-z0-9]+", str(text).lower().replace("_", " ")):
+        if len(word) > 3 and word.endswith("ies"):
+            word = f"{word[:-3]}y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        if word not in STOP_WORDS:
+            terms.append(word)
+
+    return terms
+
+
+def get_model_terms(model: QueryableModel) -> List[str]:
+    """
+    Returns the terms describing a model: its names, description, fields and choices.
+
+    Args:
+        model (QueryableModel): A QueryableModel subclass.
+
+    Returns:
+        List[str]: The terms of the model, with its names repeated to weigh more.
+    """
+    opts = model._meta
+    table = opts.db_table.removeprefix(f"{opts.app_label}_")
+    names = f"{opts.model_name} {opts.verbose_name} {opts.verbose_name_plural} {table}"
+    texts = [model.description or "", *(model.field_descriptions or {}).values()]
+
+    for field in opts.get_fields():
+        if field.auto_created and not field.concrete:
+            continue
+        texts.append(field.name)
+        texts.append(str(getattr(field, "verbose_name", "")))
+        texts.extend(str(label) for _, label in getattr(field, "choices", None) or [])
+
+    return tokenize(names) * MODEL_NAME_WEIGHT + [term for text in texts for term in tokenize(text)]
+
+
+class SchemaIndex:
+    """
+    In-memory TF-IDF index of the queryable models, with their foreign key and many-to-many adjacency.
+
+    Attributes:
+        models (List[QueryableModel]): The indexed models.
+        vectors (Dict[QueryableModel, Dict[str, float]]): The normalized TF-IDF vector of each model.
+        adjacency (Dict[QueryableModel, List[QueryableModel]]): The models each model can be joined with.
+    """
+
+    def __init__(self, models: List[QueryableModel]):
+        self.models = models
+        self.vectors: Dict[QueryableModel, Dict[str, float]] = {}
+        self.adjacency: Dict[QueryableModel, List[QueryableModel]] = {model: [] for model in models}
+
+        counts = {model: Counter(get_model_terms(model)) for model in models}
+        document_frequency = Counter(term for terms in counts.values() for term in terms)
+
+        for model, terms in counts.items():
+            vector = {
+                term: (1 + math.log(count)) * (math.log((1 + len(models)) / (1 + document_frequency[term])) + 1)
+                for term, count in terms.items()
+            }
+            norm = math.sqrt(sum(weight**2 for weight in vector.values()))
+            self.vectors[model] = {term: weight / norm for term, weight in vector.items()}
+
+        for model in models:
+            for field in model._meta.get_fields():
+                related_model = field.related_model if field.is_relation else None
+                if related_model in self.adjacency and related_model is not model:
+                    if related_model not in self.adjacency[model]:
+                        self.adjacency[model].append(related_model)
+                    if model not in self.adjacency[related_model]:
+                        self.adjacency[related_model].append(model)
+
+    def score(self, question: str) -> Dict[QueryableModel, float]:
+        """
+        Scores the relevance of each model to a question.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            Dict[QueryableModel, float]: The relevance score of each model.
+        """
+        terms = set(tokenize(question))
+        return {model: sum(vector.get(term, 0) for term in terms) for model, vector in self.vectors.items()}
+
+    def select(
+        self, question: str, top_k: int, max_tables: Optional[int] = None, partner_min_score: float = 0
+    ) -> List[QueryableModel]:
+        """
+        Selects the models most relevant to a question and the models they can be joined with.
+
+        Args:
+            question (str): The question.
+            top_k (int): The number of most relevant models to select.
+            max_tables (Optional[int]): The maximum number of models to select, including the join partners.
+            partner_min_score (float): The minimum score, relative to the best one, of the models whose join
+                partners are selected.
+
+        Returns:
+            List[QueryableModel]: The selected models, or all the models if none is relevant to the question.
+        """
+        scores = self.score(question)
+        ranked = sorted((model for model in self.models if scores[model] > 0), key=lambda model: -scores[model])
+
+        if not ranked:
+            return list(self.models)
+
+        selected = ranked[:top_k]
+        partners: Set[QueryableModel] = set()
+        for model in selected:
+            if scores[model] >= scores[ranked[0]] * partner_min_score:
+                partners.update(partner for partner in self.adjacency[model] if partner not in selected)
+
+        selected.extend(sorted(partners, key=lambda model: (-scores[model], self.models.index(model))))
+
+        return selected[:max_tables] if max_tables else selected
+
+
+@lru_cache(maxsize=None)
+def get_schema_index() -> SchemaIndex:
+    """
+    Returns the schema index of the queryable models, built once per process.
+
+    Returns:
+        SchemaIndex: The schema index.
+    """
+    return SchemaIndex(QueryableModel.__subclasses__())
+
+
+def select_models(question: str) -> List[QueryableModel]:
+    """
+    Returns the queryable models relevant to a question, following the schema selection configuration.
+
+    Args:
+        question (str): The question.
+
+    Returns:
+        List[QueryableModel]: The relevant models.
+    """
+    config = get_schema_selection_config()
+    index = get_schema_index()
+
+    if not config["enabled"]:
+        return list(index.models)
+
+    return index.select(question, config["top_k"], config["max_tables"], config["partner_min_score"])
@@ -0,0 +1,242 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils.html import escape
+
+DEFAULT_TABLE_CONFIG = {
+    "format": "auto",
+    "json_min_rows": 100,
+    "float_precision": 6,
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif", ".svg", ".webp", ".ico")
+
+URL_PATTERN = r"https?://[^\s<>\"']+$"
+
+JSON_SCRIPT_ESCAPES = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
+
+
+def get_table_config() -> Dict[str, Any]:
+    """
+    Returns the result table configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The result table configuration.
+    """
+    return DEFAULT_TABLE_CONFIG | getattr(settings, "PANDASAI_TABLES", {})
+
+
+def decategorize(series: pd.Series) -> pd.Series:
+    """
+    Returns the values of a categorical column as a plain column, so it is displayed like its categories.
+
+    Args:
+        series (pd.Series): The column.
+
+    Returns:
+        pd.Series: The column, with the dtype of its categories if it is categorical.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+
+    return pd.Series(np.asarray(series), index=series.index, name=series.name)
+
+
+def get_column_type(series: pd.Series) -> str:
+    """
+    Returns the display type of a DataFrame column.
+
+    Args:
+        series (pd.Series): The column.
+
+    Returns:
+        str: One of "boolean", "integer", "number", "datetime", "date", "url" or "text".
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred == "date":
+        return "date"
+    if inferred == "datetime":
+        return "datetime"
+    if inferred == "string" and series.dropna().str.match(URL_PATTERN).all() and series.notna().any():
+        return "url"
+
+    return "text"
+
+
+def format_datetimes(series: pd.Series) -> pd.Series:
+    """
+    Formats a date or datetime column as ISO strings, leaving out the time when every value is at midnight.
+
+    Args:
+        series (pd.Series): The column.
+
+    Returns:
+        pd.Series: The formatted column, with None for missing values.
+    """
+    values = pd.to_datetime(series, errors="coerce")
+    times = values.dropna()
+    has_time = (times != times.dt.normalize()).any()
+
+    return values.dt.strftime("%Y-%m-%dT%H:%M:%S" if has_time else "%Y-%m-%d").astype(object).where(values.notna())
+
+
+def format_column(series: pd.Series, column_type: str, precision: int) -> pd.Series:
+    """
+    Formats the values of a column as HTML table cells, at once for the whole column.
+
+    Args:
+        series (pd.Series): The column.
+        column_type (str): The display type of the column.
+        precision (int): Number of decimals of floating point numbers.
+
+    Returns:
+        pd.Series: The HTML of each cell, an empty string for missing values.
+    """
+    missing = series.isna().to_numpy()
+
+    match column_type:
+        case "integer" | "boolean":
+            values = series.astype(str)
+        case "number":
+            values = series.round(precision).astype(str).str.removesuffix(".0")
+        case "date" | "datetime":
+            values = format_datetimes(series).str.replace("T", " ", regex=False)
+        case _:
+            values = (
+                series.astype(str)
+                .str.replace("&", "&amp;", regex=False)
+                .str.replace("<", "&lt;", regex=False)
+                .str.replace(">", "&gt;", regex=False)
+                .str.replace('"', "&quot;", regex=False)
+                .str.replace("'", "&#x27;", regex=False)
+            )
+
+    if column_type == "url":
+        is_image = series.str.lower().str.endswith(IMAGE_EXTENSIONS).to_numpy(dtype=bool, na_value=False)
+        values = pd.Series(
+            np.where(
+                is_image,
+                '<img class="image" src="' + values + '">',
+                '<a class="link" href="' + values + '">' + values + "</a>",
+            ),
+            index=series.index,
+        )
+
+    return values.where(~missing, "")
+
+
+def render_html_table(df: pd.DataFrame) -> str:
+    """
+    Renders a DataFrame as a lean HTML table, formatting each column at once instead of each cell.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        str: The HTML table.
+    """
+    precision = get_table_config()["float_precision"]
+    header = "".join(f"<th>{escape(column)}</th>" for column in df.columns)
+
+    rows = pd.Series("<tr>", index=df.index, dtype=object)
+    for _, series in df.items():
+        series = decategorize(series)
+        rows = rows + "<td>" + format_column(series, get_column_type(series), precision) + "</td>"
+
+    body = "</tr>".join(rows) + "</tr>" if len(rows) else ""
+
+    return f'<table class="dataframe"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def get_json_column(series: pd.Series, column_type: str, precision: int) -> List[Any]:
+    """
+    Returns the values of a column for the columnar JSON payload.
+
+    Args:
+        series (pd.Series): The column.
+        column_type (str): The display type of the column.
+        precision (int): Number of decimals of floating point numbers.
+
+    Returns:
+        List[Any]: The JSON values, None for missing values.
+    """
+    match column_type:
+        case "number":
+            # JSON has no infinity
+            series = series.round(precision).replace([np.inf, -np.inf], np.nan)
+        case "date" | "datetime":
+            series = format_datetimes(series)
+        case "text":
+            series = series.astype(str).where(series.notna())
+
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def get_json_table(df: pd.DataFrame) -> Dict[str, List]:
+    """
+    Returns a DataFrame as a compact columnar payload rendered by the browser.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        Dict[str, List]: The column names, their display types and their values, one list per column.
+    """
+    precision = get_table_config()["float_precision"]
+    columns: List[Tuple[str, str, List[Any]]] = []
+
+    for name, series in df.items():
+        series = decategorize(series)
+        column_type = get_column_type(series)
+        columns.append((str(name), column_type, get_json_column(series, column_type, precision)))
+
+    return {
+        "columns": [name for name, _, _ in columns],
+        "types": [column_type for _, column_type, _ in columns],
+        "values": [values for _, _, values in columns],
+    }
+
+
+def render_json_table(df: pd.DataFrame) -> str:
+    """
+    Renders a DataFrame as a columnar JSON payload, drawn by the chat page as a virtually scrolled table.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        str: The HTML placeholder holding the payload.
+    """
+    payload = json.dumps(get_json_table(df), separators=(",", ":"), allow_nan=False).translate(JSON_SCRIPT_ESCAPES)
+    return f'<div class="data-table"><script type="application/json">{payload}</script></div>'
+
+
+def render_table(df: pd.DataFrame) -> str:
+    """
+    Renders a DataFrame in the format of the result table configuration: as an HTML table, or as a columnar JSON
+    payload when the format is "json", or "auto" and the DataFrame has at least `json_min_rows` rows.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        str: The rendered table.
+    """
+    config = get_table_config()
+
+    if config["format"] == "json" or (config["format"] == "auto" and len(df) >= config["json_min_rows"]):
+        return render_json_table(df)
+
+    return render_html_table(df)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class ChatConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "chats"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cache import check_shared_caches
+
+        checks.register(check_shared_caches)
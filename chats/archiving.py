@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedChat, Chat, Message
+
+DEFAULT_ARCHIVING_CONFIG = {
+    "retention_days": 90,
+    "batch_size": 100,
+}
+
+
+def get_archiving_config() -> Dict[str, Any]:
+    """
+    Returns the chat archiving configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The chat archiving configuration.
+    """
+    return DEFAULT_ARCHIVING_CONFIG | getattr(settings, "PANDASAI_ARCHIVING", {})
+
+
+def get_archiving_cutoff(retention_days: Optional[int] = None) -> datetime:
+    """
+    Returns the date before which idle chats are archived.
+
+    Args:
+        retention_days (Optional[int]): Number of days a chat is kept after its last message, defaults to the
+            archiving configuration.
+
+    Returns:
+        datetime: The archiving cutoff.
+    """
+    days = get_archiving_config()["retention_days"] if retention_days is None else retention_days
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_chat(chat_id: int, cutoff: datetime, batch_size: int) -> Optional[ArchivedChat]:
+    """
+    Moves an idle chat and its messages to cold storage.
+
+    The messages are copied to the archived chat in a short transaction locking the chat, then deleted in batches,
+    each in its own transaction, so the messages table is never locked for long. Messages sent while the chat is
+    archived are kept in the chat, and an interrupted archiving resumes where it stopped.
+
+    Args:
+        chat_id (int): Identifier of the chat.
+        cutoff (datetime): Date of the last message before which the chat is archived.
+        batch_size (int): Number of messages deleted per transaction.
+
+    Returns:
+        Optional[ArchivedChat]: The archived chat, or None if the chat is no longer idle.
+    """
+    with transaction.atomic():
+        chat = Chat.objects.select_for_update().filter(pk=chat_id, updated_at__lt=cutoff).first()
+        if chat is None:
+            return None
+
+        archive = ArchivedChat.objects.select_for_update().filter(original_id=chat.pk).first()
+        archive = archive or ArchivedChat(original_id=chat.pk, user_id=chat.user_id, created_at=chat.created_at)
+
+        messages = json.loads(archive.messages) if archive.messages else []
+        last_id = max((message["id"] for message in messages), default=0)
+        messages += (
+            chat.messages.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values("id", "sender", "content", "sample_fraction", "created_at")
+        )
+
+        archive.set_messages(messages)
+        archive.updated_at = chat.updated_at
+        archive.save()
+
+    last_id = max((message["id"] for message in messages), default=0)
+    while ids := list(
+        Message.objects.filter(chat_id=chat_id, pk__lte=last_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    ):
+        with transaction.atomic():
+            Message.objects.filter(pk__in=ids).delete()
+
+    Chat.objects.filter(pk=chat_id, updated_at__lt=cutoff, messages__isnull=True).delete()
+
+    return archive
+
+
+def archive_chats(cutoff: datetime, batch_size: Optional[int] = None) -> Iterator[ArchivedChat]:
+    """
+    Moves the chats idle since before a cutoff to cold storage, one chat at a time.
+
+    Args:
+        cutoff (datetime): Date of the last message before which chats are archived.
+        batch_size (Optional[int]): Number of chats fetched and messages deleted at once, defaults to the archiving
+            configuration.
+
+    Yields:
+        ArchivedChat: The archived chats.
+    """
+    batch_size = batch_size or get_archiving_config()["batch_size"]
+    last_id = 0
+
+    while chat_ids := list(
+        Chat.objects.filter(pk__gt=last_id, updated_at__lt=cutoff)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    ):
+        for chat_id in chat_ids:
+            archive = archive_chat(chat_id, cutoff, batch_size)
+            if archive is not None:
+                yield archive
+
+        last_id = chat_ids[-1]
@@ -0,0 +1,55 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+from django.conf import settings
+
+from .models import Message
+from .throttling import get_concurrency_config
+
+DEFAULT_BATCH_CONFIG = {
+    "workers": 4,
+    "max_questions": 50,
+    "max_request_questions": 10,
+}
+
+
+class BatchAnswer(NamedTuple):
+    """
+    An answer of a batch of questions, with the time the agent took to answer it.
+    """
+
+    question: Message
+    answer: Message
+    duration: float
+
+
+def get_batch_config() -> Dict[str, Any]:
+    """
+    Returns the question batch configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The question batch configuration.
+    """
+    return DEFAULT_BATCH_CONFIG | getattr(settings, "PANDASAI_BATCH", {})
+
+
+def get_batch_workers(count: int, workers: Optional[int] = None) -> int:
+    """
+    Returns the number of threads answering a batch of questions.
+
+    The threads are bounded by the per user concurrency limit, so the runs of a batch wait for each other instead of
+    being queued, and rejected, by the admission control.
+
+    Args:
+        count (int): Number of questions of the batch.
+        workers (Optional[int]): Maximum number of threads, defaults to the batch configuration.
+
+    Returns:
+        int: The number of threads.
+    """
+    workers = workers or get_batch_config()["workers"]
+
+    concurrency_config = get_concurrency_config()
+    if concurrency_config["enabled"]:
+        workers = min(workers, concurrency_config["user_limit"])
+
+    return max(1, min(workers, count))
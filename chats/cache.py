@@ -0,0 +1,75 @@
+from typing import List
+
+from django.core import checks
+from django.core.cache import BaseCache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+class LeaseCache(DatabaseCache):
+    """
+    A database cache that never culls live entries.
+
+    Concurrency slots, single-flight locks and metric counters must stay in the cache until they are released or
+    expire, whereas the database cache culls a third of its entries, by key order, once it holds `MAX_ENTRIES`
+    entries. This cache only deletes the expired entries instead, and keeps growing past `MAX_ENTRIES` otherwise.
+    """
+
+    def _cull(self, db, cursor, now, num):
+        connection = connections[db]
+        cursor.execute(
+            "DELETE FROM %s WHERE %s < %%s"
+            % (connection.ops.quote_name(self._table), connection.ops.quote_name("expires")),
+            [connection.ops.adapt_datetimefield_value(now)],
+        )
+
+
+def get_shared_cache(alias: str) -> BaseCache:
+    """
+    Returns a cache shared between worker processes.
+
+    Args:
+        alias (str): The cache alias.
+
+    Raises:
+        ImproperlyConfigured: If the cache is local to each process, since limits and locks kept in it would not hold
+            across processes.
+
+    Returns:
+        BaseCache: The cache.
+    """
+    cache = caches[alias]
+    if isinstance(cache, PROCESS_LOCAL_CACHES):
+        raise ImproperlyConfigured(f"The {alias!r} cache is local to each process, use a shared cache backend.")
+    return cache
+
+
+def check_shared_caches(app_configs=None, **kwargs) -> List[checks.CheckMessage]:
+    """
+    Checks that the caches of the concurrency limits and of the single-flight runs are shared between processes.
+
+    Returns:
+        List[checks.CheckMessage]: The errors.
+    """
+    from .singleflight import get_single_flight_config
+    from .throttling import get_concurrency_config
+
+    errors = []
+    for setting, config in [
+        ("PANDASAI_CONCURRENCY", get_concurrency_config()),
+        ("PANDASAI_SINGLE_FLIGHT", get_single_flight_config()),
+    ]:
+        if not config["enabled"]:
+            continue
+
+        try:
+            get_shared_cache(config["cache"])
+        except Exception as e:
+            errors.append(checks.Error(str(e), hint=f"Set the cache of {setting} to a shared cache.", id="chats.E001"))
+
+    return errors
@@ -0,0 +1,159 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_EXPORT_CONFIG = {
+    "enabled": False,
+    "path": "results",
+    "batch_size": 10000,
+}
+
+
+def get_export_config() -> Dict[str, Any]:
+    """
+    Returns the result export configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The result export configuration.
+    """
+    return DEFAULT_EXPORT_CONFIG | getattr(settings, "PANDASAI_EXPORTS", {})
+
+
+def is_export_enabled() -> bool:
+    """
+    Returns whether the DataFrame results of the agent are stored when answering, to be exported without re-running
+    their question.
+
+    Returns:
+        bool: True if the results are stored.
+    """
+    return bool(get_export_config()["enabled"])
+
+
+def import_pyarrow() -> Any:
+    """
+    Imports PyArrow, the optional dependency storing and streaming the exported results.
+
+    Raises:
+        ImproperlyConfigured: If PyArrow is not installed.
+
+    Returns:
+        Any: The pyarrow module, with its csv and parquet modules imported.
+    """
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImproperlyConfigured(
+            "Exporting results requires PyArrow, install it with `poetry install --extras arrow`."
+        ) from e
+
+    return pyarrow
+
+
+@lru_cache(maxsize=None)
+def is_export_available() -> bool:
+    """
+    Returns whether results can be exported, that is whether a PyArrow compatible with the installed NumPy is
+    installed.
+
+    Returns:
+        bool: True if results can be exported.
+    """
+    try:
+        import_pyarrow()
+    except ImproperlyConfigured:
+        return False
+
+    return True
+
+
+def get_result_path(message_id: int) -> Path:
+    """
+    Returns the path of the stored result of an agent message, relative to the project base directory unless absolute.
+
+    Args:
+        message_id (int): Identifier of the agent message.
+
+    Returns:
+        Path: The Parquet file of the result.
+    """
+    return Path(settings.BASE_DIR) / get_export_config()["path"] / f"{message_id}.parquet"
+
+
+def is_result_stored(message_id: int) -> bool:
+    """
+    Returns whether the result of an agent message is stored.
+
+    Args:
+        message_id (int): Identifier of the agent message.
+
+    Returns:
+        bool: True if the result is stored.
+    """
+    return get_result_path(message_id).exists()
+
+
+def save_result(df: "pd.DataFrame", message_id: int) -> Path:
+    """
+    Stores the DataFrame result of an agent message as a Parquet file, in row groups of the export batch size.
+
+    Args:
+        df (pd.DataFrame): The result.
+        message_id (int): Identifier of the agent message.
+
+    Returns:
+        Path: The Parquet file of the result.
+    """
+    pa = import_pyarrow()
+    path = get_result_path(message_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pa.parquet.write_table(table, f"{path}.tmp", row_group_size=get_export_config()["batch_size"])
+    os.replace(f"{path}.tmp", path)
+
+    return path
+
+
+def delete_result(message_id: int):
+    """
+    Deletes the stored result of an agent message, if any.
+
+    Args:
+        message_id (int): Identifier of the agent message.
+    """
+    get_result_path(message_id).unlink(missing_ok=True)
+
+
+def iter_csv(path: Path, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Streams a stored result as CSV, reading and converting one batch of rows at a time.
+
+    Args:
+        path (Path): The Parquet file of the result.
+        batch_size (Optional[int]): Number of rows per batch, defaults to the export configuration.
+
+    Yields:
+        bytes: The CSV header, then the CSV rows of each batch.
+    """
+    pa = import_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+
+    def write(data, include_header: bool) -> bytes:
+        sink = pa.BufferOutputStream()
+        pa.csv.write_csv(data, sink, write_options=pa.csv.WriteOptions(include_header=include_header))
+        return sink.getvalue().to_pybytes()
+
+    yield write(parquet_file.schema_arrow.empty_table(), include_header=True)
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size or get_export_config()["batch_size"]):
+        yield write(batch, include_header=False)
@@ -0,0 +1,106 @@
+import zlib
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import models
+
+DEFAULT_COMPRESSION_CONFIG = {
+    "threshold": 1024,
+    "level": 6,
+}
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+
+
+def get_compression_config() -> Dict[str, Any]:
+    """
+    Returns the message compression configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The message compression configuration.
+    """
+    return DEFAULT_COMPRESSION_CONFIG | getattr(settings, "PANDASAI_COMPRESSION", {})
+
+
+def compress_text(value: str, threshold: Optional[int] = None) -> bytes:
+    """
+    Encodes a text, compressed with zlib if it is at least as long as the threshold and compression makes it shorter.
+
+    Args:
+        value (str): The text.
+        threshold (Optional[int]): Minimum size of a compressed text, in bytes, defaults to the compression configuration.
+
+    Returns:
+        bytes: A header byte telling whether the text is compressed, followed by the encoded text.
+    """
+    config = get_compression_config()
+    data = value.encode()
+
+    if len(data) >= (config["threshold"] if threshold is None else threshold):
+        compressed = zlib.compress(data, config["level"])
+        if len(compressed) < len(data):
+            return ZLIB + compressed
+
+    return RAW + data
+
+
+def decompress_text(value: Any) -> str:
+    """
+    Decodes a text encoded by `compress_text`.
+
+    Args:
+        value (Any): The encoded text, as bytes or memoryview. Text stored before compression is returned as is.
+
+    Returns:
+        str: The text.
+    """
+    if isinstance(value, str):
+        return value
+
+    value = bytes(value)
+    header, data = value[:1], value[1:]
+
+    return (zlib.decompress(data) if header == ZLIB else data).decode()
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    Text field stored in a binary column, compressed with zlib when it is long enough.
+
+    The field reads and writes str values, so the compression is transparent to the code using the model. Texts
+    cannot be looked up by their content.
+
+    Attributes:
+        threshold (Optional[int]): Minimum size of a compressed text, in bytes, defaults to the compression
+            configuration.
+    """
+
+    description = "Compressed text"
+
+    def __init__(self, *args, threshold: Optional[int] = None, **kwargs):
+        self.threshold = threshold
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold is not None:
+            kwargs["threshold"] = self.threshold
+        return name, path, args, kwargs
+
+    def get_default(self):
+        default = super().get_default()
+        return "" if default == b"" else default
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decompress_text(value)
+
+    def to_python(self, value):
+        return None if value is None else decompress_text(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return compress_text(value, self.threshold) if isinstance(value, str) else value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from chats.archiving import archive_chats, get_archiving_config, get_archiving_cutoff
+from chats.models import Chat
+
+
+class Command(BaseCommand):
+    help = "Moves the chats idle past the retention window to cold storage, with their messages compressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Number of days a chat is kept after its last message.")
+        parser.add_argument("--batch-size", type=int, help="Number of chats fetched and messages deleted at once.")
+        parser.add_argument("--dry-run", action="store_true", help="Count the idle chats without archiving them.")
+
+    def handle(self, *args, **options):
+        config = get_archiving_config()
+        days = config["retention_days"] if options["days"] is None else options["days"]
+        cutoff = get_archiving_cutoff(days)
+
+        if options["dry_run"]:
+            count = Chat.objects.filter(updated_at__lt=cutoff).count()
+            self.stdout.write(self.style.SUCCESS(f"{count} chats idle for more than {days} days"))
+            return
+
+        chats = messages = 0
+        for archive in archive_chats(cutoff, options["batch_size"] or config["batch_size"]):
+            chats += 1
+            messages += archive.message_count
+            self.stdout.write(f"Archived chat {archive.original_id} with {archive.message_count} messages")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {chats} chats with {messages} messages"))
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chats.batch import get_batch_config
+from chats.models import Chat
+from chats.services import ChatService
+
+
+class Command(BaseCommand):
+    help = "Answers a batch of questions concurrently in a chat and reports the time taken by each answer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("chat", type=int, help="Identifier of the chat.")
+        parser.add_argument("questions", nargs="*", help="The questions.")
+        parser.add_argument("--file", help="File with one question per line, or - to read them from stdin.")
+        parser.add_argument("--sampled", action="store_true", help="Answer from the sampled tables.")
+        parser.add_argument("--workers", type=int, help="Maximum number of questions answered at once.")
+
+    def handle(self, *args, **options):
+        try:
+            chat = Chat.objects.get(pk=options["chat"])
+        except Chat.DoesNotExist:
+            raise CommandError(f"Chat {options['chat']} does not exist")
+
+        contents = list(options["questions"])
+        if options["file"] == "-":
+            contents += sys.stdin.read().splitlines()
+        elif options["file"]:
+            with open(options["file"]) as file:
+                contents += file.read().splitlines()
+
+        contents = [content.strip() for content in contents if content.strip()]
+        max_questions = get_batch_config()["max_questions"]
+
+        if not contents:
+            raise CommandError("No questions to answer")
+        if len(contents) > max_questions:
+            raise CommandError(f"At most {max_questions} questions are answered at once")
+
+        start = time.perf_counter()
+        answers = ChatService(chat).send_messages(contents, sampled=options["sampled"], workers=options["workers"])
+
+        for answer in answers:
+            self.stdout.write(f"{answer.duration:8.2f}s  {answer.question.content}")
+
+        elapsed = time.perf_counter() - start
+        total = sum(answer.duration for answer in answers)
+        self.stdout.write(
+            self.style.SUCCESS(f"Answered {len(answers)} questions in {elapsed:.2f}s, {total:.2f}s of agent time")
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from chats.agent.connectors import get_queryable_models
+from chats.agent.joins import create_join_views, drop_join_views
+
+
+class Command(BaseCommand):
+    help = "Creates the database views joining the queryable models through their many-to-many fields."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drop", action="store_true", help="Drop the join views instead of creating them.")
+
+    def handle(self, *args, **options):
+        if options["drop"]:
+            views = drop_join_views()
+            self.stdout.write(self.style.SUCCESS(f"Dropped {len(views)} join views"))
+            return
+
+        views = create_join_views(get_queryable_models())
+
+        for view in views:
+            self.stdout.write(f"Created {view}")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {len(views)} join views"))
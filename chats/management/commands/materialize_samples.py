@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from chats.agent.connectors import get_queryable_models
+from chats.agent.sampling import get_sampling_config, materialize_samples
+
+
+class Command(BaseCommand):
+    help = "Materializes the deterministic row samples used by the agent sampled execution mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fraction", type=float, help="Fraction of rows to sample from each table.")
+        parser.add_argument("--seed", type=int, help="Seed of the sampling random generator.")
+
+    def handle(self, *args, **options):
+        config = get_sampling_config()
+
+        for key in ["fraction", "seed"]:
+            if options[key] is not None:
+                config[key] = options[key]
+
+        samples = materialize_samples(get_queryable_models(), config)
+
+        for table, sample_table in samples.items():
+            self.stdout.write(f"Sampled {table} into {sample_table}")
+
+        self.stdout.write(self.style.SUCCESS(f"Materialized {len(samples)} sample tables"))
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chats.models import QueryLog
+from chats.querylog import get_hot_queries, get_index_migrations, get_query_log_config, suggest_indexes
+
+
+class Command(BaseCommand):
+    help = "Aggregates the logged agent SQL by fingerprint and suggests indexes for its filters and sorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Number of days of logged statements to analyze.")
+        parser.add_argument("--top", type=int, default=20, help="Number of hot fingerprints to analyze.")
+        parser.add_argument(
+            "--min-executions", type=int, default=2, help="Minimum number of executions of an analyzed fingerprint."
+        )
+        parser.add_argument("--write", action="store_true", help="Write the suggested index migrations.")
+        parser.add_argument("--prune", action="store_true", help="Delete the statements logged before the window.")
+
+    def handle(self, *args, **options):
+        days = get_query_log_config()["retention_days"] if options["days"] is None else options["days"]
+        since = timezone.now() - timedelta(days=days)
+
+        if options["prune"]:
+            deleted, _ = QueryLog.objects.filter(created_at__lt=since).delete()
+            self.stdout.write(f"Deleted {deleted} statements logged more than {days} days ago")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Hot statements of the last {days} days:"))
+        for query in get_hot_queries(since, options["top"]):
+            full_scans = ", ".join((query["plan"] or {}).get("full_scans", {})) or "-"
+            self.stdout.write(
+                f"  {query['fingerprint'][:12]}  {query['executions']:6d} runs  {query['total_duration']:8.2f}s total  "
+                f"{query['average_duration'] * 1000:8.1f}ms avg  {query['max_rows'] or 0:7d} rows  full scans: {full_scans}"
+            )
+            self.stdout.write(f"    {query['normalized']}")
+
+        suggestions = suggest_indexes(since, options["top"], options["min_executions"])
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS("No index to suggest"))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Suggested indexes:"))
+        for suggestion in suggestions:
+            index = suggestion.get_index()
+            self.stdout.write(
+                f"  {suggestion.model._meta.label}: {', '.join(suggestion.fields)}  "
+                f"({suggestion.executions} runs, {suggestion.duration:.2f}s, {suggestion.full_scans} full scans)"
+            )
+            self.stdout.write(f'    models.Index(fields={suggestion.fields!r}, name="{index.name}"),')
+
+        for writer in get_index_migrations(suggestions):
+            if options["write"]:
+                with open(writer.path, "w") as file:
+                    file.write(writer.as_string())
+                self.stdout.write(f"Wrote {writer.path}")
+            else:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{writer.path}:"))
+                self.stdout.write(writer.as_string())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Suggested {len(suggestions)} indexes, add them to the Meta.indexes of their models with the migrations"
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from pandasai.helpers.dataframe_serializer import DataframeSerializerType
+
+from chats.agent.connectors import LimitedSQLConnectorMixin, get_connectors
+from chats.agent.prompt import estimate_tokens
+
+
+class Command(BaseCommand):
+    help = "Compares the estimated prompt tokens of the compact table schemas with the PandasAI serialization."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--question", help="Only include the tables selected for this question.")
+
+    def handle(self, *args, **options):
+        total_default = total_compact = 0
+
+        for connector in get_connectors(question=options["question"]):
+            default = super(LimitedSQLConnectorMixin, connector).to_string(0, True, DataframeSerializerType.CSV)
+            compact = connector.to_string(0, True, DataframeSerializerType.CSV)
+
+            total_default += estimate_tokens(default)
+            total_compact += estimate_tokens(compact)
+            self.stdout.write(f"{connector.config.table}: {estimate_tokens(default)} -> {estimate_tokens(compact)}")
+
+        change = (total_compact - total_default) / total_default if total_default else 0
+        self.stdout.write(self.style.SUCCESS(f"Estimated tokens: {total_default} -> {total_compact} ({change:+.0%})"))
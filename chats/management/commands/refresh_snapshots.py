@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from chats.agent.columnar import refresh_snapshots
+from chats.agent.connectors import get_queryable_models
+
+
+class Command(BaseCommand):
+    help = "Refreshes the Parquet snapshots of the queryable tables read by the agent columnar engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild the snapshots from all the rows.")
+
+    def handle(self, *args, **options):
+        counts = refresh_snapshots(get_queryable_models(), full=options["full"])
+
+        for table, count in counts.items():
+            self.stdout.write(f"Read {count} rows of {table}")
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(counts)} snapshots"))
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+SCENARIOS = {
+    "web": "",
+    "agent": "from chats.agent import preload; preload()",
+}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+{scenario}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "pandasai": "pandasai" in sys.modules,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measures the startup time and memory of a web worker, with and without the agent stack preloaded."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Number of fresh processes measured per scenario.")
+
+    def handle(self, *args, **options):
+        for name, scenario in SCENARIOS.items():
+            runs = [
+                json.loads(subprocess.check_output([sys.executable, "-c", PROBE.format(scenario=scenario)], text=True))
+                for _ in range(options["runs"])
+            ]
+            seconds = min(run["seconds"] for run in runs)
+            rss = max(run["rss"] for run in runs) / 1024
+
+            self.stdout.write(
+                f"{name}: {seconds:.2f}s, {rss:.0f} MB max RSS, PandasAI {'loaded' if runs[0]['pandasai'] else 'not loaded'}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Measured startup"))
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.15 on 2026-10-19 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0002_message_sample_fraction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Profile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("duration", models.FloatField()),
+                (
+                    "stats",
+                    models.BinaryField(help_text="Compressed cProfile statistics."),
+                ),
+                (
+                    "stacks",
+                    models.JSONField(default=dict, help_text="Number of samples of each call stack."),
+                ),
+                (
+                    "queries",
+                    models.JSONField(default=list, help_text="SQL queries with their durations."),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "message",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="profile",
+                        to="chats.message",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "profile",
+                "verbose_name_plural": "profiles",
+            },
+        ),
+    ]
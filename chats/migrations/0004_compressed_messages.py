@@ -0,0 +1,118 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+import chats.fields
+
+BATCH_SIZE = 500
+
+
+def copy_content(apps, schema_editor, source, target):
+    # The migration is not atomic, each batch is copied in its own short transaction instead of holding the
+    # messages table locked until every message is copied
+    Message = apps.get_model("chats", "Message")
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+
+    while True:
+        with transaction.atomic(using=db_alias):
+            batch = list(
+                Message.objects.using(db_alias).filter(pk__gt=last_pk).only("pk", source).order_by("pk")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+
+            for message in batch:
+                setattr(message, target, getattr(message, source))
+            Message.objects.using(db_alias).bulk_update(batch, [target], batch_size=BATCH_SIZE)
+            last_pk = batch[-1].pk
+
+
+def compress_content(apps, schema_editor):
+    copy_content(apps, schema_editor, "content", "compressed_content")
+
+
+def decompress_content(apps, schema_editor):
+    copy_content(apps, schema_editor, "compressed_content", "content")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("chats", "0003_profile"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="compressed_content",
+            field=chats.fields.CompressedTextField(editable=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="content",
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        migrations.RemoveField(
+            model_name="message",
+            name="content",
+        ),
+        migrations.RenameField(
+            model_name="message",
+            old_name="compressed_content",
+            new_name="content",
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="content",
+            field=chats.fields.CompressedTextField(editable=True),
+        ),
+        migrations.CreateModel(
+            name="ArchivedChat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "original_id",
+                    models.BigIntegerField(
+                        help_text="Identifier of the chat before it was archived.",
+                        unique=True,
+                    ),
+                ),
+                (
+                    "messages",
+                    chats.fields.CompressedTextField(
+                        help_text="Compressed JSON of the chat messages.",
+                        threshold=0,
+                    ),
+                ),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_chats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "archived chat",
+                "verbose_name_plural": "archived chats",
+            },
+        ),
+    ]
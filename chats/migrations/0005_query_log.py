@@ -0,0 +1,63 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0004_compressed_messages"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueryLog",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        help_text="Hash of the normalized statement.", max_length=64
+                    ),
+                ),
+                (
+                    "normalized",
+                    models.TextField(
+                        help_text="Statement with its literals replaced by placeholders."
+                    ),
+                ),
+                ("sql", models.TextField()),
+                ("dialect", models.CharField(max_length=20)),
+                ("duration", models.FloatField()),
+                ("rows", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "plan",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Estimates of the execution plan.",
+                        null=True,
+                    ),
+                ),
+                ("error", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "query log",
+                "verbose_name_plural": "query logs",
+                "indexes": [
+                    models.Index(
+                        fields=["created_at", "fingerprint"],
+                        name="querylog_created_fingerprint",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0005_query_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SampleTable",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "table",
+                    models.CharField(
+                        help_text="Name of the sample table.",
+                        max_length=255,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "fraction",
+                    models.FloatField(
+                        help_text="Fraction of the rows of the full table in the sample."
+                    ),
+                ),
+                ("seed", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "sample table",
+                "verbose_name_plural": "sample tables",
+            },
+        ),
+    ]
@@ -1,10 +1,15 @@
-from typing import Dict
+import json
+from typing import Dict, List
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils.dateparse import parse_datetime
 from django.utils.translation import gettext_lazy as _
 
+from .fields import CompressedTextField
+
 
 class QueryableModel(models.Model):
     """
@@ -13,10 +18,12 @@ class QueryableModel(models.Model):
     Attributes:
         description (str): A description of the model.
         field_descriptions (Dict[str, str]): A dictionary of field descriptions
+        sample_stratify_by (str): Name of the field used to stratify the sampled execution mode.
     """
 
     description: str = None
     field_descriptions: Dict[str, str] = None
+    sample_stratify_by: str = None
 
     class Meta:
         abstract = True
@@ -52,11 +59,22 @@ class Message(models.Model):
 
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="messages")
     sender = models.CharField(max_length=5, choices=Sender)
-    content = models.TextField()
+    content = CompressedTextField(editable=True)
+    sample_fraction = models.FloatField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @property
+    def is_approximate(self) -> bool:
+        return self.sample_fraction is not None
+
+    @property
+    def has_table(self) -> bool:
+        return self.sender == self.Sender.AGENT and (
+            'class="dataframe"' in self.content or 'class="data-table"' in self.content
+        )
+
     def save(self, *args, **kwargs):
         self.chat.updated_at = self.updated_at
         self.chat.save(update_fields=["updated_at"])
@@ -65,3 +83,118 @@ class Message(models.Model):
     class Meta:
         verbose_name = _("message")
         verbose_name_plural = _("messages")
+
+
+class Profile(models.Model):
+    """
+    Model to store the profile of the agent run that produced a message.
+    """
+
+    message = models.OneToOneField(Message, on_delete=models.CASCADE, related_name="profile")
+    duration = models.FloatField()
+    stats = models.BinaryField(help_text=_("Compressed cProfile statistics."))
+    stacks = models.JSONField(default=dict, help_text=_("Number of samples of each call stack."))
+    queries = models.JSONField(default=list, help_text=_("SQL queries with their durations."))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Profile of message {self.message_id}"
+
+    class Meta:
+        verbose_name = _("profile")
+        verbose_name_plural = _("profiles")
+
+
+class ArchivedChat(models.Model):
+    """
+    Model to store chats moved to cold storage, with their messages compressed in a single JSON document.
+    """
+
+    original_id = models.BigIntegerField(unique=True, help_text=_("Identifier of the chat before it was archived."))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_chats")
+    messages = CompressedTextField(threshold=0, help_text=_("Compressed JSON of the chat messages."))
+    message_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived chat {self.original_id}"
+
+    def get_messages(self) -> List[Message]:
+        """
+        Returns the archived messages as unsaved Message instances, ordered by creation.
+
+        Returns:
+            List[Message]: The archived messages.
+        """
+        return [
+            Message(
+                id=message["id"],
+                sender=message["sender"],
+                content=message["content"],
+                sample_fraction=message["sample_fraction"],
+                created_at=parse_datetime(message["created_at"]),
+            )
+            for message in json.loads(self.messages or "[]")
+        ]
+
+    def set_messages(self, messages: List[Dict]):
+        """
+        Stores the archived messages.
+
+        Args:
+            messages (List[Dict]): The messages, with their id, sender, content, sample fraction and creation date.
+        """
+        self.messages = json.dumps(messages, cls=DjangoJSONEncoder)
+        self.message_count = len(messages)
+
+    class Meta:
+        verbose_name = _("archived chat")
+        verbose_name_plural = _("archived chats")
+
+
+class QueryLog(models.Model):
+    """
+    Model to store the SQL statements generated by the agent, with their duration, rows and execution plan.
+    """
+
+    fingerprint = models.CharField(max_length=64, help_text=_("Hash of the normalized statement."))
+    normalized = models.TextField(help_text=_("Statement with its literals replaced by placeholders."))
+    sql = models.TextField()
+    dialect = models.CharField(max_length=20)
+    duration = models.FloatField()
+    rows = models.PositiveIntegerField(null=True, blank=True)
+    plan = models.JSONField(null=True, blank=True, help_text=_("Estimates of the execution plan."))
+    error = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Query {self.fingerprint[:12]}"
+
+    class Meta:
+        verbose_name = _("query log")
+        verbose_name_plural = _("query logs")
+        indexes = [models.Index(fields=["created_at", "fingerprint"], name="querylog_created_fingerprint")]
+
+
+class SampleTable(models.Model):
+    """
+    Model to store the fraction of rows each sample table of the sampled execution mode was materialized with.
+    """
+
+    table = models.CharField(max_length=255, unique=True, help_text=_("Name of the sample table."))
+    fraction = models.FloatField(help_text=_("Fraction of the rows of the full table in the sample."))
+    seed = models.IntegerField()
+
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.table
+
+    class Meta:
+        verbose_name = _("sample table")
+        verbose_name_plural = _("sample tables")
@@ -0,0 +1,323 @@
+import contextvars
+import cProfile
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest
+
+from .models import Message, Profile
+
+DEFAULT_PROFILING_CONFIG = {
+    "enabled": True,
+    "header": "X-Pandasai-Profile",
+    "param": "profile",
+    "sample_rate": 0,
+    "interval": 0.005,
+    "max_depth": 64,
+    "max_queries": 500,
+    "top_functions": 40,
+}
+
+T = TypeVar("T")
+
+_queries: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "pandasai_profile_queries", default=None
+)
+_profiler: contextvars.ContextVar[Optional["Profiler"]] = contextvars.ContextVar("pandasai_profiler", default=None)
+
+
+def get_profiling_config() -> Dict[str, Any]:
+    """
+    Returns the profiling configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The profiling configuration.
+    """
+    return DEFAULT_PROFILING_CONFIG | getattr(settings, "PANDASAI_PROFILING", {})
+
+
+def should_profile(request: HttpRequest) -> bool:
+    """
+    Returns whether the agent run of a staff request is profiled.
+
+    A run is profiled when the request asks for it, through the profiling header or query parameter, or when it is
+    picked by the sample rate.
+
+    Args:
+        request (HttpRequest): The request.
+
+    Returns:
+        bool: True if the agent run is profiled.
+    """
+    config = get_profiling_config()
+
+    if not config["enabled"] or not request.user.is_staff:
+        return False
+
+    flag = request.headers.get(config["header"]) or request.GET.get(config["param"])
+    if flag and flag.lower() not in ["0", "false", "no"]:
+        return True
+
+    return random.random() < config["sample_rate"]
+
+
+def record_query(sql: str, seconds: float, rows: Optional[int] = None, database: str = "agent"):
+    """
+    Records a SQL query in the profile of the current agent run, if it is profiled.
+
+    Args:
+        sql (str): The SQL query.
+        seconds (float): The duration of the query.
+        rows (Optional[int]): The number of rows returned by the query.
+        database (str): The database the query ran on.
+    """
+    queries = _queries.get()
+
+    if queries is not None and len(queries) < get_profiling_config()["max_queries"]:
+        queries.append({"database": database, "sql": sql, "seconds": seconds, "rows": rows})
+
+
+def profile_thread(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Runs a function in a helper thread of the current agent run, e.g. an LLM request, profiling it along with the run
+    if the run is profiled. The function must run in a copy of the context of the run.
+
+    Args:
+        fn (Callable[..., T]): The function.
+        *args: The positional arguments of the function.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        T: The function result.
+    """
+    profiler = _profiler.get()
+
+    if profiler is None:
+        return fn(*args, **kwargs)
+
+    return profiler.run_thread(fn, *args, **kwargs)
+
+
+def get_frame_label(code: Any) -> str:
+    """
+    Returns the label of a function in the flame graph, e.g. "chat (base.py:250)".
+
+    Args:
+        code (Any): The code object of the function.
+
+    Returns:
+        str: The function label.
+    """
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Thread sampling the call stacks of other threads at a fixed interval.
+
+    Attributes:
+        thread_ids (Set[int]): Identifiers of the sampled threads, threads can be added and removed while sampling.
+        interval (float): Interval between samples, in seconds.
+        max_depth (int): Maximum number of frames kept per sample, from the root of the stack.
+        stacks (Counter): The number of samples of each stack, as semicolon separated frame labels.
+    """
+
+    def __init__(self, thread_id: int, interval: float, max_depth: int):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_ids: Set[int] = {thread_id}
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                labels = []
+
+                while frame is not None:
+                    labels.append(get_frame_label(frame.f_code))
+                    frame = frame.f_back
+
+                if labels:
+                    self.stacks[";".join(reversed(labels[-self.max_depth :]))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Profiler:
+    """
+    Context manager profiling an agent run: a deterministic profile of its functions, statistical samples of its
+    call stacks, and the SQL queries it runs with their durations.
+
+    The run covers the request thread and the helper threads running functions through `profile_thread`, such as the
+    LLM requests and their hedges and retries. The code execution worker processes are not profiled.
+    """
+
+    def __init__(self):
+        self.config = get_profiling_config()
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), self.config["interval"], self.config["max_depth"])
+        self.thread_profiles: List[cProfile.Profile] = []
+        self.queries: List[Dict[str, Any]] = []
+        self.duration = 0.0
+        self.exit_stack = ExitStack()
+
+    def __enter__(self) -> "Profiler":
+        self.token = _queries.set(self.queries)
+        self.profiler_token = _profiler.set(self)
+
+        for alias in connections:
+            self.exit_stack.enter_context(connections[alias].execute_wrapper(self.record_django_query(alias)))
+
+        self.start = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.start
+        self.exit_stack.close()
+        _queries.reset(self.token)
+        _profiler.reset(self.profiler_token)
+
+    def run_thread(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs a function in a helper thread of the run, with its own deterministic profile and its stack sampled.
+
+        Args:
+            fn (Callable[..., T]): The function.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            T: The function result.
+        """
+        thread_id = threading.get_ident()
+        profile = cProfile.Profile()
+
+        self.sampler.thread_ids.add(thread_id)
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.sampler.thread_ids.discard(thread_id)
+            # Profiles of threads outliving the run, e.g. abandoned hedges, are left out of a saved profile
+            self.thread_profiles.append(profile)
+
+    @staticmethod
+    def record_django_query(alias: str):
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                record_query(sql, time.perf_counter() - start, database=alias)
+
+        return wrapper
+
+    def save(self, message: Message) -> Profile:
+        """
+        Stores the profile alongside the agent message it produced.
+
+        Args:
+            message (Message): The agent message.
+
+        Returns:
+            Profile: The stored profile.
+        """
+        stats = pstats.Stats(self.profile)
+        for profile in list(self.thread_profiles):
+            stats.add(profile)
+
+        return Profile.objects.create(
+            message=message,
+            duration=self.duration,
+            stats=zlib.compress(marshal.dumps(stats.stats)),
+            stacks=dict(self.sampler.stacks),
+            queries=self.queries,
+        )
+
+
+def get_top_functions(profile: Profile, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the functions of a profile that took the most cumulative time.
+
+    Args:
+        profile (Profile): The profile.
+        limit (Optional[int]): The number of functions, defaults to the profiling configuration.
+
+    Returns:
+        List[Dict[str, Any]]: The functions, with their call counts and their total and cumulative times.
+    """
+    stats = marshal.loads(zlib.decompress(profile.stats))
+    functions = [
+        {
+            "function": f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+            "path": filename,
+            "calls": calls,
+            "total_time": total_time,
+            "cumulative_time": cumulative_time,
+        }
+        for (filename, line, name), (_, calls, total_time, cumulative_time, _) in stats.items()
+    ]
+    functions.sort(key=lambda function: -function["cumulative_time"])
+
+    return functions[: limit or get_profiling_config()["top_functions"]]
+
+
+def get_flame_graph(profile: Profile, min_width: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Lays out the sampled call stacks of a profile as an icicle flame graph, with the root at the top.
+
+    Args:
+        profile (Profile): The profile.
+        min_width (float): The minimum width of a frame, in percent of the samples, narrower frames are left out.
+
+    Returns:
+        List[Dict[str, Any]]: The frames, with their label, depth, left offset and width in percent, and samples.
+    """
+    root: Dict[str, Any] = {"samples": 0, "children": {}}
+
+    for stack, samples in profile.stacks.items():
+        root["samples"] += samples
+        node = root
+        for label in stack.split(";"):
+            node = node["children"].setdefault(label, {"samples": 0, "children": {}})
+            node["samples"] += samples
+
+    frames = []
+
+    def layout(node: Dict[str, Any], depth: int, left: float):
+        for label, child in sorted(node["children"].items()):
+            width = 100 * child["samples"] / root["samples"]
+            if width >= min_width:
+                frames.append(
+                    {"label": label, "depth": depth, "left": left, "width": width, "samples": child["samples"]}
+                )
+                layout(child, depth + 1, left)
+            left += width
+
+    if root["samples"]:
+        layout(root, 0, 0)
+
+    return frames
@@ -0,0 +1,393 @@
+import hashlib
+import logging
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+import sqlglot
+from django.conf import settings
+from django.db import connection, models
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.db.models import Avg, Count, Max, Sum
+from sqlglot import exp
+
+from .agent.joins import get_join_views
+from .models import QueryableModel, QueryLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_LOG_CONFIG = {
+    "enabled": False,
+    "sample_rate": 1.0,
+    "explain": True,
+    "retention_days": 30,
+}
+
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+EQUALITY_PREDICATES = (exp.EQ, exp.In, exp.Is)
+RANGE_PREDICATES = (exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Between, exp.Like)
+
+# Only queries the agent runs on the agent database can use its indexes
+INDEXED_DIALECTS = ("sqlite", "postgres", "mysql", "oracle")
+
+
+def get_query_log_config() -> Dict[str, Any]:
+    """
+    Returns the query log configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The query log configuration.
+    """
+    return DEFAULT_QUERY_LOG_CONFIG | getattr(settings, "PANDASAI_QUERY_LOG", {})
+
+
+def is_query_log_enabled() -> bool:
+    """
+    Returns whether the SQL statements generated by the agent are logged.
+
+    Returns:
+        bool: True if the statements are logged.
+    """
+    return bool(get_query_log_config()["enabled"])
+
+
+def normalize_sql(sql: str, dialect: str) -> str:
+    """
+    Normalizes a SQL statement, so the statements differing only by their literals share a fingerprint.
+
+    Literals are replaced by placeholders, IN lists by a single placeholder, and identifiers and keywords are
+    normalized by sqlglot. Statements sqlglot cannot tokenize, parse or generate only get their literals and
+    whitespace normalized.
+
+    Args:
+        sql (str): The SQL statement.
+        dialect (str): The SQL dialect of the statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+
+    def replace(node: exp.Expression) -> exp.Expression:
+        if isinstance(node, exp.Literal):
+            return exp.Placeholder()
+        if isinstance(node, exp.In) and node.expressions:
+            node.set("expressions", [exp.Placeholder()])
+        return node
+
+    try:
+        return sqlglot.parse_one(sql, read=dialect).transform(replace).sql(dialect=dialect, normalize=True)
+    except sqlglot.errors.SqlglotError:
+        return " ".join(LITERAL_PATTERN.sub("?", sql).split())
+
+
+def get_fingerprint(normalized: str) -> str:
+    """
+    Returns the fingerprint of a normalized SQL statement.
+
+    Args:
+        normalized (str): The normalized statement.
+
+    Returns:
+        str: The SHA-256 hex digest of the statement.
+    """
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def log_query(
+    sql: str,
+    dialect: str,
+    duration: float,
+    rows: Optional[int] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    error: str = "",
+) -> Optional[QueryLog]:
+    """
+    Logs a SQL statement run by the agent, if the query log is enabled and the statement is picked by the sample rate.
+
+    Statements rejected by the cost guard are logged with a zero duration, their plan and the rejection error. Logging
+    never raises, so it cannot fail the answer.
+
+    Args:
+        sql (str): The SQL statement, as executed or rejected.
+        dialect (str): The SQL dialect of the database that ran the statement.
+        duration (float): The duration of the statement, in seconds.
+        rows (Optional[int]): The number of rows returned by the statement, None if it failed.
+        plan (Optional[Dict[str, Any]]): The estimates of the execution plan of the statement, if explained.
+        error (str): The error raised by the statement, if any.
+
+    Returns:
+        Optional[QueryLog]: The logged statement, or None if it is not logged.
+    """
+    try:
+        config = get_query_log_config()
+
+        if not config["enabled"] or random.random() >= config["sample_rate"]:
+            return None
+
+        normalized = normalize_sql(sql, dialect)
+
+        return QueryLog.objects.create(
+            fingerprint=get_fingerprint(normalized),
+            normalized=normalized,
+            sql=sql,
+            dialect=dialect,
+            duration=duration,
+            rows=rows,
+            plan=plan,
+            error=error[:255],
+        )
+    except Exception:
+        # The query log must never fail the answer
+        logger.exception("Could not log query %r", sql)
+        return None
+
+
+def get_hot_queries(since: datetime, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Returns the logged statements that took the most time since a date, grouped by fingerprint.
+
+    Args:
+        since (datetime): Date from which the statements are aggregated.
+        limit (int): Maximum number of fingerprints.
+
+    Returns:
+        List[Dict[str, Any]]: The fingerprints, with their executions, total, average and maximum durations, maximum
+            rows, and their last statement, dialect and plan.
+    """
+    queries = list(
+        QueryLog.objects.filter(created_at__gte=since, dialect__in=INDEXED_DIALECTS)
+        .values("fingerprint")
+        .annotate(
+            executions=Count("id"),
+            total_duration=Sum("duration"),
+            average_duration=Avg("duration"),
+            max_duration=Max("duration"),
+            max_rows=Max("rows"),
+            last_id=Max("id"),
+        )
+        .order_by("-total_duration")[:limit]
+    )
+
+    last_logs = QueryLog.objects.in_bulk([query["last_id"] for query in queries])
+    for query in queries:
+        log = last_logs[query["last_id"]]
+        query.update(normalized=log.normalized, sql=log.sql, dialect=log.dialect, plan=log.plan)
+
+    return queries
+
+
+def get_table_columns() -> Dict[str, Dict[str, Tuple[Type[models.Model], str]]]:
+    """
+    Returns the model field behind each column of the queryable tables and their join views.
+
+    Returns:
+        Dict[str, Dict[str, Tuple[Type[models.Model], str]]]: The model and field name of each column of each table.
+    """
+    queryable_models = QueryableModel.__subclasses__()
+    tables = {}
+
+    for model in queryable_models:
+        tables[model._meta.db_table] = {field.column: (model, field.name) for field in model._meta.concrete_fields}
+
+    # Views cannot be indexed, their columns are indexed on the tables they join
+    for view, many_to_many in get_join_views(queryable_models).items():
+        related_model = many_to_many.related_model
+        tables[view] = tables[many_to_many.model._meta.db_table] | {
+            f"{many_to_many.name}_{field.column}": (related_model, field.name)
+            for field in related_model._meta.concrete_fields
+        }
+
+    return tables
+
+
+def get_predicate_columns(sql: str, dialect: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Returns the columns a SQL statement filters and sorts on, by table.
+
+    Only predicates comparing a single column to values are considered, join conditions are left out.
+
+    Args:
+        sql (str): The SQL statement.
+        dialect (str): The SQL dialect of the statement.
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: The "equality", "range" and "sort" columns of each table.
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read=dialect)
+    except sqlglot.errors.SqlglotError:
+        return {}
+
+    table_columns = get_table_columns()
+    result: Dict[str, Dict[str, List[str]]] = {}
+
+    for select in tree.find_all(exp.Select):
+        aliases = {table.alias_or_name: table.name for table in select.find_all(exp.Table)}
+        tables = set(aliases.values())
+
+        def add(column: exp.Column, kind: str):
+            if column.table:
+                table = aliases.get(column.table)
+            else:
+                candidates = [table for table in tables if column.name in table_columns.get(table, {})]
+                table = candidates[0] if len(candidates) == 1 else None
+
+            if table in table_columns and column.name in table_columns[table]:
+                columns = result.setdefault(table, {"equality": [], "range": [], "sort": []})[kind]
+                if column.name not in columns:
+                    columns.append(column.name)
+
+        if where := select.args.get("where"):
+            for predicate in where.find_all(*EQUALITY_PREDICATES, *RANGE_PREDICATES):
+                columns = list(predicate.find_all(exp.Column))
+                if len(columns) == 1:
+                    add(columns[0], "equality" if isinstance(predicate, EQUALITY_PREDICATES) else "range")
+
+        if order := select.args.get("order"):
+            for ordered in order.expressions:
+                if isinstance(ordered.this, exp.Column):
+                    add(ordered.this, "sort")
+
+    return result
+
+
+@dataclass
+class IndexSuggestion:
+    """
+    An index suggested for the filters and sorts of hot logged statements.
+
+    Attributes:
+        model (Type[models.Model]): The model of the indexed table.
+        fields (List[str]): Names of the indexed fields, equality filters first, then sorts, then a range filter.
+        executions (int): Number of executions of the statements the index would serve.
+        duration (float): Total duration of these statements, in seconds.
+        full_scans (int): Number of these executions whose plan scanned the whole table.
+        fingerprints (Set[str]): Fingerprints of these statements.
+    """
+
+    model: Type[models.Model]
+    fields: List[str]
+    executions: int = 0
+    duration: float = 0.0
+    full_scans: int = 0
+    fingerprints: Set[str] = field(default_factory=set)
+
+    def get_index(self) -> models.Index:
+        """
+        Returns the suggested index, named like the indexes Django names.
+
+        Returns:
+            models.Index: The index.
+        """
+        index = models.Index(fields=self.fields)
+        index.set_name_with_model(self.model)
+        return index
+
+
+def is_indexed(table: str, columns: List[str], cache: Dict[str, List[List[str]]]) -> bool:
+    """
+    Returns whether columns are the leading columns of an existing index of a table.
+
+    Args:
+        table (str): Name of the database table.
+        columns (List[str]): The columns.
+        cache (Dict[str, List[List[str]]]): Columns of the indexes of the tables already introspected.
+
+    Returns:
+        bool: True if an index starts with the columns.
+    """
+    if table not in cache:
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        cache[table] = [
+            constraint["columns"]
+            for constraint in constraints.values()
+            if constraint["index"] or constraint["primary_key"] or constraint["unique"]
+        ]
+
+    return any(index[: len(columns)] == columns for index in cache[table])
+
+
+def suggest_indexes(since: datetime, limit: int = 20, min_executions: int = 2) -> List[IndexSuggestion]:
+    """
+    Suggests indexes for the filters and sorts of the hot logged statements, on the tables their plans scan fully.
+
+    Statements logged without a plan are considered to scan every table they read. Indexes are left out when an
+    existing index starts with the same columns.
+
+    Args:
+        since (datetime): Date from which the statements are aggregated.
+        limit (int): Number of hot fingerprints to analyze.
+        min_executions (int): Minimum number of executions of a fingerprint for it to be analyzed.
+
+    Returns:
+        List[IndexSuggestion]: The suggested indexes, most time saving first.
+    """
+    table_columns = get_table_columns()
+    suggestions: Dict[Tuple[Type[models.Model], Tuple[str, ...]], IndexSuggestion] = {}
+    indexes: Dict[str, List[List[str]]] = {}
+
+    for query in get_hot_queries(since, limit):
+        if query["executions"] < min_executions:
+            continue
+
+        full_scans = None if query["plan"] is None else set(query["plan"].get("full_scans", {}))
+
+        for table, columns in get_predicate_columns(query["sql"], query["dialect"]).items():
+            candidates = columns["equality"] + columns["sort"] + columns["range"][:1]
+            targets = [table_columns[table][column] for column in dict.fromkeys(candidates)]
+            if not targets or len({model for model, _ in targets}) > 1:
+                continue
+
+            model = targets[0][0]
+            if full_scans is not None and not {table, model._meta.db_table} & full_scans:
+                continue
+
+            fields = [name for _, name in targets][:3]
+            if is_indexed(model._meta.db_table, [model._meta.get_field(name).column for name in fields], indexes):
+                continue
+
+            suggestion = suggestions.setdefault((model, tuple(fields)), IndexSuggestion(model, fields))
+            suggestion.executions += query["executions"]
+            suggestion.duration += query["total_duration"]
+            suggestion.full_scans += query["executions"] if full_scans else 0
+            suggestion.fingerprints.add(query["fingerprint"])
+
+    return sorted(suggestions.values(), key=lambda suggestion: -suggestion.duration)
+
+
+def get_index_migrations(suggestions: List[IndexSuggestion]) -> List[MigrationWriter]:
+    """
+    Returns the migrations adding the suggested indexes, one per app, following the latest migration of the app.
+
+    Args:
+        suggestions (List[IndexSuggestion]): The suggested indexes.
+
+    Returns:
+        List[MigrationWriter]: The writers of the migrations, with their path and content.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    operations: Dict[str, List[AddIndex]] = {}
+
+    for suggestion in suggestions:
+        operations.setdefault(suggestion.model._meta.app_label, []).append(
+            AddIndex(model_name=suggestion.model._meta.model_name, index=suggestion.get_index())
+        )
+
+    writers = []
+    for app_label, app_operations in operations.items():
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max((MigrationAutodetector.parse_number(name) or 0 for _, name in leaves), default=0) + 1
+
+        migration = Migration(f"{number:04d}_pandasai_indexes", app_label)
+        migration.dependencies = leaves
+        migration.operations = app_operations
+        writers.append(MigrationWriter(migration))
+
+    return writers
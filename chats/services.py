@@ -1,35 +1,283 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import connections, router, transaction
 
-from .agent import Agent
+from .batch import BatchAnswer, get_batch_workers
+from .exports import get_result_path, import_pyarrow, is_export_enabled, is_result_stored, save_result
 from .models import Chat, Message
+from .profiling import Profiler
+from .singleflight import SingleFlight, get_question_key
+from .throttling import AdmissionController, ConcurrencyLimitExceeded
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# PandasAI answers with its own errors instead of raising them
+PANDASAI_ERROR_PREFIX = "Unfortunately, I was not able to"
 
 
 class ChatService:
     def __init__(self, chat: Chat):
         self.chat = chat
-        self.agent = Agent()
+        self.last_result = None
+        self.failed = False
 
-    def send_message(self, content: str) -> Message:
+    def send_message(self, content: str, sampled: bool = False, profile: bool = False) -> Message:
         """
         Creates a user message and a agent response message.
 
+        Identical questions asked concurrently, in any chat, share a single agent run, unless the run is profiled or
+        fails.
+
         Args:
-            chat_id (int): The chat ID.
             content (str): The message content.
+            sampled (bool): Whether to answer from the sampled tables, producing an approximate answer.
+            profile (bool): Whether to profile the agent run and store the profile alongside the response message.
+
+        Raises:
+            ConcurrencyLimitExceeded: If the agent run is not admitted by the concurrency limits.
 
         Returns:
             Message: The agent response message.
         """
+        if profile:
+            with Profiler() as profiler:
+                output, sample_fraction = self.answer(content, sampled=sampled)
+        else:
+            output, sample_fraction = SingleFlight().do(
+                get_question_key(content, sampled),
+                lambda: self.answer(content, sampled=sampled),
+                is_shareable=lambda _: not self.failed,
+            )
+
         with transaction.atomic():
             Message.objects.create(chat=self.chat, content=content, sender=Message.Sender.USER)
 
+            message = Message.objects.create(
+                chat=self.chat,
+                content=output,
+                sender=Message.Sender.AGENT,
+                sample_fraction=sample_fraction,
+            )
+
+            if profile:
+                profiler.save(message)
+
+        # Runs shared with a duplicate question have no result here, their export re-runs the question
+        if self.last_result is not None and is_export_enabled():
+            save_result(self.last_result, message.pk)
+
+        return message
+
+    def send_messages(
+        self, contents: List[str], sampled: bool = False, workers: Optional[int] = None
+    ) -> List[BatchAnswer]:
+        """
+        Answers a batch of questions concurrently and creates their user and agent messages in one bulk insert.
+
+        The questions are answered by a thread pool of the process, sharing its loaded agent stack, schema index and
+        LLM client. Runs rejected by the concurrency limits are answered with the rejection error.
+
+        Args:
+            contents (List[str]): The questions, in the order their messages are created.
+            sampled (bool): Whether to answer from the sampled tables, producing approximate answers.
+            workers (Optional[int]): Maximum number of questions answered at once, defaults to the batch
+                configuration.
+
+        Returns:
+            List[BatchAnswer]: The messages of each question, with the time taken to answer it.
+        """
+        from .agent import preload
+
+        preload()
+
+        with ThreadPoolExecutor(get_batch_workers(len(contents), workers), thread_name_prefix="batch") as executor:
+            runs = list(executor.map(lambda content: ChatService(self.chat).run_batched(content, sampled), contents))
+
+        messages = []
+        for content, (output, sample_fraction, _, _) in zip(contents, runs):
+            messages.append(Message(chat=self.chat, content=content, sender=Message.Sender.USER))
+            messages.append(
+                Message(chat=self.chat, content=output, sender=Message.Sender.AGENT, sample_fraction=sample_fraction)
+            )
+
+        with transaction.atomic():
+            Message.objects.bulk_create(messages)
+            self.chat.save(update_fields=["updated_at"])
+
+            # Backends that do not return the rows of a bulk insert, such as MySQL, leave the primary keys unset, the
+            # last messages of the chat are the ones just inserted, in order
+            if not connections[router.db_for_write(Message)].features.can_return_rows_from_bulk_insert:
+                pks = list(self.chat.messages.order_by("-pk").values_list("pk", flat=True)[: len(messages)])
+                for message, pk in zip(messages, reversed(pks)):
+                    message.pk = pk
+
+        answers = [
+            BatchAnswer(question, answer, duration)
+            for question, answer, (_, _, _, duration) in zip(messages[::2], messages[1::2], runs)
+        ]
+
+        if is_export_enabled():
+            for answer, (_, _, result, _) in zip(answers, runs):
+                if result is not None:
+                    save_result(result, answer.answer.pk)
+
+        return answers
+
+    def run_batched(
+        self, content: str, sampled: bool = False
+    ) -> Tuple[str, Optional[float], Optional["pd.DataFrame"], float]:
+        """
+        Answers a question of a batch in a thread of the batch pool.
+
+        Args:
+            content (str): The question.
+            sampled (bool): Whether to answer from the sampled tables, producing an approximate answer.
+
+        Returns:
+            Tuple[str, Optional[float], Optional[pd.DataFrame], float]: The answer, the sample fraction it was computed from,
+                the DataFrame result, if any, and the time taken to answer, in seconds.
+        """
+        start = time.perf_counter()
+
+        try:
+            output, sample_fraction = SingleFlight().do(
+                get_question_key(content, sampled),
+                lambda: self.answer(content, sampled=sampled),
+                is_shareable=lambda _: not self.failed,
+            )
+        except ConcurrencyLimitExceeded as e:
+            output, sample_fraction = str(e), None
+        finally:
+            # The thread opened its own database connections
+            connections.close_all()
+
+        return output, sample_fraction, self.last_result, time.perf_counter() - start
+
+    def answer(self, content: str, sampled: bool = False) -> Tuple[str, Optional[float]]:
+        """
+        Runs the agent on a question, keeping its DataFrame result, if any, in `last_result`, and whether it failed
+        in `failed`.
+
+        Args:
+            content (str): The question.
+            sampled (bool): Whether to answer from the sampled tables, producing an approximate answer.
+
+        Raises:
+            ConcurrencyLimitExceeded: If the agent run is not admitted by the concurrency limits.
+
+        Returns:
+            Tuple[str, Optional[float]]: The answer and the sample fraction it was computed from, if approximate.
+        """
+        # Imported on first use, so processes that never run the agent do not load PandasAI
+        import pandas as pd
+
+        from .agent import Agent
+
+        with AdmissionController().admit(self.chat.user_id):
+            agent = Agent(question=content, sampled=sampled)
+
             try:
-                output = self.agent.chat(content)
+                output = agent.chat(content)
+                self.failed = getattr(agent.pipeline, "last_error", None) is not None or (
+                    isinstance(output, str) and output.startswith(PANDASAI_ERROR_PREFIX)
+                )
             except Exception as e:
                 output = f"There was problem generating an answer: {str(e)}"
+                self.failed = True
+
+            result = agent.context.get("last_result", None) or {}
+            self.last_result = result.get("value") if isinstance(result.get("value"), pd.DataFrame) else None
+
+            return output, agent.sample_fraction
+
+    def rerun_exact(self, message: Message, profile: bool = False) -> Message:
+        """
+        Re-runs the question answered by an approximate agent message against the full tables.
+
+        Args:
+            message (Message): An approximate agent message of the chat.
+            profile (bool): Whether to profile the agent run and store the profile alongside the response message.
+
+        Returns:
+            Message: The exact agent response message.
+        """
+        return self.send_message(self.get_question(message).content, profile=profile)
+
+    def get_result(self, message: Message) -> Optional[Path]:
+        """
+        Returns the stored DataFrame result of an agent message.
+
+        Args:
+            message (Message): An agent message of the chat.
+
+        Raises:
+            ImproperlyConfigured: If PyArrow is not installed.
+
+        Returns:
+            Optional[Path]: The Parquet file of the result, or None if the result is not stored.
+        """
+        import_pyarrow()
+
+        if not is_result_stored(message.pk):
+            return None
+
+        return get_result_path(message.pk)
+
+    def store_result(self, message: Message) -> Optional[Path]:
+        """
+        Stores the DataFrame result of an agent message, re-running its question if the result is not stored.
+
+        A re-run generates new code, so its result may differ from the table shown in the message.
+
+        Args:
+            message (Message): An agent message of the chat.
+
+        Raises:
+            ImproperlyConfigured: If PyArrow is not installed, checked before re-running the question.
+            ConcurrencyLimitExceeded: If the re-run is not admitted by the concurrency limits.
+
+        Returns:
+            Optional[Path]: The Parquet file of the result, or None if the answer is not a DataFrame.
+        """
+        path = self.get_result(message)
+        if path is not None:
+            return path
+
+        self.answer(self.get_question(message).content, sampled=message.is_approximate)
+
+        if self.last_result is None:
+            return None
+
+        return save_result(self.last_result, message.pk)
+
+    def get_question(self, message: Message) -> Message:
+        """
+        Returns the user message an agent message of the chat answers.
+
+        Args:
+            message (Message): An agent message of the chat.
+
+        Raises:
+            ValueError: If the message does not answer any question.
+
+        Returns:
+            Message: The user message.
+        """
+        question = (
+            self.chat.messages.filter(sender=Message.Sender.USER, created_at__lte=message.created_at, pk__lt=message.pk)
+            .order_by("-created_at", "-pk")
+            .first()
+        )
+
+        if question is None:
+            raise ValueError("The message does not answer any question")
 
-            return Message.objects.create(chat=self.chat, content=output, sender=Message.Sender.AGENT)
+        return question
 
 
 class UserService:
@@ -0,0 +1,25 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .exports import delete_result
+from .models import Message, QueryableModel
+from .singleflight import bump_data_version
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def queryable_data_changed(sender, instance, **kwargs):
+    """
+    Bumps the data version when a QueryableModel instance or one of its relations changes.
+    """
+    if isinstance(instance, QueryableModel):
+        bump_data_version()
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    """
+    Deletes the stored result of a deleted agent message.
+    """
+    delete_result(instance.pk)
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from django.conf import settings
+
+from .cache import get_shared_cache
+
+T = TypeVar("T")
+
+DEFAULT_SINGLE_FLIGHT_CONFIG = {
+    "enabled": True,
+    "cache": "pandasai_locks",
+    "lock_timeout": 300,
+    "result_timeout": 30,
+    "wait_timeout": 300,
+    "poll_interval": 0.25,
+}
+
+KEY_PREFIX = "pandasai:singleflight"
+DATA_VERSION_KEY = "pandasai:data_version"
+
+_MISSING = object()
+
+
+def get_single_flight_config() -> Dict[str, Any]:
+    """
+    Returns the single-flight configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The single-flight configuration.
+    """
+    return DEFAULT_SINGLE_FLIGHT_CONFIG | getattr(settings, "PANDASAI_SINGLE_FLIGHT", {})
+
+
+def get_data_version() -> int:
+    """
+    Returns the version of the queryable data, bumped whenever a QueryableModel instance changes.
+
+    Returns:
+        int: The data version.
+    """
+    return get_shared_cache(get_single_flight_config()["cache"]).get(DATA_VERSION_KEY, 0)
+
+
+def bump_data_version():
+    """
+    Bumps the version of the queryable data.
+    """
+    cache = get_shared_cache(get_single_flight_config()["cache"])
+    cache.add(DATA_VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.set(DATA_VERSION_KEY, 1, timeout=None)
+
+
+def get_question_key(question: str, sampled: bool = False) -> str:
+    """
+    Returns the single-flight key of a question, built from the normalized question and the data version.
+
+    Args:
+        question (str): The question.
+        sampled (bool): Whether the question is answered from the sampled tables.
+
+    Returns:
+        str: The single-flight key.
+    """
+    normalized = " ".join(question.lower().split()).rstrip("?!. ")
+    digest = hashlib.sha256(f"{normalized}:{sampled}:{get_data_version()}".encode()).hexdigest()
+    return f"question:{digest}"
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = True
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+
+    Within a process, duplicate calls wait on the thread running the first one. Across processes, the first call
+    takes a cache lock and publishes its result in the cache, under the token of its lock, where the duplicate calls
+    waiting on that lock poll for it. Results are only kept for the `result_timeout` grace period of the waiting
+    calls, so calls arriving after the run run the function again. If the lock holder disappears without a result, or
+    its result is not shareable, a waiting call runs the function itself.
+    """
+
+    _calls: Dict[str, _Call] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_single_flight_config()
+        self.cache = get_shared_cache(self.config["cache"])
+
+    def do(self, key: str, fn: Callable[[], T], is_shareable: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        Runs a function, or waits for the result of a concurrent call with the same key.
+
+        Args:
+            key (str): The key identifying duplicate calls.
+            fn (Callable[[], T]): The function to run. Its result must be picklable.
+            is_shareable (Optional[Callable[[T], bool]]): Whether a result can be handed to the duplicate calls, e.g.
+                not an error. Defaults to sharing every result.
+
+        Returns:
+            T: The function result.
+        """
+        if not self.config["enabled"]:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result if call.shared else fn()
+
+        try:
+            call.result = self.do_shared(key, fn, is_shareable)
+            call.shared = is_shareable is None or is_shareable(call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def do_shared(self, key: str, fn: Callable[[], T], is_shareable: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        Runs a function, or waits for the result published by another process for the same key.
+
+        Args:
+            key (str): The key identifying duplicate calls.
+            fn (Callable[[], T]): The function to run.
+            is_shareable (Optional[Callable[[T], bool]]): Whether a result can be published, defaults to every result.
+
+        Returns:
+            T: The function result.
+        """
+        lock_key = f"{KEY_PREFIX}:lock:{key}"
+        token = uuid.uuid4().hex
+        holder = None
+        deadline = time.monotonic() + self.config["wait_timeout"]
+
+        def get_result(holder: Optional[str]) -> Any:
+            return _MISSING if holder is None else self.cache.get(f"{KEY_PREFIX}:result:{key}:{holder}", _MISSING)
+
+        while True:
+            # The result of the run being waited on is checked before taking the lock it releases
+            if (result := get_result(holder)) is not _MISSING:
+                return result
+
+            if self.cache.add(lock_key, token, timeout=self.config["lock_timeout"]):
+                break
+
+            holder = self.cache.get(lock_key) or holder
+
+            if time.monotonic() >= deadline:
+                return fn()
+
+            time.sleep(self.config["poll_interval"])
+
+        try:
+            # The awaited run may have released its lock between the last check and taking it
+            if (result := get_result(holder)) is not _MISSING:
+                return result
+
+            result = fn()
+            if is_shareable is None or is_shareable(result):
+                self.cache.set(f"{KEY_PREFIX}:result:{key}:{token}", result, timeout=self.config["result_timeout"])
+            return result
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
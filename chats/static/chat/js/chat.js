@@ -37,32 +37,72 @@ function clearUserInput() {
 }
 
 /**
- * Sends a chat message to the server and returns the server's response.
+ * Retrieves whether the user asked for an approximate answer from the sampled tables.
  *
- * @param {string} content - The content of the chat message to be sent.
- * @returns {Promise<string|null>} - A promise that resolves to the server's response output if successful, or null if the message sending failed.
+ * @returns {boolean} True if the sampled execution mode is selected.
  */
-async function chat(content) {
-    const chat = document.getElementById('chat').dataset.chat;
+function getSampled() {
+    const sampled = document.getElementById('sampled-input');
+    return sampled ? sampled.checked : false;
+}
+
+/**
+ * Posts a form to a chat endpoint and returns the server's response.
+ * The profile flag of the chat page, e.g. "?profile=1", is forwarded to profile the agent run.
+ *
+ * @param {string} url - The chat endpoint URL.
+ * @param {Object} [fields={}] - The form fields to send.
+ * @returns {Promise<Object|null>} - A promise that resolves to the server's response data if successful, or null if the request failed.
+ */
+async function post(url, fields = {}) {
     const csrftoken = getCookie('csrftoken');
-    const response = await fetch(`/chats/chat/${chat}/`, {
+    const profile = new URLSearchParams(window.location.search).get('profile');
+    if (profile) {
+        url += `?${new URLSearchParams({ profile: profile })}`;
+    }
+    const response = await fetch(url, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/x-www-form-urlencoded',
             'X-CSRFToken': csrftoken
         },
-        body: `content=${content}`
+        body: new URLSearchParams(fields)
     });
 
     if (response.ok) {
+        return await response.json();
+    } else if (response.status === 429) {
         const data = await response.json();
-        return data.output;
+        return { output: data.error };
     } else {
         console.error('Message sending failed');
         return null;
     }
 }
 
+/**
+ * Sends a chat message to the server and returns the server's response.
+ *
+ * @param {string} content - The content of the chat message to be sent.
+ * @param {boolean} [sampled=false] - If true, asks for an approximate answer from the sampled tables.
+ * @returns {Promise<Object|null>} - A promise that resolves to the server's response data if successful, or null if the message sending failed.
+ */
+async function chat(content, sampled = false) {
+    const chat = document.getElementById('chat').dataset.chat;
+    return await post(`/chats/chat/${chat}/`, { content: content, sampled: sampled });
+}
+
+/**
+ * Re-runs an approximate answer against the full tables and returns the server's response.
+ *
+ * @param {string} message - The ID of the approximate agent message.
+ * @returns {Promise<Object|null>} - A promise that resolves to the server's response data if successful, or null if the request failed.
+ */
+async function rerunExact(message) {
+    const chat = document.getElementById('chat').dataset.chat;
+    return await post(`/chats/chat/${chat}/messages/${message}/exact/`);
+}
+
 /**
  * Adds a loading indicator to the chat messages.
  * This function creates a new div element with the id "loading" and the class "agent message",
@@ -107,13 +147,65 @@ function formatContent(content) {
  *
  * @param {string} sender - The sender of the message.
  * @param {string} content - The content of the message.
+ * @param {Object} [data={}] - The server's response data for agent messages.
  */
-function addMessage(sender, content) {
+function addMessage(sender, content, data = {}) {
     const messages = document.getElementById('messages');
     const message = document.createElement('div');
     message.className = `${sender} message`;
     message.innerHTML = formatContent(content);
+    if (data.sample_fraction) {
+        message.appendChild(createApproximateNote(data.id, data.sample_fraction));
+    }
+    if (data.export_url) {
+        message.appendChild(createExportLinks(data.export_url, data.export_stored));
+    }
+    if (data.profile_url) {
+        const link = document.createElement('a');
+        link.className = 'profile-link';
+        link.href = data.profile_url;
+        link.target = '_blank';
+        link.textContent = 'View profile';
+        message.appendChild(link);
+    }
     messages.appendChild(message);
+    renderTables(message);
+}
+
+/**
+ * Creates the note labelling an approximate answer, with a button to re-run it exactly.
+ *
+ * @param {number} id - The ID of the approximate agent message.
+ * @param {number} fraction - The fraction of rows the answer was computed from.
+ * @returns {HTMLElement} - The approximate answer note.
+ */
+function createApproximateNote(id, fraction) {
+    const note = document.createElement('div');
+    note.className = 'approximate';
+    note.dataset.message = id;
+    note.innerHTML = `<span>Approximate answer based on a ${Math.round(fraction * 100)}% sample.</span>` +
+        '<input type="button" class="exact-button" value="Run exact">';
+    return note;
+}
+
+/**
+ * Creates the links downloading the table of an agent message as CSV or Parquet, or the button re-running its
+ * question to store the table when it is not stored.
+ *
+ * @param {string} url - The export endpoint URL of the agent message.
+ * @param {boolean} stored - Whether the table of the agent message is stored.
+ * @returns {HTMLElement} - The export links.
+ */
+function createExportLinks(url, stored) {
+    const links = document.createElement('div');
+    links.className = 'export-links';
+    links.dataset.url = url;
+    if (stored) {
+        links.innerHTML = `Export: <a href="${url}?format=csv">CSV</a> <a href="${url}?format=parquet">Parquet</a>`;
+    } else {
+        links.innerHTML = 'Export: <input type="button" class="export-button" value="Re-run to export">';
+    }
+    return links;
 }
 
 /**
@@ -129,6 +221,27 @@ function scrollToBottom(smooth = false) {
     });
 };
 
+/**
+ * Waits for an agent answer while showing the loading indicator, and adds it to the chat interface.
+ *
+ * @async
+ * @param {Promise<Object|null>} request - A promise that resolves to the server's response data.
+ * @returns {Promise<void>} A promise that resolves when the answer has been added.
+ */
+async function answer(request) {
+    addLoading();
+    scrollToBottom(true);
+
+    const data = await request;
+
+    removeLoading();
+    scrollToBottom(true);
+    if (data && data.output) {
+        addMessage('agent', data.output, data);
+        scrollToBottom(true);
+    }
+}
+
 /**
  * Handles the submission of user input in the chat interface.
  * 
@@ -142,22 +255,63 @@ async function submit() {
     if (input) {
         addMessage('user', input);
         clearUserInput();
-        addLoading();
-        scrollToBottom(true);
+        await answer(chat(input, getSampled()));
+    }
+}
 
-        const output = await chat(input);
+/**
+ * Handles clicks on the exact re-run button of an approximate answer.
+ *
+ * @async
+ * @param {MouseEvent} e - The click event.
+ * @returns {Promise<void>} A promise that resolves when the exact answer has been processed.
+ */
+async function submitExact(e) {
+    if (!e.target.classList.contains('exact-button')) {
+        return;
+    }
 
-        removeLoading();
-        scrollToBottom(true);
-        if (output) {
-            addMessage('agent', output);
-            scrollToBottom(true);
-        }
+    const note = e.target.closest('.approximate');
+    const question = note.closest('.message').previousElementSibling;
+    e.target.disabled = true;
+
+    if (question && question.classList.contains('user')) {
+        addMessage('user', question.textContent.trim());
+    }
+    await answer(rerunExact(note.dataset.message));
+}
+
+/**
+ * Handles clicks on the export button of an agent message whose table is not stored, re-running its question to
+ * store the table and replacing the button with the export links.
+ *
+ * @async
+ * @param {MouseEvent} e - The click event.
+ * @returns {Promise<void>} A promise that resolves when the table has been stored.
+ */
+async function submitExport(e) {
+    if (!e.target.classList.contains('export-button')) {
+        return;
+    }
+
+    const links = e.target.closest('.export-links');
+    e.target.disabled = true;
+
+    const data = await post(links.dataset.url);
+
+    if (data && data.export_stored) {
+        links.replaceWith(createExportLinks(data.export_url, true));
+    } else if (data) {
+        links.textContent = data.output || 'The re-run answer is not a table.';
+    } else {
+        e.target.disabled = false;
     }
 }
 
 document.addEventListener('DOMContentLoaded', () => scrollToBottom(false));
 document.getElementById('send-button').onclick = submit;
+document.getElementById('messages').addEventListener('click', submitExact);
+document.getElementById('messages').addEventListener('click', submitExport);
 document.getElementById('message-input').addEventListener('keydown', (e) => {
     if (e.key === 'Enter') {
         if (e.shiftKey) {
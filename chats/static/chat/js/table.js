@@ -0,0 +1,130 @@
+const TABLE_ROW_HEIGHT = 32;
+const TABLE_VISIBLE_ROWS = 12;
+const TABLE_OVERSCAN = 8;
+const IMAGE_PATTERN = /\.(png|jpe?g|tiff|bmp|gif|svg|webp|ico)$/i;
+
+const numberFormat = new Intl.NumberFormat(undefined, { maximumFractionDigits: 6 });
+
+/**
+ * Creates the content of a table cell from a value of the columnar payload.
+ *
+ * @param {*} value - The cell value, null if missing.
+ * @param {string} type - The display type of the column.
+ * @returns {Node} - The cell content.
+ */
+function createCellContent(value, type) {
+    if (value === null) {
+        return document.createTextNode('');
+    }
+    if (type === 'url') {
+        if (IMAGE_PATTERN.test(value)) {
+            const image = document.createElement('img');
+            image.className = 'image';
+            image.src = value;
+            image.loading = 'lazy';
+            return image;
+        }
+        const link = document.createElement('a');
+        link.className = 'link';
+        link.href = value;
+        link.textContent = value;
+        return link;
+    }
+    if (type === 'number' || type === 'integer') {
+        return document.createTextNode(numberFormat.format(value));
+    }
+    if (type === 'datetime') {
+        return document.createTextNode(value.replace('T', ' '));
+    }
+    return document.createTextNode(String(value));
+}
+
+/**
+ * Creates a spacer row standing in for the rows outside of the viewport.
+ *
+ * @param {number} rows - The number of rows it stands in for.
+ * @param {number} columns - The number of columns of the table.
+ * @returns {HTMLElement} - The spacer row.
+ */
+function createSpacerRow(rows, columns) {
+    const row = document.createElement('tr');
+    const cell = document.createElement('td');
+    cell.className = 'spacer';
+    cell.colSpan = columns;
+    cell.style.height = `${rows * TABLE_ROW_HEIGHT}px`;
+    row.appendChild(cell);
+    return row;
+}
+
+/**
+ * Renders a columnar JSON table, only creating the rows visible in its scrolled viewport.
+ *
+ * @param {HTMLElement} container - The element holding the JSON payload in a script tag.
+ */
+function renderTable(container) {
+    const payload = JSON.parse(container.querySelector('script').textContent);
+    const rowCount = payload.values.length ? payload.values[0].length : 0;
+    const columnCount = payload.columns.length;
+
+    const viewport = document.createElement('div');
+    viewport.className = 'table-viewport';
+    viewport.style.maxHeight = `${(TABLE_VISIBLE_ROWS + 1) * TABLE_ROW_HEIGHT}px`;
+
+    const table = document.createElement('table');
+    const header = table.createTHead().insertRow();
+    payload.columns.forEach((column) => {
+        const cell = document.createElement('th');
+        cell.textContent = column;
+        header.appendChild(cell);
+    });
+    const body = table.createTBody();
+
+    let first = -1;
+    const draw = () => {
+        const start = Math.max(0, Math.floor(viewport.scrollTop / TABLE_ROW_HEIGHT) - TABLE_OVERSCAN);
+        if (start === first) {
+            return;
+        }
+        first = start;
+        const end = Math.min(rowCount, start + TABLE_VISIBLE_ROWS + 2 * TABLE_OVERSCAN);
+
+        const rows = document.createDocumentFragment();
+        if (start > 0) {
+            rows.appendChild(createSpacerRow(start, columnCount));
+        }
+        for (let i = start; i < end; i++) {
+            const row = document.createElement('tr');
+            for (let j = 0; j < columnCount; j++) {
+                row.insertCell().appendChild(createCellContent(payload.values[j][i], payload.types[j]));
+            }
+            rows.appendChild(row);
+        }
+        if (end < rowCount) {
+            rows.appendChild(createSpacerRow(rowCount - end, columnCount));
+        }
+        body.replaceChildren(rows);
+    };
+
+    viewport.appendChild(table);
+    viewport.addEventListener('scroll', () => requestAnimationFrame(draw), { passive: true });
+    container.appendChild(viewport);
+
+    const summary = document.createElement('div');
+    summary.className = 'table-summary';
+    summary.textContent = `${rowCount} rows, ${columnCount} columns`;
+    container.appendChild(summary);
+
+    container.classList.add('rendered');
+    draw();
+}
+
+/**
+ * Renders the columnar JSON tables of an element that have not been rendered yet.
+ *
+ * @param {HTMLElement|Document} root - The element containing the tables.
+ */
+function renderTables(root) {
+    root.querySelectorAll('.data-table:not(.rendered)').forEach(renderTable);
+}
+
+document.addEventListener('DOMContentLoaded', () => renderTables(document));
\ No newline at end of file
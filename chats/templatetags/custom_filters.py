@@ -2,6 +2,7 @@ import re
 
 from django import template
 
+from ..exports import is_result_stored
 from ..models import Message
 
 register = template.Library()
@@ -21,3 +22,17 @@ def format_message(message: Message):
     if re.match(r"<[^>]+>", message.content):
         return message.content
     return message.content.replace("\n", "<br>")
+
+
+@register.filter(name="has_stored_result")
+def has_stored_result(message: Message) -> bool:
+    """
+    Returns whether the result of the message is stored, so it can be exported without re-running its question.
+
+    Args:
+        message (Message): A Message instance.
+
+    Returns:
+        bool: True if the result is stored.
+    """
+    return is_result_stored(message.pk)
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+
+from django.test import SimpleTestCase
+from sqlalchemy.exc import OperationalError
+
+from .agent.connectors import LimitedSqliteConnector
+from .agent.guard import SqliteCostGuard
+
+
+class FailingExplainCostGuard(SqliteCostGuard):
+    """
+    Cost guard whose EXPLAIN fails after beginning a transaction, like an EXPLAIN of a query with a syntax error.
+    """
+
+    def explain(self, connection, sql_query):
+        connection.exec_driver_sql("SELECT 1")
+        return super().explain(connection, "SELECT FROM")
+
+
+class LimitedSQLConnectorTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.database = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        self.addCleanup(os.remove, self.database)
+
+        with sqlite3.connect(self.database) as connection:
+            connection.execute("CREATE TABLE movie (id INTEGER PRIMARY KEY, title TEXT)")
+            connection.execute("INSERT INTO movie (title) VALUES ('Alien'), ('Heat')")
+
+        self.connector = LimitedSqliteConnector(
+            config={"table": "movie", "database": self.database},
+            cost_guard=FailingExplainCostGuard(),
+        )
+        self.addCleanup(self.connector._connection.close)
+
+    def test_failed_explain_does_not_leave_a_transaction(self):
+        with self.assertRaises(OperationalError):
+            self.connector.execute_direct_sql_query("SELECT title FROM movie")
+
+        self.assertFalse(self.connector._connection.in_transaction())
+
+        self.connector.cost_guard = None
+        df = self.connector.execute_direct_sql_query("SELECT title FROM movie ORDER BY id")
+
+        self.assertEqual(df["title"].tolist(), ["Alien", "Heat"])
+        self.assertFalse(self.connector._connection.in_transaction())
@@ -0,0 +1,171 @@
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from django.conf import settings
+
+from .cache import get_shared_cache
+
+DEFAULT_CONCURRENCY_CONFIG = {
+    "enabled": True,
+    "cache": "pandasai_locks",
+    "global_limit": 8,
+    "user_limit": 2,
+    "max_queue": 16,
+    "max_wait": 10,
+    "poll_interval": 0.25,
+    "lease_timeout": 300,
+    "retry_after": 5,
+}
+
+KEY_PREFIX = "pandasai:concurrency"
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """
+    Raised when an agent run cannot be admitted because the concurrency limits are saturated.
+
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"The agent is busy, retry in {retry_after} seconds.")
+        self.retry_after = retry_after
+
+
+def get_concurrency_config() -> Dict[str, Any]:
+    """
+    Returns the concurrency limits configuration merged with the defaults.
+
+    Returns:
+        Dict[str, Any]: The concurrency limits configuration.
+    """
+    return DEFAULT_CONCURRENCY_CONFIG | getattr(settings, "PANDASAI_CONCURRENCY", {})
+
+
+class AdmissionController:
+    """
+    Bounds the number of concurrent agent runs, globally and per user, across processes.
+
+    Slots are cache keys created with the atomic `cache.add`, so the limits hold across worker processes as long as
+    the configured cache is shared between them, and must not be culled, e.g. a `LeaseCache`. Runs that find no free slot wait in a bounded queue, and are
+    rejected when the queue is full or the wait exceeds `max_wait`.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_concurrency_config()
+        self.cache = get_shared_cache(self.config["cache"])
+
+    def acquire_slot(self, scope: str, limit: int, token: str) -> Optional[str]:
+        """
+        Tries to acquire one of the slots of a scope.
+
+        Args:
+            scope (str): The slots scope.
+            limit (int): The number of slots of the scope.
+            token (str): A token identifying the holder of the slot.
+
+        Returns:
+            Optional[str]: The cache key of the acquired slot, or None if all the slots are taken.
+        """
+        for index in range(limit):
+            key = f"{KEY_PREFIX}:{scope}:{index}"
+            if self.cache.add(key, token, timeout=self.config["lease_timeout"]):
+                return key
+        return None
+
+    def release_slot(self, key: Optional[str], token: str):
+        """
+        Releases a slot if it is still held by the given token.
+
+        Args:
+            key (Optional[str]): The cache key of the slot.
+            token (str): The token identifying the holder of the slot.
+        """
+        if key is not None and self.cache.get(key) == token:
+            self.cache.delete(key)
+
+    def increment(self, metric: str):
+        """
+        Increments a metric counter.
+
+        Args:
+            metric (str): The metric name.
+        """
+        key = f"{KEY_PREFIX}:metrics:{metric}"
+        self.cache.add(key, 0, timeout=None)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, timeout=None)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Returns the admission control metrics.
+
+        Returns:
+            Dict[str, int]: The queue depth, the number of busy slots and the admission counters.
+        """
+
+        def count_slots(scope: str, limit: int) -> int:
+            return len(self.cache.get_many([f"{KEY_PREFIX}:{scope}:{index}" for index in range(limit)]))
+
+        counters = ["admitted", "rejected_queue_full", "rejected_timeout"]
+        values = self.cache.get_many([f"{KEY_PREFIX}:metrics:{metric}" for metric in counters])
+
+        return {
+            "queue_depth": count_slots("queue", self.config["max_queue"]),
+            "running": count_slots("global", self.config["global_limit"]),
+            **{metric: values.get(f"{KEY_PREFIX}:metrics:{metric}", 0) for metric in counters},
+        }
+
+    @contextmanager
+    def admit(self, user_id: Any) -> Iterator[None]:
+        """
+        Admits an agent run of a user, waiting in the queue for a free slot if needed.
+
+        Args:
+            user_id (Any): The ID of the user running the agent.
+
+        Raises:
+            ConcurrencyLimitExceeded: If the queue is full or no slot is freed within the maximum wait.
+        """
+        if not self.config["enabled"]:
+            yield
+            return
+
+        token = uuid.uuid4().hex
+        user_key = global_key = None
+
+        queue_key = self.acquire_slot("queue", self.config["max_queue"], token)
+        if queue_key is None:
+            self.increment("rejected_queue_full")
+            raise ConcurrencyLimitExceeded(self.config["retry_after"])
+
+        try:
+            deadline = time.monotonic() + self.config["max_wait"]
+            while True:
+                user_key = self.acquire_slot(f"user:{user_id}", self.config["user_limit"], token)
+                if user_key is not None:
+                    global_key = self.acquire_slot("global", self.config["global_limit"], token)
+                    if global_key is not None:
+                        break
+                    self.release_slot(user_key, token)
+                    user_key = None
+
+                if time.monotonic() >= deadline:
+                    self.increment("rejected_timeout")
+                    raise ConcurrencyLimitExceeded(self.config["retry_after"])
+
+                time.sleep(self.config["poll_interval"])
+        finally:
+            self.release_slot(queue_key, token)
+
+        self.increment("admitted")
+        try:
+            yield
+        finally:
+            self.release_slot(global_key, token)
+            self.release_slot(user_key, token)
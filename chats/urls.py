@@ -1,7 +1,11 @@
 from django.urls import path
 
-from .views import ChatView
+from .views import BatchView, ChatView, ExactRerunView, ExportView, MetricsView
 
 urlpatterns = [
     path("chat/<int:id>/", ChatView.as_view(), name="chat"),
+    path("chat/<int:id>/batch/", BatchView.as_view(), name="batch"),
+    path("chat/<int:id>/messages/<int:message_id>/exact/", ExactRerunView.as_view(), name="exact_rerun"),
+    path("chat/<int:id>/messages/<int:message_id>/export/", ExportView.as_view(), name="export"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,17 +1,67 @@
+from typing import Optional
+
 from django.contrib.admin.views.decorators import staff_member_required
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.http import (
+    FileResponse,
     HttpRequest,
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseNotFound,
     JsonResponse,
+    StreamingHttpResponse,
 )
+from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.generic import View
 
-from .models import Chat
+from .batch import get_batch_config
+from .exports import is_export_available, is_result_stored, iter_csv
+from .models import Chat, Message
+from .profiling import should_profile
 from .services import ChatService
+from .throttling import AdmissionController, ConcurrencyLimitExceeded
+
+
+def serialize_message(message: Message) -> dict:
+    """
+    Serializes an agent message into the chat endpoints response payload.
+
+    Args:
+        message (Message): A Message instance.
+
+    Returns:
+        dict: The response payload.
+    """
+    payload = {
+        "id": message.id,
+        "output": message.content,
+        "sample_fraction": message.sample_fraction,
+    }
+
+    if message.has_table and is_export_available():
+        payload["export_url"] = reverse("export", args=(message.chat_id, message.pk))
+        payload["export_stored"] = is_result_stored(message.pk)
+
+    if hasattr(message, "profile"):
+        payload["profile_url"] = reverse("admin:chats_profile_change", args=(message.profile.pk,))
+
+    return payload
+
+
+def too_many_requests(error: ConcurrencyLimitExceeded) -> HttpResponse:
+    """
+    Returns the response to an agent run rejected by the concurrency limits.
+
+    Args:
+        error (ConcurrencyLimitExceeded): The concurrency limit error.
+
+    Returns:
+        HttpResponse: A 429 response with a Retry-After header.
+    """
+    response = JsonResponse({"error": str(error)}, status=429)
+    response["Retry-After"] = str(error.retry_after)
+    return response
 
 
 class ChatView(View):
@@ -32,8 +82,198 @@ class ChatView(View):
             return HttpResponseBadRequest()
 
         content = request.POST.get("content")
+        sampled = request.POST.get("sampled") == "true"
 
         service = ChatService(chat)
-        message = service.send_message(content)
 
-        return JsonResponse({"output": message.content})
+        try:
+            message = service.send_message(content, sampled=sampled, profile=should_profile(request))
+        except ConcurrencyLimitExceeded as e:
+            return too_many_requests(e)
+
+        return JsonResponse(serialize_message(message))
+
+
+class BatchView(View):
+    """
+    Class-based view to answer a batch of questions concurrently, e.g. the questions of a recurring report.
+
+    The questions are answered within the request, so batches are limited to `max_request_questions` questions, few
+    enough to be answered before the server times the request out. Longer batches are asked with the `ask_questions`
+    management command.
+    """
+
+    @method_decorator(staff_member_required)
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request: HttpRequest, id: int) -> HttpResponse:
+        try:
+            chat = Chat.objects.get(id=id, user=request.user)
+        except ObjectDoesNotExist:
+            return HttpResponseNotFound()
+
+        contents = [content for content in request.POST.getlist("questions") if content.strip()]
+        sampled = request.POST.get("sampled") == "true"
+
+        if not contents:
+            return HttpResponseBadRequest()
+
+        max_questions = get_batch_config()["max_request_questions"]
+        if len(contents) > max_questions:
+            return HttpResponseBadRequest(
+                f"At most {max_questions} questions are answered per request, ask longer batches with the "
+                "ask_questions management command."
+            )
+
+        service = ChatService(chat)
+        answers = service.send_messages(contents, sampled=sampled)
+
+        return JsonResponse(
+            {
+                "messages": [
+                    serialize_message(answer.answer)
+                    | {"question": answer.question.content, "duration": answer.duration}
+                    for answer in answers
+                ]
+            }
+        )
+
+
+class ExactRerunView(View):
+    """
+    Class-based view to re-run an approximate answer against the full tables.
+    """
+
+    @method_decorator(staff_member_required)
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request: HttpRequest, id: int, message_id: int) -> HttpResponse:
+        try:
+            message = Message.objects.select_related("chat").get(
+                id=message_id,
+                chat_id=id,
+                chat__user=request.user,
+                sample_fraction__isnull=False,
+            )
+        except ObjectDoesNotExist:
+            return HttpResponseNotFound()
+
+        service = ChatService(message.chat)
+
+        try:
+            message = service.rerun_exact(message, profile=should_profile(request))
+        except ValueError:
+            return HttpResponseBadRequest()
+        except ConcurrencyLimitExceeded as e:
+            return too_many_requests(e)
+
+        return JsonResponse(serialize_message(message))
+
+
+class ExportView(View):
+    """
+    Class-based view to download the DataFrame result of an agent message as CSV or Parquet.
+
+    GET only serves the stored Parquet file, and CSV is streamed one batch of rows at a time, so the memory used does
+    not grow with the size of the result. POST re-runs the question of a result that is not stored and stores it. A
+    re-run generates new code, so its result may differ from the table shown in the message.
+    """
+
+    FORMATS = ("csv", "parquet")
+
+    @method_decorator(staff_member_required)
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request: HttpRequest, id: int, message_id: int) -> HttpResponse:
+        export_format = request.GET.get("format", "csv")
+        if export_format not in self.FORMATS:
+            return HttpResponseBadRequest()
+
+        message = self.get_message(request, id, message_id)
+        if message is None:
+            return HttpResponseNotFound()
+
+        service = ChatService(message.chat)
+
+        try:
+            path = service.get_result(message)
+        except ImproperlyConfigured as e:
+            return HttpResponse(str(e), status=406, content_type="text/plain")
+
+        if path is None:
+            return HttpResponseNotFound("The result is not stored, re-run the question to export it.")
+
+        filename = f"result-{message.pk}.{export_format}"
+
+        if export_format == "parquet":
+            return FileResponse(open(path, "rb"), as_attachment=True, filename=filename)
+
+        response = StreamingHttpResponse(iter_csv(path), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def post(self, request: HttpRequest, id: int, message_id: int) -> HttpResponse:
+        message = self.get_message(request, id, message_id)
+        if message is None:
+            return HttpResponseNotFound()
+
+        service = ChatService(message.chat)
+
+        try:
+            path = service.store_result(message)
+        except ImproperlyConfigured as e:
+            return HttpResponse(str(e), status=406, content_type="text/plain")
+        except ValueError:
+            return HttpResponseBadRequest()
+        except ConcurrencyLimitExceeded as e:
+            return too_many_requests(e)
+
+        return JsonResponse({"export_url": request.path, "export_stored": path is not None})
+
+    def get_message(self, request: HttpRequest, id: int, message_id: int) -> Optional[Message]:
+        """
+        Returns the agent message with a table to export, from a chat of the user.
+
+        Args:
+            request (HttpRequest): The request.
+            id (int): Identifier of the chat.
+            message_id (int): Identifier of the agent message.
+
+        Returns:
+            Optional[Message]: The message, or None if it does not exist or has no table.
+        """
+        try:
+            message = Message.objects.select_related("chat").get(
+                id=message_id,
+                chat_id=id,
+                chat__user=request.user,
+                sender=Message.Sender.AGENT,
+            )
+        except ObjectDoesNotExist:
+            return None
+
+        return message if message.has_table else None
+
+
+class MetricsView(View):
+    """
+    Class-based view to export the agent admission control metrics in the Prometheus text format.
+    """
+
+    @method_decorator(staff_member_required)
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        metrics = AdmissionController().get_metrics()
+        lines = [
+            f"pandasai_queue_depth {metrics['queue_depth']}",
+            f"pandasai_running {metrics['running']}",
+            f"pandasai_admitted_total {metrics['admitted']}",
+            f'pandasai_rejected_total{{reason="queue_full"}} {metrics["rejected_queue_full"]}',
+            f'pandasai_rejected_total{{reason="timeout"}} {metrics["rejected_timeout"]}',
+        ]
+        return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4")
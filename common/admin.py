@@ -1,8 +1,30 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import md5
+from typing import List, Optional, Sequence
+
+from adminfilters.autocomplete import AutoCompleteFilter
 from django.contrib import admin
-from django.db import models
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, ChangeList
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models
+from django.db.models import Exists, OuterRef, Q
 from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete, post_save
+from django.http import QueryDict
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+
+DEFAULT_AUTOCOMPLETE_CACHE = "pandasai"
+
 
 class YearListFilter(admin.FieldListFilter):
     template = "adminfilters/combobox.html"
@@ -52,3 +74,274 @@ class YearListFilter(admin.FieldListFilter):
                 "query_string": changelist.get_query_string({self.lookup_kwarg: val}, [self.lookup_kwarg_isnull]),
                 "display": title,
             }
+
+
+def estimate_count(queryset: models.QuerySet) -> Optional[int]:
+    """
+    Estimates the number of rows of a queryset from the query planner, without running the query.
+
+    Args:
+        queryset (QuerySet): The queryset.
+
+    Returns:
+        Optional[int]: The estimated number of rows, or None if the database has no planner estimates.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner estimate of the number of objects when it is above a threshold, instead of counting
+    them exactly.
+
+    Attributes:
+        threshold (int): Number of objects from which the estimate is used.
+        is_estimated (bool): Whether the count is an estimate.
+    """
+
+    def __init__(self, *args, threshold: int = 10000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+        self.is_estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+
+        if estimate is not None and estimate >= self.threshold:
+            self.is_estimated = True
+            return estimate
+
+        return super().count
+
+
+class ExistsAutoCompleteFilter(AutoCompleteFilter):
+    """
+    Autocomplete filter on a many-to-many field, filtering with an EXISTS subquery on the through table instead of a
+    join, so the filtered rows have no duplicates to remove with DISTINCT.
+    """
+
+    def queryset(self, request, queryset):
+        if not self.field.many_to_many:
+            return super().queryset(request, queryset)
+
+        through = self.field.remote_field.through
+        source = self.field.m2m_field_name()
+        target = self.field.m2m_reverse_field_name()
+        related = through.objects.filter(**{source: OuterRef("pk")})
+
+        # Parameters are lists of values, any of which can match
+        values = self.used_parameters.get(self.lookup_kwarg)
+        if values:
+            queryset = queryset.filter(Exists(related.filter(**{f"{target}__in": values})))
+
+        isnull = set(self.used_parameters.get(self.lookup_kwarg_isnull, []))
+        if isnull == {True}:
+            queryset = queryset.filter(~Exists(related))
+        elif isnull == {False}:
+            queryset = queryset.filter(Exists(related))
+
+        return queryset
+
+
+class ScalableChangeList(ChangeList):
+    """
+    Change list paginated by seeking past the ordering key of the last row of a page, instead of skipping the rows of
+    the previous pages with OFFSET.
+
+    The keyset pagination is used with the default ordering, offset pagination when the list is sorted by a column.
+    Rows filtered by EXISTS subqueries are not made distinct.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = self.before = None
+        self.next_cursor = self.previous_cursor = None
+        self.show_all_url = None
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def encode_cursor(values: Sequence) -> str:
+        return urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+    def decode_cursor(self, cursor: Optional[str]) -> Optional[List]:
+        if not cursor:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except ValueError as e:
+            raise IncorrectLookupParameters(e) from e
+
+        if not isinstance(values, list) or len(values) != len(self.model_admin.keyset_ordering):
+            raise IncorrectLookupParameters(f"The cursor must hold {len(self.model_admin.keyset_ordering)} values.")
+
+        return values
+
+    @property
+    def is_keyset_paginated(self) -> bool:
+        return ORDER_VAR not in self.params and not (self.show_all and self.can_show_all)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for key in [AFTER_VAR, BEFORE_VAR]:
+            lookup_params.pop(key, None)
+        return lookup_params
+
+    def get_filters(self, request):
+        filter_specs, has_filters, lookup_params, may_have_duplicates, has_active_filters = super().get_filters(request)
+
+        if may_have_duplicates:
+            may_have_duplicates = any(lookup_spawns_duplicates(self.lookup_opts, key) for key in lookup_params) or any(
+                spec.used_parameters and lookup_spawns_duplicates(self.lookup_opts, spec.field_path)
+                for spec in filter_specs
+                if isinstance(spec, admin.FieldListFilter) and not isinstance(spec, ExistsAutoCompleteFilter)
+            )
+
+        return filter_specs, has_filters, lookup_params, may_have_duplicates, has_active_filters
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Changing the filters, search or ordering starts again from the first page
+        new_params = new_params or {}
+        remove = [*(remove or []), *[key for key in [AFTER_VAR, BEFORE_VAR] if key not in new_params]]
+        return super().get_query_string(new_params, remove)
+
+    def get_keyset_filter(self, values: Sequence, descending: bool = False) -> Q:
+        """
+        Returns the filter of the rows past a key in the keyset ordering, i.e. (a, b) > (x, y) as
+        a >= x AND (a > x OR (a = x AND b > y)), whose first condition lets the database seek in the index.
+
+        Args:
+            values (List): The key.
+            descending (bool): Whether to filter the rows before the key instead.
+
+        Returns:
+            Q: The keyset filter.
+        """
+        lookup = "lt" if descending else "gt"
+        fields = self.model_admin.keyset_ordering
+
+        q = Q()
+        for i, field in enumerate(fields):
+            q |= Q(**dict(zip(fields[:i], values[:i])), **{f"{field}__{lookup}": values[i]})
+
+        return Q(**{f"{fields[0]}__{lookup}e": values[0]}) & q
+
+    def get_results(self, request):
+        super().get_results(request)
+
+        if not self.is_keyset_paginated:
+            return
+
+        self.show_all_url = self.get_query_string({ALL_VAR: ""})
+        self.after = self.decode_cursor(request.GET.get(AFTER_VAR))
+        self.before = self.decode_cursor(request.GET.get(BEFORE_VAR))
+
+        if self.after is not None and self.before is not None:
+            raise IncorrectLookupParameters(f"Only one of {AFTER_VAR} and {BEFORE_VAR} can be given.")
+
+        fields = self.model_admin.keyset_ordering
+        queryset = self.queryset.order_by(*fields)
+
+        if self.before is not None:
+            reversed_queryset = self.queryset.order_by(*[f"-{field}" for field in fields])
+            page = reversed_queryset.filter(self.get_keyset_filter(self.before, descending=True))
+            pks = list(page.values_list("pk", flat=True)[: self.list_per_page])
+            self.result_list = queryset.filter(pk__in=pks)
+        else:
+            if self.after is not None:
+                queryset = queryset.filter(self.get_keyset_filter(self.after))
+            self.result_list = queryset[: self.list_per_page]
+
+        keys = [[getattr(obj, field) for field in fields] for obj in self.result_list]
+        if keys:
+            first, last = keys[0], keys[-1]
+            is_first_page = self.after is None and self.before is None
+            if not is_first_page and self.queryset.filter(self.get_keyset_filter(first, descending=True)).exists():
+                self.previous_cursor = self.get_query_string({BEFORE_VAR: self.encode_cursor(first)})
+            if self.queryset.filter(self.get_keyset_filter(last)).exists():
+                self.next_cursor = self.get_query_string({AFTER_VAR: self.encode_cursor(last)})
+        elif self.before is not None or self.after is not None:
+            self.previous_cursor = self.get_query_string()
+
+
+class ScalableAdminMixin(admin.ModelAdmin):
+    """
+    Keeps the change list of large tables fast: the number of rows is estimated by the query planner above a
+    threshold, the default ordering is paginated by keyset, and the full count of unfiltered rows is not shown.
+
+    Attributes:
+        keyset_ordering (List[str]): Fields of the keyset, unique and non-null together, e.g. ["title", "pk"]. They
+            are model attributes, and an index on them lets the database seek to each page.
+        estimated_count_threshold (int): Number of rows from which the planner estimate is used.
+    """
+
+    keyset_ordering: List[str] = ["pk"]
+    estimated_count_threshold = 10000
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/scalable_change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, threshold=self.estimated_count_threshold
+        )
+
+
+def get_autocomplete_cache() -> BaseCache:
+    """
+    Returns the cache of the autocomplete results, set by the `ADMIN_AUTOCOMPLETE_CACHE` setting. It must be shared
+    between the worker processes, so that saving a row invalidates the results cached by every process.
+
+    Returns:
+        BaseCache: The autocomplete cache.
+    """
+    return caches[getattr(settings, "ADMIN_AUTOCOMPLETE_CACHE", DEFAULT_AUTOCOMPLETE_CACHE)]
+
+
+def get_autocomplete_cache_key(model: models.Model, params: QueryDict) -> str:
+    """
+    Returns the cache key of the autocomplete results of a request, for the current version of the model rows.
+
+    Args:
+        model (Model): The model searched.
+        params (QueryDict): The autocomplete request parameters: term, page and source field.
+
+    Returns:
+        str: The cache key.
+    """
+    version = get_autocomplete_cache().get(f"autocomplete:{model._meta.label_lower}", 0)
+    digest = md5(params.urlencode().encode(), usedforsecurity=False).hexdigest()
+    return f"autocomplete:{model._meta.label_lower}:{version}:{digest}"
+
+
+class CachedAutocompleteMixin(admin.ModelAdmin):
+    """
+    Serves the autocomplete results of a model from the cache, for models whose search results are the same for every
+    user. The cached results are invalidated when a row of the model is saved or deleted.
+
+    Attributes:
+        autocomplete_cache_timeout (int): Number of seconds the results are cached.
+    """
+
+    autocomplete_cache_timeout = 300
+
+    def __init__(self, model, admin_site):
+        super().__init__(model, admin_site)
+
+        for signal in [post_save, post_delete]:
+            signal.connect(self.invalidate_autocomplete_cache, sender=model, weak=False, dispatch_uid=id(self))
+
+    def invalidate_autocomplete_cache(self, **kwargs):
+        cache = get_autocomplete_cache()
+        key = f"autocomplete:{self.model._meta.label_lower}"
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
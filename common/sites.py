@@ -0,0 +1,66 @@
+from django.contrib import admin
+from django.contrib.admin.apps import AdminConfig as BaseAdminConfig
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+
+from common.admin import get_autocomplete_cache, get_autocomplete_cache_key
+
+
+class CachedAutocompleteJsonView(AutocompleteJsonView):
+    """
+    Autocomplete view fetching one row past the page to know if there is a next page, instead of counting the
+    search results, and serving the results from the cache for the model admins with `autocomplete_cache_timeout`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        self.term, self.model_admin, self.source_field, to_field_name = self.process_request(request)
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        timeout = getattr(self.model_admin, "autocomplete_cache_timeout", None)
+        if not timeout:
+            return JsonResponse(self.get_results(to_field_name))
+
+        cache = get_autocomplete_cache()
+        key = get_autocomplete_cache_key(self.model_admin.model, request.GET)
+        results = cache.get(key)
+
+        if results is None:
+            results = self.get_results(to_field_name)
+            cache.set(key, results, timeout)
+
+        return JsonResponse(results)
+
+    def get_results(self, to_field_name: str) -> dict:
+        """
+        Returns a page of search results.
+
+        Args:
+            to_field_name (str): Name of the field identifying the results.
+
+        Returns:
+            dict: The results and whether there is a next page.
+        """
+        try:
+            page = max(int(self.request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+
+        start = (page - 1) * self.paginate_by
+        objects = list(self.get_queryset()[start : start + self.paginate_by + 1])
+
+        return {
+            "results": [self.serialize_result(obj, to_field_name) for obj in objects[: self.paginate_by]],
+            "pagination": {"more": len(objects) > self.paginate_by},
+        }
+
+
+class AdminSite(admin.AdminSite):
+    def autocomplete_view(self, request):
+        return CachedAutocompleteJsonView.as_view(admin_site=self)(request)
+
+
+class AdminConfig(BaseAdminConfig):
+    default_site = "common.sites.AdminSite"
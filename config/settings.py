@@ -2,9 +2,6 @@ import os
 from pathlib import Path
 
 import environ
-import matplotlib
-
-matplotlib.use("agg")
 
 env = environ.Env(DEBUG=(bool, False))
 
@@ -14,13 +11,14 @@ DEBUG = env.bool("DEBUG", default=False)
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    "common.sites.AdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "adminfilters",
+    "common",
     "chats",
     "movies",
 ]
@@ -62,7 +60,63 @@ DATABASES = {
     }
 }
 
-PANDASAI_CONFIG = {"llm": "OpenAI", "enable_cache": False}
+PANDASAI_CONFIG = {
+    "llm": "OpenAI",
+    "llm_client": {"timeout_budget": 120, "request_timeout": 60, "retries": 2, "hedge_after": 20},
+    "enable_cache": False,
+}
+
+PANDASAI_DATABASE = "default"
+
+PANDASAI_QUERY_LIMITS = {"statement_timeout": 30, "max_rows": 100000}
+
+PANDASAI_COST_GUARD = {"action": "rewrite", "max_cost": 1000000, "max_rows": 100000}
+
+PANDASAI_SAMPLING = {"enabled": False, "fraction": 0.1, "seed": 42}
+
+PANDASAI_CONCURRENCY = {"cache": "pandasai_locks", "global_limit": 8, "user_limit": 2, "max_queue": 16, "max_wait": 10}
+
+PANDASAI_SINGLE_FLIGHT = {"cache": "pandasai_locks", "result_timeout": 30}
+
+PANDASAI_SCHEMA_SELECTION = {"enabled": True, "top_k": 3, "max_tables": 8}
+
+PANDASAI_PROMPT_SCHEMA = {"cache": "pandasai", "sample_rows": 3, "max_value_length": 24}
+
+PANDASAI_COLUMNAR = {"enabled": False, "path": "snapshots"}
+
+PANDASAI_CODE_EXECUTION = {"enabled": False, "workers": 2, "memory_limit": 2048, "cpu_time_limit": 30}
+
+PANDASAI_PRELOAD = env.bool("PANDASAI_PRELOAD", default=False)
+
+PANDASAI_PROFILING = {"enabled": True, "sample_rate": 0}
+
+PANDASAI_COMPRESSION = {"threshold": 1024, "level": 6}
+
+PANDASAI_ARCHIVING = {"retention_days": 90, "batch_size": 100}
+
+PANDASAI_TABLES = {"format": "auto", "json_min_rows": 100}
+
+PANDASAI_EXPORTS = {"enabled": False, "path": "results"}
+
+PANDASAI_BATCH = {"workers": 4, "max_questions": 50, "max_request_questions": 10}
+
+PANDASAI_DTYPES = {"enabled": True, "chunk_size": 10000}
+
+PANDASAI_QUERY_LOG = {"enabled": False, "sample_rate": 1.0, "retention_days": 30}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "pandasai": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "pandasai_cache",
+    },
+    "pandasai_locks": {
+        "BACKEND": "chats.cache.LeaseCache",
+        "LOCATION": "pandasai_locks",
+    },
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
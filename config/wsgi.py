@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+from chats.agent import is_preload_enabled, preload  # noqa: E402
+
+if is_preload_enabled():
+    preload()
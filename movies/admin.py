@@ -2,7 +2,7 @@ from adminfilters.filters import AutoCompleteFilter, ChoicesFieldComboFilter
 from adminfilters.mixin import AdminFiltersMixin
 from django.contrib import admin
 
-from common.admin import YearListFilter
+from common.admin import CachedAutocompleteMixin, ExistsAutoCompleteFilter, ScalableAdminMixin, YearListFilter
 from movies.models import Company, Contributor, Genre, Keyword, Language, Movie
 
 
@@ -17,22 +17,22 @@ class LanguageAdmin(admin.ModelAdmin):
 
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(CachedAutocompleteMixin, admin.ModelAdmin):
     search_fields = ["name"]
 
 
 @admin.register(Contributor)
-class ContributorAdmin(admin.ModelAdmin):
+class ContributorAdmin(CachedAutocompleteMixin, admin.ModelAdmin):
     search_fields = ["name"]
 
 
 @admin.register(Keyword)
-class KeywordAdmin(admin.ModelAdmin):
+class KeywordAdmin(CachedAutocompleteMixin, admin.ModelAdmin):
     search_fields = ["name"]
 
 
 @admin.register(Movie)
-class MovieAdmin(AdminFiltersMixin, admin.ModelAdmin):
+class MovieAdmin(AdminFiltersMixin, ScalableAdminMixin, CachedAutocompleteMixin, admin.ModelAdmin):
     search_fields = ["title"]
     list_display = [
         "title",
@@ -42,12 +42,14 @@ class MovieAdmin(AdminFiltersMixin, admin.ModelAdmin):
     list_filter = [
         ("release_date", YearListFilter),
         ("status", ChoicesFieldComboFilter),
-        ("genres", AutoCompleteFilter),
+        ("genres", ExistsAutoCompleteFilter),
         ("original_language", AutoCompleteFilter),
-        ("production_companies", AutoCompleteFilter),
-        ("credits", AutoCompleteFilter),
-        ("keywords", AutoCompleteFilter),
-        ("recommendations", AutoCompleteFilter),
+        ("production_companies", ExistsAutoCompleteFilter),
+        ("credits", ExistsAutoCompleteFilter),
+        ("keywords", ExistsAutoCompleteFilter),
+        ("recommendations", ExistsAutoCompleteFilter),
     ]
-    filter_horizontal = ["genres", "production_companies", "credits", "keywords", "recommendations"]
+    filter_horizontal = ["genres"]
+    autocomplete_fields = ["production_companies", "credits", "keywords", "recommendations"]
     ordering = ["title"]
+    keyset_ordering = ["title", "pk"]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0003_movie_title_id_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="company",
+            name="name",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="contributor",
+            name="name",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="keyword",
+            name="name",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -12,6 +12,8 @@ class Movie(QueryableModel):
         RELEASED = "Released"
         CANCELED = "Canceled"
 
+    sample_stratify_by = "status"
+
     title = models.CharField(max_length=255)
     genres = models.ManyToManyField("Genre", blank=True)
     original_language = models.ForeignKey("Language", on_delete=models.CASCADE)
@@ -37,6 +39,7 @@ class Movie(QueryableModel):
 
     class Meta:
         ordering = ["title"]
+        indexes = [models.Index(fields=["title", "id"], name="movie_title_id_idx")]
 
 
 class Genre(QueryableModel):
@@ -61,7 +64,7 @@ class Language(QueryableModel):
 
 
 class Company(QueryableModel):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
 
     def __str__(self):
         return self.name
@@ -72,7 +75,7 @@ class Company(QueryableModel):
 
 
 class Keyword(QueryableModel):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
 
     def __str__(self):
         return self.name
@@ -82,7 +85,7 @@ class Keyword(QueryableModel):
 
 
 class Contributor(QueryableModel):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
 
     def __str__(self):
         return self.name